@@ -20,10 +20,24 @@ const MLModels = ({ API_ENDPOINT, searching, data }) => {
             const modelTrainingResponse = await axios.post(`${API_ENDPOINT}tested-model`, {
                 model_data: data.modelData,
                 target: data.metricType === "pitching" ? "zone" : "description",
-                model_type: modelType
+                model_type: modelType,
+                player_id: data.playerId
             });
+            const jobId = modelTrainingResponse.data.job_id;
 
-            setTrainResponse(modelTrainingResponse.data);
+            // Poll the training job until it finishes
+            let job = null;
+            do {
+                await new Promise((resolve) => setTimeout(resolve, 1000));
+                const jobResponse = await axios.get(`${API_ENDPOINT}training-jobs/${jobId}`);
+                job = jobResponse.data;
+            } while (job.status === "queued" || job.status === "running");
+
+            if (job.status !== "completed") {
+                throw new Error(`Training job ${job.status}: ${job.error}`);
+            }
+
+            setTrainResponse(job.result);
             setIsTraining(2);
         } catch (error) {
             console.error('Error during model training:', error);
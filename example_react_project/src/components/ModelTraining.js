@@ -35,6 +35,7 @@ const ModelTraining = ({ modelType, setModelType, isTraining, trainResponse, han
                         <MenuItem value="gradient_boosting">Gradient Boosting</MenuItem>
                         <MenuItem value="hist_gradient_boosting">Histogram Gradient Boosting</MenuItem>
                         <MenuItem value="svc">Support Vector Classification</MenuItem>
+                        <MenuItem value="sgd_logistic_regression">SGD Logistic Regression (updatable)</MenuItem>
                     </Select>
                 </FormControl>
             </Grid>
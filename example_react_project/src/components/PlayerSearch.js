@@ -41,7 +41,8 @@ const PlayerSearch = ({ API_ENDPOINT, onSearchStarted, onSearchComplete }) => {
             console.log('Getting player plate crossing data...');
             const plateCrossingResponse = await axios.post(`${API_ENDPOINT}plate-crossing-metrics`, {
                 player_metrics: playerSpecificMetrics,
-                metric_type: metricType
+                metric_type: metricType,
+                max_points: 5000
             });
             const plateCrossingData = plateCrossingResponse.data;
 
@@ -0,0 +1,1344 @@
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import deque
+from importlib import metadata
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+import mlb_metrics_helpers
+import model_data
+import serialization
+import pitch_features
+import plot_rendering
+import startup
+import streaming_training
+import strike_zone
+import synthetic_statcast
+from compact_frames import memory_report
+from plot_rendering import RenderCache
+
+# Clayton Kershaw, a pitcher with a long Statcast-era career
+DEFAULT_PLAYER_ID = 477132
+
+MODEL_TYPES = [
+    "logistic_regression",
+    "random_forest",
+    "gradient_boosting",
+    "hist_gradient_boosting",
+    "svc",
+    "sgd_logistic_regression",
+]
+
+
+def timed(function: Callable, repeat: int = 3) -> tuple[object, float]:
+    """
+    Calls a function several times and measures the fastest call.
+
+    Args:
+        function (Callable): The function to call (without arguments).
+        repeat (int, optional): The number of calls. Defaults to 3.
+
+    Returns:
+        tuple[object, float]: The result of the last call and the fastest call time in seconds.
+    """
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+
+    return result, best
+
+
+def career_metrics(
+    player_id: int, metric_type: str = "pitching"
+) -> pd.DataFrame:
+    """
+    Retrieves the specific metrics of a player's whole career.
+
+    Args:
+        player_id (int): The ID of the player.
+        metric_type (str, optional): The type of metric to retrieve (either "pitching" or "batting"). Defaults to "pitching".
+
+    Returns:
+        pd.DataFrame: A DataFrame containing the specific metrics of the player's career.
+    """
+
+    general_metrics = mlb_metrics_helpers.player_general_metrics(player_id)
+    start_dt, end_dt = mlb_metrics_helpers.parse_career_timeline(general_metrics)
+    return mlb_metrics_helpers.player_specific_metrics(
+        player_id, metric_type, start_dt, end_dt
+    )
+
+
+def serialization_benchmark(df: pd.DataFrame, repeat: int = 3) -> list[dict]:
+    """
+    Measures the payload size and serialization time of a DataFrame in each response format.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to serialize.
+        repeat (int, optional): The number of timed serializations per format. Defaults to 3.
+
+    Returns:
+        list[dict]: The format, payload size in bytes, and fastest serialization time in seconds for each format.
+    """
+
+    results = []
+    for response_format in serialization.FORMAT_MIMETYPES:
+        payload, seconds = timed(
+            lambda: serialization.serialized_frame(df, response_format), repeat
+        )
+        results.append(
+            {
+                "format": response_format,
+                "payload_bytes": len(payload),
+                "seconds": seconds,
+            }
+        )
+
+    return results
+
+
+def model_data_and_target(
+    metrics: pd.DataFrame, metric_type: str = "pitching"
+) -> tuple[pd.DataFrame, str]:
+    """
+    Prepares model data from player-specific metrics.
+
+    Args:
+        metrics (pd.DataFrame): The player-specific metrics.
+        metric_type (str, optional): The type of metrics (either "pitching" or "batting"). Defaults to "pitching".
+
+    Returns:
+        tuple[pd.DataFrame, str]: The model data and its target column.
+    """
+
+    if metric_type == "pitching":
+        return mlb_metrics_helpers.pitcher_model_data(metrics), "zone"
+    return mlb_metrics_helpers.batter_model_data(metrics), "description"
+
+
+def prediction_benchmark(
+    model_data: pd.DataFrame, target: str, repeat: int = 3, single_rows: int = 200
+) -> list[dict]:
+    """
+    Measures prediction throughput for each model type, in batch mode and one row at a time.
+
+    Args:
+        model_data (pd.DataFrame): The model data to train on and predict.
+        target (str): The target column to predict.
+        repeat (int, optional): The number of timed batch predictions per model type. Defaults to 3.
+        single_rows (int, optional): The number of rows predicted one at a time. Defaults to 200.
+
+    Returns:
+        list[dict]: The batch and single-row rows per second for each model type.
+    """
+
+    X = model_data.drop(columns=[target])
+
+    results = []
+    for model_type in MODEL_TYPES:
+        model, _ = mlb_metrics_helpers.tested_model(model_data, target, model_type)
+
+        _, batch_seconds = timed(
+            lambda: mlb_metrics_helpers.model_predictions(model, X), repeat
+        )
+        sample = X.iloc[:single_rows]
+        _, single_seconds = timed(
+            lambda: [
+                mlb_metrics_helpers.model_prediction(model, sample.iloc[[i]])
+                for i in range(len(sample))
+            ],
+            1,
+        )
+
+        results.append(
+            {
+                "model_type": model_type,
+                "batch_rows_per_second": len(X) / batch_seconds,
+                "single_rows_per_second": len(sample) / single_seconds,
+            }
+        )
+
+    return results
+
+
+def latency_benchmark(
+    model_data: pd.DataFrame, target: str, single_rows: int = 500
+) -> list[dict]:
+    """
+    Measures single-row prediction latency for each model type, through the pipeline (as /predict did) and the compiled model.
+
+    Args:
+        model_data (pd.DataFrame): The model data to train on and predict.
+        target (str): The target column to predict.
+        single_rows (int, optional): The number of rows predicted one at a time. Defaults to 500.
+
+    Returns:
+        list[dict]: The p50 and p99 latency in microseconds of each path for each model type.
+    """
+
+    # Rows in the format sent to /predict (each value wrapped in a list)
+    feature_rows = [
+        {column: [value] for column, value in row.items()}
+        for row in model_data.drop(columns=[target])
+        .iloc[:single_rows]
+        .to_dict("records")
+    ]
+
+    results = []
+    for model_type in MODEL_TYPES:
+        model, _ = mlb_metrics_helpers.tested_model(model_data, target, model_type)
+
+        paths = {
+            "pipeline": lambda row: mlb_metrics_helpers.model_prediction(
+                model, pd.DataFrame(row)
+            )
+        }
+        if model.compiled_ is not None:
+            paths["compiled"] = model.compiled_.prediction
+
+        for path, predict in paths.items():
+            latencies = []
+            for row in feature_rows:
+                start = time.perf_counter()
+                predict(row)
+                latencies.append(time.perf_counter() - start)
+
+            results.append(
+                {
+                    "model_type": model_type,
+                    "path": path,
+                    "p50_us": np.percentile(latencies, 50) * 1e6,
+                    "p99_us": np.percentile(latencies, 99) * 1e6,
+                }
+            )
+
+    return results
+
+
+def update_benchmark(
+    model_data: pd.DataFrame, target: str, new_rows: int = 300
+) -> list[dict]:
+    """
+    Measures the time to update each model type with new rows, compared with retraining it on all rows.
+    The last rows of the model data play the part of a new game.
+
+    Args:
+        model_data (pd.DataFrame): The model data to train on.
+        target (str): The target column to predict.
+        new_rows (int, optional): The number of rows added by the update. Defaults to 300.
+
+    Returns:
+        list[dict]: The update method, update time and full retrain time in seconds for each model type.
+    """
+
+    old_data, new_data = model_data.iloc[:-new_rows], model_data.iloc[-new_rows:]
+
+    results = []
+    for model_type in MODEL_TYPES:
+        model, _ = mlb_metrics_helpers.tested_model(old_data, target, model_type)
+
+        (_, _, update_method), update_seconds = timed(
+            lambda: mlb_metrics_helpers.updated_model(
+                model, old_data, new_data, target
+            ),
+            1,
+        )
+        _, retrain_seconds = timed(
+            lambda: mlb_metrics_helpers.tested_model(
+                model_data, target, model_type
+            ),
+            1,
+        )
+
+        results.append(
+            {
+                "model_type": model_type,
+                "update_method": update_method,
+                "update_seconds": update_seconds,
+                "retrain_seconds": retrain_seconds,
+            }
+        )
+
+    return results
+
+
+def render_benchmark(
+    metrics: pd.DataFrame, metric_type: str = "pitching", repeat: int = 5
+) -> list[dict]:
+    """
+    Measures plot renders per second for the PNG endpoints' plots, and for a render cache hit.
+
+    Args:
+        metrics (pd.DataFrame): The player-specific metrics to plot.
+        metric_type (str, optional): The type of metrics (either "pitching" or "batting"). Defaults to "pitching".
+        repeat (int, optional): The number of renders per plot. Defaults to 5.
+
+    Returns:
+        list[dict]: The renders per second and image size in bytes of each plot.
+    """
+
+    probas, labels = [0.1, 0.2, 0.3, 0.4], ["1", "2", "3", "4"]
+    render_cache = plot_rendering.RenderCache()
+    render_cache.put(
+        plot_rendering.render_key("prediction-probas-bar", probas, labels),
+        plot_rendering.prediction_probas_bar_bytes(probas, labels),
+    )
+
+    renders = {
+        "plate_crossing_scatter": lambda: plot_rendering.figure_bytes(
+            mlb_metrics_helpers.plate_crossing_scatter(metrics, metric_type)
+        ),
+        "plate_crossing_scatter (5000 points)": lambda: plot_rendering.figure_bytes(
+            mlb_metrics_helpers.plate_crossing_scatter(metrics, metric_type, 5000)
+        ),
+        "plate_crossing_heatmap": lambda: plot_rendering.figure_bytes(
+            mlb_metrics_helpers.plate_crossing_heatmap(metrics, metric_type)
+        ),
+        "prediction_probas_bar (seaborn)": lambda: plot_rendering.figure_bytes(
+            mlb_metrics_helpers.plot_prediction_probas(probas, labels),
+            bbox_inches="tight",
+        ),
+        "prediction_probas_bar (direct Agg)": lambda: (
+            plot_rendering.prediction_probas_bar_bytes(probas, labels)
+        ),
+        "render cache hit": lambda: render_cache.get(
+            plot_rendering.render_key("prediction-probas-bar", probas, labels)
+        ),
+    }
+
+    results = []
+    for plot, render in renders.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            image = render()
+        seconds = time.perf_counter() - start
+
+        results.append(
+            {
+                "plot": plot,
+                "renders_per_second": repeat / seconds,
+                "image_bytes": len(image),
+            }
+        )
+
+    return results
+
+
+def rowwise_trajectory_features(X: pd.DataFrame) -> pd.DataFrame:
+    """
+    Computes the trajectory features of pitch_features one row at a time, the way derived features used to be computed
+    (baseline of the feature benchmark).
+
+    Args:
+        X (pd.DataFrame): Feature dataset with the trajectory columns.
+
+    Returns:
+        pd.DataFrame: The same features as pitch_features.trajectory_features.
+    """
+
+    def time_at(y, vy0, ay):
+        distance = y - pitch_features.TRAJECTORY_Y
+        return -2 * distance / (math.sqrt(vy0**2 + 2 * ay * distance) - vy0)
+
+    rows = []
+    for _, row in X.iterrows():
+        release_time = time_at(row["release_pos_y"], row["vy0"], row["ay"])
+        plate_time = time_at(pitch_features.PLATE_Y, row["vy0"], row["ay"])
+        flight_time = plate_time - release_time
+
+        if "plate_x" in row:
+            crossing_x = row["plate_x"]
+        else:
+            x50 = (
+                row["release_pos_x"]
+                - row["vx0"] * release_time
+                - 0.5 * row["ax"] * release_time**2
+            )
+            crossing_x = x50 + row["vx0"] * plate_time + 0.5 * row["ax"] * plate_time**2
+        in_zone_x = abs(crossing_x) <= strike_zone.STRIKE_ZONE_HALF_WIDTH
+
+        features = {
+            "plate_time": flight_time,
+            "horizontal_break": 0.5 * row["ax"] * flight_time**2,
+            "induced_vertical_break": 0.5
+            * (row["az"] + pitch_features.GRAVITY)
+            * flight_time**2,
+            "crossing_x": crossing_x,
+            "in_zone_x": float(in_zone_x),
+        }
+        if "plate_z" in row:
+            features["in_zone"] = float(
+                in_zone_x
+                and strike_zone.STRIKE_ZONE_BOTTOM
+                <= row["plate_z"]
+                <= strike_zone.STRIKE_ZONE_TOP
+            )
+        rows.append(features)
+
+    return pd.DataFrame(rows, index=X.index)
+
+
+def rowwise_pitch_mix(
+    player_specific_metrics: pd.DataFrame, window: int = 20
+) -> pd.DataFrame:
+    """
+    Computes the rolling pitch mix of pitch_features with a rolling window per game, one pitch at a time
+    (baseline of the feature benchmark).
+
+    Args:
+        player_specific_metrics (pd.DataFrame): DataFrame containing player-specific metrics.
+        window (int, optional): The number of previous pitches the mix is computed over. Defaults to 20.
+
+    Returns:
+        pd.DataFrame: The same columns as pitch_features.pitch_mix_features.
+    """
+
+    pitch_types = sorted(player_specific_metrics["pitch_type"].dropna().unique())
+    ordered = player_specific_metrics.sort_values(
+        ["game_pk", "at_bat_number", "pitch_number"]
+    )
+
+    mixes = {}
+    for _, game in ordered.groupby("game_pk", sort=False):
+        previous = deque(maxlen=window)
+        for index, pitch_type in game["pitch_type"].items():
+            mixes[index] = {
+                f"mix_{t}": (previous.count(t) / len(previous) if previous else 0.0)
+                for t in pitch_types
+            }
+            previous.append(pitch_type)
+
+    return pd.DataFrame.from_dict(mixes, orient="index").loc[
+        player_specific_metrics.index
+    ]
+
+
+def feature_benchmark(metrics: pd.DataFrame, repeat: int = 3) -> list[dict]:
+    """
+    Measures the vectorized feature engineering of pitch_features against row-wise baselines, and checks they agree.
+
+    Args:
+        metrics (pd.DataFrame): The player-specific metrics.
+        repeat (int, optional): The number of timed calls per implementation. Defaults to 3.
+
+    Returns:
+        list[dict]: The rows per second of each implementation, its speedup over the row-wise baseline and whether the results match.
+    """
+
+    X = metrics.dropna(subset=pitch_features.TRAJECTORY_COLUMNS)
+    cases = {
+        "trajectory_features": (
+            lambda: pitch_features.trajectory_features(X),
+            lambda: rowwise_trajectory_features(X),
+            len(X),
+        ),
+        "pitch_mix_features": (
+            lambda: pitch_features.pitch_mix_features(metrics),
+            lambda: rowwise_pitch_mix(metrics),
+            len(metrics),
+        ),
+    }
+
+    results = []
+    for feature, (vectorized, rowwise, rows) in cases.items():
+        vectorized_result, vectorized_seconds = timed(vectorized, repeat)
+        rowwise_result, rowwise_seconds = timed(rowwise, 1)
+
+        results.append(
+            {
+                "feature": feature,
+                "vectorized_rows_per_second": rows / vectorized_seconds,
+                "rowwise_rows_per_second": rows / rowwise_seconds,
+                "speedup": rowwise_seconds / vectorized_seconds,
+                "matches": np.allclose(
+                    vectorized_result.to_numpy(dtype=float),
+                    rowwise_result[vectorized_result.columns].to_numpy(dtype=float),
+                    equal_nan=True,
+                ),
+            }
+        )
+
+    return results
+
+
+def chained_model_data(
+    player_specific_metrics: pd.DataFrame, metric_type: str = "pitching"
+) -> pd.DataFrame:
+    """
+    Prepares model data by slicing the spec columns, filtering the rows and dropping missing values in place
+    (baseline of the model data benchmark, as the helpers did before model_data.prepared_model_data).
+
+    Args:
+        player_specific_metrics (pd.DataFrame): DataFrame containing player-specific metrics.
+        metric_type (str, optional): The type of metrics (either "pitching" or "batting"). Defaults to "pitching".
+
+    Returns:
+        pd.DataFrame: The same model data as model_data.prepared_model_data.
+    """
+
+    spec = model_data.model_data_spec(metric_type)
+
+    prepared = player_specific_metrics[spec.columns]
+    if spec.target_values is not None:
+        prepared = prepared[prepared[spec.target].isin(spec.target_values)]
+    prepared.dropna(inplace=True)
+
+    return prepared
+
+
+def peak_memory(function: Callable) -> tuple[object, int]:
+    """
+    Calls a function and measures the peak memory it allocates (NumPy and pandas allocations are traced).
+
+    Args:
+        function (Callable): The function to call (without arguments).
+
+    Returns:
+        tuple[object, int]: The result of the call and its peak allocated bytes.
+    """
+
+    tracemalloc.start()
+    try:
+        result = function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return result, peak
+
+
+def model_data_benchmark(
+    metrics: pd.DataFrame, metric_type: str = "pitching", repeat: int = 3
+) -> list[dict]:
+    """
+    Measures the time and peak memory of model data preparation: the chained baseline
+    and the single-pass DataFrame of model_data.prepared_model_data.
+
+    Args:
+        metrics (pd.DataFrame): The player-specific metrics.
+        metric_type (str, optional): The type of metrics (either "pitching" or "batting"). Defaults to "pitching".
+        repeat (int, optional): The number of timed calls per implementation. Defaults to 3.
+
+    Returns:
+        list[dict]: The time, peak allocated bytes and output rows of each implementation, and whether its rows match the baseline.
+    """
+
+    cases = {
+        "chained": lambda: chained_model_data(metrics, metric_type),
+        "prepared_model_data": lambda: model_data.prepared_model_data(
+            metrics, metric_type
+        ),
+    }
+
+    results = []
+    baseline_index = None
+    for name, prepare in cases.items():
+        # Run once untraced first, so lazy imports and caches are not counted
+        _, seconds = timed(prepare, repeat)
+        prepared, peak_bytes = peak_memory(prepare)
+
+        if baseline_index is None:
+            baseline_index = prepared.index
+        results.append(
+            {
+                "implementation": name,
+                "seconds": seconds,
+                "peak_bytes": peak_bytes,
+                "rows": len(prepared.index),
+                "matches": prepared.index.equals(baseline_index),
+            }
+        )
+
+    return results
+
+
+def streaming_benchmark(
+    metric_type: str = "pitching",
+    careers: list[int] = None,
+    chunk_rows: int = 10_000,
+    seed: int = 0,
+) -> list[dict]:
+    """
+    Measures the time, peak memory and accuracy of streaming training (SGD logistic regression) on model data files
+    of a growing number of synthetic careers, compared with reading the whole file and training in memory.
+    Peak memory of streaming training should stay flat as the number of rows grows.
+
+    Args:
+        metric_type (str, optional): The type of metrics (either "pitching" or "batting"). Defaults to "pitching".
+        careers (list[int], optional): The numbers of synthetic careers in each model data file. Defaults to None ([1, 4, 16]).
+        chunk_rows (int, optional): The number of rows read at a time by streaming training. Defaults to 10,000.
+        seed (int, optional): The seed of the first synthetic career. Defaults to 0.
+
+    Returns:
+        list[dict]: The rows, time, peak allocated bytes and accuracy of each training mode and file size.
+    """
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if careers is None:
+        careers = [1, 4, 16]
+
+    # Import the modelling modules first, so their import is not counted in the peak memory
+    startup.warm_up(["modelling"])
+
+    results = []
+    with tempfile.TemporaryDirectory() as data_dir:
+        for n_careers in careers:
+            # Write the model data one career at a time
+            path = os.path.join(data_dir, f"model_data_{n_careers}.parquet")
+            writer = None
+            for career in range(n_careers):
+                metrics = synthetic_statcast.synthetic_specific_metrics(
+                    "career", metric_type, seed + career
+                )
+                model_data, target = model_data_and_target(metrics, metric_type)
+                table = pa.Table.from_pandas(model_data, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+            writer.close()
+            rows = pq.ParquetFile(path).metadata.num_rows
+
+            cases = {
+                "streamed": lambda: streaming_training.streamed_model(
+                    lambda: streaming_training.file_chunks(path, chunk_rows),
+                    target,
+                    "sgd_logistic_regression",
+                )[1],
+                "in_memory": lambda: mlb_metrics_helpers.tested_model(
+                    pd.read_parquet(path),
+                    target,
+                    "sgd_logistic_regression",
+                )[1],
+            }
+            for mode, train in cases.items():
+                start = time.perf_counter()
+                accuracy, peak_bytes = peak_memory(train)
+                results.append(
+                    {
+                        "mode": mode,
+                        "rows": rows,
+                        "seconds": time.perf_counter() - start,
+                        "peak_bytes": peak_bytes,
+                        "accuracy": accuracy,
+                    }
+                )
+
+    return results
+
+
+def startup_benchmark(repeat: int = 3) -> list[dict]:
+    """
+    Measures the cold import time of the backend and of each heavy module, each in a fresh interpreter.
+
+    Args:
+        repeat (int, optional): The number of fresh interpreters per module. Defaults to 3.
+
+    Returns:
+        list[dict]: The feature area and fastest cold import time in seconds of each module.
+    """
+
+    modules = [("backend", "mlb_metrics_helpers"), ("backend", "flask_backend")]
+    modules += [
+        (area, module)
+        for area, area_modules in startup.FEATURE_MODULES.items()
+        for module in area_modules
+    ]
+
+    results = []
+    for area, module in modules:
+        code = (
+            "import time; start = time.perf_counter(); "
+            f"import {module}; print(time.perf_counter() - start)"
+        )
+        seconds = min(
+            float(
+                subprocess.run(
+                    [sys.executable, "-c", code],
+                    cwd=os.path.dirname(os.path.abspath(__file__)),
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                ).stdout
+            )
+            for _ in range(repeat)
+        )
+        results.append({"area": area, "module": module, "seconds": seconds})
+
+    return results
+
+
+def fake_upstream_server(latency: float = 0.1):
+    """
+    Starts a local fake upstream: a keep-alive HTTP server answering every GET with a small JSON body after a delay,
+    and counting the requests and client connections it receives.
+
+    Args:
+        latency (float, optional): The response delay in seconds. Defaults to 0.1.
+
+    Returns:
+        tuple[ThreadingHTTPServer, dict]: The running server (call shutdown when done) and its counters
+            ("requests" and "connections", the set of client addresses).
+    """
+
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    counters = {"requests": 0, "connections": set()}
+    lock = threading.Lock()
+
+    class FakeUpstreamHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            with lock:
+                counters["requests"] += 1
+                counters["connections"].add(self.client_address)
+            time.sleep(latency)
+
+            body = json.dumps({"path": self.path}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeUpstreamHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server, counters
+
+
+def upstream_benchmark(
+    callers: int = 16, latency: float = 0.1, rate: float = 20, burst: int = 4
+) -> list[dict]:
+    """
+    Measures the upstream access layer against a local fake upstream, with concurrent callers started at once:
+    - direct: every caller sends its own request with requests.get (no layer, a new connection each)
+    - coalesced: every caller asks for the same data, which is fetched once
+    - cached: the same data again, served from the TTL cache without any request
+    - rate_limited: every caller asks for different data, sent through the token bucket
+    - pooled: the same distinct requests sent again, over the kept-alive connections
+
+    Args:
+        callers (int, optional): The number of concurrent callers. Defaults to 16.
+        latency (float, optional): The response delay of the fake upstream in seconds. Defaults to 0.1.
+        rate (float, optional): The rate limit of the rate_limited scenario (requests per second). Defaults to 20.
+        burst (int, optional): The burst size of the rate_limited scenario. Defaults to 4.
+
+    Returns:
+        list[dict]: The time, upstream requests and new connections of each scenario, and the layer counters.
+    """
+
+    import requests
+
+    from upstream import Upstream
+
+    server, counters = fake_upstream_server(latency)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def fetch(upstream: Upstream, path: str) -> dict:
+        return upstream.get(f"{url}/{path}", timeout=10).json()
+
+    def run_callers(call: Callable[[int], object]) -> float:
+        barrier = threading.Barrier(callers)
+
+        def caller(i: int):
+            barrier.wait()
+            return call(i)
+
+        start = time.perf_counter()
+        threads = [
+            threading.Thread(target=caller, args=(i,)) for i in range(callers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start
+
+    unlimited = Upstream(rate=1e6, burst=callers, pool_size=callers, pooled_modules=[])
+    limited = Upstream(rate=rate, burst=burst, pool_size=callers, pooled_modules=[])
+    scenarios = {
+        "direct": (
+            None,
+            lambda i: requests.get(f"{url}/player/1", timeout=10).json(),
+        ),
+        "coalesced": (
+            unlimited,
+            lambda i: unlimited.call(
+                ("player", 1), fetch, unlimited, "player/1", ttl=60
+            ),
+        ),
+        "cached": (
+            unlimited,
+            lambda i: unlimited.call(
+                ("player", 1), fetch, unlimited, "player/1", ttl=60
+            ),
+        ),
+        "rate_limited": (
+            limited,
+            lambda i: limited.call(("player", i), fetch, limited, f"player/{i}"),
+        ),
+        "pooled": (
+            limited,
+            lambda i: limited.call(("player", i), fetch, limited, f"player/{i}"),
+        ),
+    }
+
+    results = []
+    try:
+        for scenario, (upstream, call) in scenarios.items():
+            requests_before = counters["requests"]
+            connections_before = len(counters["connections"])
+            layer_before = upstream.stats() if upstream else {}
+
+            seconds = run_callers(call)
+
+            layer = upstream.stats() if upstream else {}
+            results.append(
+                {
+                    "scenario": scenario,
+                    "callers": callers,
+                    "seconds": seconds,
+                    "requests": counters["requests"] - requests_before,
+                    "connections": len(counters["connections"]) - connections_before,
+                    **{
+                        counter: layer.get(counter, 0) - layer_before.get(counter, 0)
+                        for counter in ["coalesced", "cached", "throttled"]
+                    },
+                }
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    return results
+
+
+def helper_cases(
+    metrics: pd.DataFrame, metric_type: str, train: bool, repeat: int = 3
+) -> list[dict]:
+    """
+    Times the helpers used by the endpoints on one dataset: data preparation, plots and, if train is set,
+    training every model type and predicting one row with it. Training is timed once per model type.
+    If train is not set, the training and prediction cases are reported as skipped (with no time).
+
+    Args:
+        metrics (pd.DataFrame): The player-specific metrics.
+        metric_type (str): The type of metrics (either "pitching" or "batting").
+        train (bool): Whether to time training and prediction.
+        repeat (int, optional): The number of timed calls of the other helpers. Defaults to 3.
+
+    Returns:
+        list[dict]: The case name and fastest time in seconds (None if skipped) of each helper.
+    """
+
+    model_data, target = model_data_and_target(metrics, metric_type)
+    plate_metrics = mlb_metrics_helpers.plate_crossing_metrics(metrics, metric_type)
+
+    cases = {
+        "plate_crossing_metrics": lambda: mlb_metrics_helpers.plate_crossing_metrics(
+            metrics, metric_type
+        ),
+        f"{'pitcher' if metric_type == 'pitching' else 'batter'}_model_data": lambda: (
+            model_data_and_target(metrics, metric_type)
+        ),
+        "plate_crossing_scatter": lambda: plot_rendering.figure_bytes(
+            mlb_metrics_helpers.plate_crossing_scatter(plate_metrics, metric_type)
+        ),
+        "plate_crossing_heatmap": lambda: plot_rendering.figure_bytes(
+            mlb_metrics_helpers.plate_crossing_heatmap(plate_metrics, metric_type)
+        ),
+        "plot_prediction_probas": lambda: plot_rendering.figure_bytes(
+            mlb_metrics_helpers.plot_prediction_probas(
+                [0.2, 0.3, 0.5], ["a", "b", "c"]
+            ),
+            bbox_inches="tight",
+        ),
+    }
+    if train:
+        cases["model_datasets"] = lambda: mlb_metrics_helpers.model_datasets(
+            model_data, target
+        )
+
+    results = [
+        {"case": case, "seconds": timed(function, repeat)[1]}
+        for case, function in cases.items()
+    ]
+
+    if train:
+        sample = model_data.drop(columns=[target]).iloc[[0]]
+        for model_type in MODEL_TYPES:
+            (model, _), train_seconds = timed(
+                lambda: mlb_metrics_helpers.tested_model(
+                    model_data, target, model_type
+                ),
+                1,
+            )
+            _, predict_seconds = timed(
+                lambda: mlb_metrics_helpers.model_prediction(model, sample), repeat
+            )
+            results += [
+                {"case": f"tested_model[{model_type}]", "seconds": train_seconds},
+                {"case": f"model_prediction[{model_type}]", "seconds": predict_seconds},
+            ]
+    else:
+        results.append({"case": "model_datasets", "seconds": None})
+        for model_type in MODEL_TYPES:
+            results += [
+                {"case": f"tested_model[{model_type}]", "seconds": None},
+                {"case": f"model_prediction[{model_type}]", "seconds": None},
+            ]
+
+    return results
+
+
+def endpoint_cases(
+    client, metrics: pd.DataFrame, metric_type: str, train: bool, repeat: int = 3
+) -> list[dict]:
+    """
+    Times requests to the endpoints through the Flask test client, with the metrics sent inline as JSON.
+    If train is set, also times synchronous training (logistic regression, timed once) and predictions with the trained model,
+    otherwise those cases are reported as skipped (with no time).
+
+    Args:
+        client (FlaskClient): The test client of the Flask app.
+        metrics (pd.DataFrame): The player-specific metrics.
+        metric_type (str): The type of metrics (either "pitching" or "batting").
+        train (bool): Whether to time training and prediction.
+        repeat (int, optional): The number of timed requests per endpoint. Defaults to 3.
+
+    Returns:
+        list[dict]: The case name and fastest time in seconds (None if skipped) of each endpoint.
+
+    Raises:
+        RuntimeError: If an endpoint does not respond with status 200.
+    """
+
+    import flask_backend
+
+    def post(endpoint: str, body: str):
+        response = client.post(
+            f"{flask_backend.api_base}/{endpoint}",
+            data=body,
+            content_type="application/json",
+        )
+        if response.status_code != 200:
+            raise RuntimeError(
+                f"{endpoint} responded {response.status_code}: "
+                f"{response.get_data(as_text=True)}"
+            )
+        return response
+
+    # Request bodies are encoded once, so only the server side is timed
+    metrics_body = (
+        f'{{"metric_type": "{metric_type}", "player_metrics": '
+        f'{metrics.to_json(orient="records", date_format="iso")}}}'
+    )
+    cases = {
+        "POST /plate-crossing-metrics": ("plate-crossing-metrics", metrics_body),
+        "POST /model-data": ("model-data", metrics_body),
+        "POST /plate-crossing-scatter": ("plate-crossing-scatter", metrics_body),
+    }
+
+    results = [
+        {"case": case, "seconds": timed(lambda: post(*request_args), repeat)[1]}
+        for case, request_args in cases.items()
+    ]
+
+    if train:
+        model_data, target = model_data_and_target(metrics, metric_type)
+        X = model_data.drop(columns=[target])
+
+        training_body = json.dumps(
+            {
+                "model_data": json.loads(model_data.to_json(orient="records")),
+                "target": target,
+                "model_type": "logistic_regression",
+                "sync": True,
+            }
+        )
+        response, seconds = timed(lambda: post("tested-model", training_body), 1)
+        results.append({"case": "POST /tested-model (sync)", "seconds": seconds})
+        model_uuid = response.get_json()["model_uuid"]
+
+        # /predict takes each feature value wrapped in a list
+        row = json.loads(X.iloc[[0]].to_json(orient="records"))[0]
+        predict_body = json.dumps(
+            {
+                "model_uuid": model_uuid,
+                "feature_data": {column: [value] for column, value in row.items()},
+            }
+        )
+        batch_predict_body = json.dumps(
+            {
+                "model_uuid": model_uuid,
+                "feature_data": json.loads(X.to_json(orient="records")),
+            }
+        )
+        response, seconds = timed(lambda: post("predict", predict_body), repeat)
+        results.append({"case": "POST /predict", "seconds": seconds})
+        _, seconds = timed(lambda: post("batch-predict", batch_predict_body), repeat)
+        results.append({"case": "POST /batch-predict", "seconds": seconds})
+
+        probas_body = json.dumps(
+            {
+                "prediction_probas": response.get_json()["prediction_probas"],
+                "class_labels": response.get_json()["class_labels"],
+            }
+        )
+        _, seconds = timed(lambda: post("prediction-probas-bar", probas_body), repeat)
+        results.append({"case": "POST /prediction-probas-bar", "seconds": seconds})
+    else:
+        results += [
+            {"case": case, "seconds": None}
+            for case in [
+                "POST /tested-model (sync)",
+                "POST /predict",
+                "POST /batch-predict",
+                "POST /prediction-probas-bar",
+            ]
+        ]
+
+    return results
+
+
+def suite_benchmark(
+    sizes: list[str] = None,
+    training_sizes: list[str] = None,
+    metric_types: list[str] = None,
+    repeat: int = 3,
+    seed: int = 0,
+) -> list[dict]:
+    """
+    Runs the offline benchmark suite on synthetic Statcast metrics (see synthetic_statcast) of each size and metric type:
+    the helpers, and the endpoints through the Flask test client.
+    Models are only trained on the training sizes, since training every model type on a whole career takes minutes,
+    so the training and prediction cases of the other sizes are reported as skipped (with no time).
+    The render and training caches are disabled and models are stored in a temporary directory while the suite runs.
+
+    Args:
+        sizes (list[str], optional): The dataset sizes. Defaults to None (every size of synthetic_statcast.SIZES).
+        training_sizes (list[str], optional): The dataset sizes models are trained on. Defaults to None ("month" and "season").
+        metric_types (list[str], optional): The types of metrics. Defaults to None (pitching and batting).
+        repeat (int, optional): The number of timed calls of each case (training is timed once). Defaults to 3.
+        seed (int, optional): The seed of the synthetic metrics. Defaults to 0.
+
+    Returns:
+        list[dict]: The group ("helpers" or "endpoints"), case, metric type, size, number of pitches and fastest time in seconds (None if skipped) of each case.
+    """
+
+    import flask_backend
+    from model_store import ModelStore
+
+    # Import the heavy modules first, so the first case of each feature area does not pay for them
+    startup.warm_up()
+
+    sizes = sizes or list(synthetic_statcast.SIZES)
+    training_sizes = ["month", "season"] if training_sizes is None else training_sizes
+    metric_types = metric_types or ["pitching", "batting"]
+
+    # Measure uncached work, and keep the models trained by the suite out of the model store
+    # (the training cache indexes the models of the temporary store, so it starts empty)
+    original_caches = (flask_backend.render_cache, flask_backend.model_store)
+    results = []
+    with tempfile.TemporaryDirectory() as model_dir:
+        flask_backend.render_cache = RenderCache(max_bytes=0)
+        flask_backend.model_store = ModelStore(model_dir)
+        client = flask_backend.app.test_client()
+
+        try:
+            for metric_type in metric_types:
+                for size in sizes:
+                    metrics = synthetic_statcast.synthetic_specific_metrics(
+                        size, metric_type, seed
+                    )
+                    train = size in training_sizes
+                    for group, cases in [
+                        ("helpers", helper_cases(metrics, metric_type, train, repeat)),
+                        (
+                            "endpoints",
+                            endpoint_cases(client, metrics, metric_type, train, repeat),
+                        ),
+                    ]:
+                        for case in cases:
+                            results.append(
+                                {
+                                    "group": group,
+                                    "case": case["case"],
+                                    "metric_type": metric_type,
+                                    "size": size,
+                                    "rows": len(metrics),
+                                    "seconds": case["seconds"],
+                                }
+                            )
+        finally:
+            flask_backend.render_cache, flask_backend.model_store = original_caches
+
+    return results
+
+
+def results_metadata(seed: int = 0) -> dict:
+    """
+    Describes the environment benchmark results were measured in, so saved results can be compared between commits.
+
+    Args:
+        seed (int, optional): The seed of the synthetic metrics. Defaults to 0.
+
+    Returns:
+        dict: The commit, time, Python and library versions, machine and seed.
+    """
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "libraries": {
+            library: metadata.version(library)
+            for library in ["pandas", "numpy", "scikit-learn", "matplotlib", "flask"]
+        },
+        "machine": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": seed,
+    }
+
+
+def compared_results(
+    baseline: list[dict], results: list[dict], tolerance: float = 0.1
+) -> list[dict]:
+    """
+    Compares benchmark results with baseline results of the same cases (ex from an earlier commit).
+
+    Args:
+        baseline (list[dict]): The baseline results.
+        results (list[dict]): The new results.
+        tolerance (float, optional): The relative change in time below which a case is unchanged. Defaults to 0.1.
+
+    Returns:
+        list[dict]: The case, baseline and new time, ratio and status ("regression", "improvement", "unchanged", "new" or "skipped") of each new result.
+    """
+
+    def case_key(result):
+        return tuple(
+            result.get(key) for key in ["group", "case", "metric_type", "size"]
+        )
+
+    baseline_seconds = {case_key(result): result["seconds"] for result in baseline}
+
+    comparison = []
+    for result in results:
+        before = baseline_seconds.get(case_key(result))
+        ratio = (
+            None
+            if before is None or result["seconds"] is None
+            else result["seconds"] / before
+        )
+        if result["seconds"] is None:
+            status = "skipped"
+        elif ratio is None:
+            status = "new"
+        elif ratio > 1 + tolerance:
+            status = "regression"
+        elif ratio < 1 - tolerance:
+            status = "improvement"
+        else:
+            status = "unchanged"
+
+        comparison.append(
+            {
+                "group": result["group"],
+                "case": result["case"],
+                "metric_type": result["metric_type"],
+                "size": result["size"],
+                "baseline_seconds": before,
+                "seconds": result["seconds"],
+                "ratio": ratio,
+                "status": status,
+            }
+        )
+
+    return comparison
+
+
+def print_results(title: str, results: list[dict]):
+    """
+    Prints benchmark results as a table.
+
+    Args:
+        title (str): The title printed above the table.
+        results (list[dict]): The benchmark results, one dictionary per row.
+    """
+
+    print(title)
+    print(pd.DataFrame(results).to_string(index=False))
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the MLB metrics backend.")
+    parser.add_argument(
+        "benchmark",
+        choices=[
+            "serialization",
+            "memory",
+            "prediction",
+            "latency",
+            "update",
+            "render",
+            "features",
+            "model-data",
+            "streaming",
+            "startup",
+            "upstream",
+            "suite",
+        ],
+    )
+    parser.add_argument("--player-id", type=int, default=DEFAULT_PLAYER_ID)
+    parser.add_argument(
+        "--metric-type", choices=["pitching", "batting"], default="pitching"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--synthetic",
+        choices=list(synthetic_statcast.SIZES),
+        help="Use synthetic metrics of this size instead of fetching the player's career.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--sizes", nargs="+", choices=list(synthetic_statcast.SIZES), default=None
+    )
+    parser.add_argument("--output", help="Save the suite results to this JSON file.")
+    parser.add_argument(
+        "--baseline", help="Compare the suite results with this saved JSON file."
+    )
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.benchmark == "startup":
+        print_results("Cold import time per module", startup_benchmark(args.repeat))
+        sys.exit()
+
+    if args.benchmark == "upstream":
+        print_results(
+            "Upstream access layer against a local fake upstream", upstream_benchmark()
+        )
+        sys.exit()
+
+    if args.benchmark == "streaming":
+        print_results(
+            "Streaming training compared with in-memory training",
+            streaming_benchmark(args.metric_type, seed=args.seed),
+        )
+        sys.exit()
+
+    if args.benchmark == "suite":
+        results = suite_benchmark(args.sizes, repeat=args.repeat, seed=args.seed)
+        print_results("Offline benchmark suite on synthetic metrics", results)
+
+        skipped_sizes = list(
+            dict.fromkeys(r["size"] for r in results if r["seconds"] is None)
+        )
+        if skipped_sizes:
+            print(
+                f"Training and prediction cases skipped for sizes: {', '.join(skipped_sizes)} "
+                "(models are only trained on the month and season sizes)"
+            )
+            print()
+
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(
+                    {"metadata": results_metadata(args.seed), "results": results},
+                    f,
+                    indent=2,
+                )
+        if args.baseline:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            print_results(
+                f"Comparison with {args.baseline} (commit {baseline['metadata']['commit']})",
+                compared_results(baseline["results"], results, args.tolerance),
+            )
+        sys.exit()
+
+    if args.synthetic:
+        metrics = synthetic_statcast.synthetic_specific_metrics(
+            args.synthetic, args.metric_type, args.seed
+        )
+    else:
+        metrics = career_metrics(args.player_id, args.metric_type)
+
+    if args.benchmark == "serialization":
+        print_results(
+            f"Serialization of {len(metrics)} rows x {len(metrics.columns)} columns",
+            serialization_benchmark(metrics, args.repeat),
+        )
+    elif args.benchmark == "memory":
+        print_results(
+            "Memory usage of full and compact metrics per season",
+            memory_report(metrics).to_dict("records"),
+        )
+    elif args.benchmark == "prediction":
+        frame, target = model_data_and_target(metrics, args.metric_type)
+        print_results(
+            f"Prediction throughput for {len(frame)} rows",
+            prediction_benchmark(frame, target, args.repeat),
+        )
+    elif args.benchmark == "latency":
+        frame, target = model_data_and_target(metrics, args.metric_type)
+        print_results(
+            "Single-row prediction latency",
+            latency_benchmark(frame, target),
+        )
+    elif args.benchmark == "update":
+        frame, target = model_data_and_target(metrics, args.metric_type)
+        print_results(
+            "Model update with new rows compared with full retrain",
+            update_benchmark(frame, target),
+        )
+    elif args.benchmark == "features":
+        print_results(
+            f"Feature engineering of {len(metrics)} pitches, vectorized and row-wise",
+            feature_benchmark(metrics, args.repeat),
+        )
+    elif args.benchmark == "model-data":
+        print_results(
+            f"Model data preparation from {len(metrics)} pitches",
+            model_data_benchmark(metrics, args.metric_type, args.repeat),
+        )
+    elif args.benchmark == "render":
+        print_results(
+            f"Plot renders per second for {len(metrics)} pitches",
+            render_benchmark(metrics, args.metric_type, args.repeat),
+        )
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+# Columns each consumer of player-specific metrics reads, keyed by consumer name
+consumer_columns = {}
+
+# Object columns are converted to categoricals when they have at most this ratio of unique values to rows
+CATEGORICAL_MAX_UNIQUE_RATIO = 0.5
+
+# Floats are downcast to float32 only if no value changes by more than this (Statcast values have at most 4 decimals)
+FLOAT32_TOLERANCE = 1e-4
+
+
+def register_columns(consumer: str, columns: list[str]):
+    """
+    Declares the columns of player-specific metrics that a consumer reads, so compact frames keep them.
+
+    Args:
+        consumer (str): The name of the consumer (ex "plate_crossing_metrics").
+        columns (list[str]): The columns the consumer reads.
+    """
+
+    consumer_columns[consumer] = list(columns)
+
+
+def registered_columns() -> list[str]:
+    """
+    Collects the columns declared by all registered consumers.
+
+    Returns:
+        list[str]: The union of the registered columns, in registration order.
+    """
+
+    return list(
+        dict.fromkeys(column for columns in consumer_columns.values() for column in columns)
+    )
+
+
+def compact_frame(df: pd.DataFrame, columns: list[str] = None) -> pd.DataFrame:
+    """
+    Reduces the memory usage of a player-specific metrics DataFrame.
+    Keeps only the columns registered by consumers, converts repeated strings to categoricals,
+    and downcasts floats to float32 and integers to the smallest integer type where no values change.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to compact.
+        columns (list[str], optional): The columns to keep. Defaults to None (the registered columns).
+
+    Returns:
+        pd.DataFrame: The compacted DataFrame.
+    """
+
+    columns = registered_columns() if columns is None else columns
+    compact = df[[column for column in columns if column in df.columns]].copy()
+
+    for column in compact.columns:
+        values = compact[column]
+
+        if values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+            if values.nunique() <= CATEGORICAL_MAX_UNIQUE_RATIO * max(len(values), 1):
+                compact[column] = values.astype("category")
+
+        elif pd.api.types.is_float_dtype(values.dtype) and values.dtype != np.float32:
+            downcast = values.astype(np.float32)
+            difference = np.abs(downcast.to_numpy(np.float64) - values.to_numpy())
+            if not np.nanmax(difference, initial=0.0) > FLOAT32_TOLERANCE:
+                compact[column] = downcast
+
+        elif pd.api.types.is_integer_dtype(values.dtype):
+            compact[column] = pd.to_numeric(values, downcast="integer")
+
+    return compact
+
+
+def memory_report(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compares the memory usage of full and compact player-specific metrics for each season.
+
+    Args:
+        df (pd.DataFrame): The full player-specific metrics DataFrame.
+
+    Returns:
+        pd.DataFrame: The number of rows, full and compact memory usage in bytes, and reduction ratio for each season.
+    """
+
+    seasons = pd.to_datetime(df["game_date"]).dt.year
+
+    report = []
+    for season, season_df in df.groupby(seasons):
+        full_bytes = int(season_df.memory_usage(index=True, deep=True).sum())
+        compact_bytes = int(
+            compact_frame(season_df).memory_usage(index=True, deep=True).sum()
+        )
+        report.append(
+            {
+                "season": season,
+                "rows": len(season_df),
+                "full_bytes": full_bytes,
+                "compact_bytes": compact_bytes,
+                "reduction": round(1 - compact_bytes / full_bytes, 3),
+            }
+        )
+
+    return pd.DataFrame(report)
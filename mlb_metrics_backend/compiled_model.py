@@ -0,0 +1,514 @@
+import numpy as np
+from scipy.special import expit, softmax
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import (
+    GradientBoostingClassifier,
+    HistGradientBoostingClassifier,
+    RandomForestClassifier,
+)
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+
+class TreeEnsemble:
+    """
+    The nodes of several decision trees packed into flat NumPy arrays, so every tree is traversed at once.
+    Each tree adds its leaf value (one value per class) to the output.
+
+    Args:
+        trees (list[dict]): The trees, each with "left", "right", "feature", "threshold", "missing_left", "is_leaf" and "value" node arrays.
+        n_classes (int): The number of values in each leaf.
+        float32_inputs (bool): Whether features are rounded to float32 before comparing with thresholds, like sklearn decision trees do.
+    """
+
+    def __init__(self, trees: list[dict], n_classes: int, float32_inputs: bool):
+        self.float32_inputs = float32_inputs
+
+        # Offset the child indices of each tree by the number of nodes before it
+        roots, left, right = [], [], []
+        offset = 0
+        for tree in trees:
+            roots.append(offset)
+            left.append(np.where(tree["is_leaf"], 0, tree["left"] + offset))
+            right.append(np.where(tree["is_leaf"], 0, tree["right"] + offset))
+            offset += len(tree["is_leaf"])
+
+        self.roots = np.array(roots, dtype=np.intp)
+        self.left = np.concatenate(left).astype(np.intp)
+        self.right = np.concatenate(right).astype(np.intp)
+        self.is_leaf = np.concatenate([tree["is_leaf"] for tree in trees]).astype(bool)
+        # Leaves have no feature, use feature 0 so indexing stays valid
+        self.feature = np.where(
+            self.is_leaf, 0, np.concatenate([tree["feature"] for tree in trees])
+        ).astype(np.intp)
+        self.threshold = np.concatenate([tree["threshold"] for tree in trees]).astype(
+            np.float64
+        )
+        self.missing_left = np.concatenate(
+            [tree["missing_left"] for tree in trees]
+        ).astype(bool)
+        self.value = np.concatenate([tree["value"] for tree in trees]).reshape(
+            -1, n_classes
+        )
+        self.max_depth = max(tree["depth"] for tree in trees)
+
+    def summed_values(self, X: np.ndarray) -> np.ndarray:
+        """
+        Sums the leaf values reached by each row in every tree.
+
+        Args:
+            X (np.ndarray): The transformed features, one row per sample.
+
+        Returns:
+            np.ndarray: The summed leaf values, one row per sample and one column per class.
+        """
+
+        if self.float32_inputs:
+            X = X.astype(np.float32).astype(np.float64)
+
+        nodes = np.repeat(self.roots[np.newaxis, :], len(X), axis=0)
+        for _ in range(self.max_depth):
+            is_leaf = self.is_leaf[nodes]
+            if is_leaf.all():
+                break
+
+            x = np.take_along_axis(X, self.feature[nodes], axis=1)
+            go_left = np.where(
+                np.isnan(x), self.missing_left[nodes], x <= self.threshold[nodes]
+            )
+            next_nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+            nodes = np.where(is_leaf, nodes, next_nodes)
+
+        return self.value[nodes].sum(axis=1)
+
+
+class LinearScorer:
+    """
+    Scores transformed features with the coefficients of a logistic regression (or SGD log loss classifier).
+
+    Args:
+        coef (np.ndarray): The coefficients, one row per feature and one column per class (or a single column for binary targets).
+        intercept (np.ndarray): The intercept of each column.
+        link (str): How scores become probabilities ("binary", "ovr" or "softmax").
+    """
+
+    # Missing values would turn every probability into NaN, and the estimator rejects them
+    allows_missing = False
+
+    def __init__(self, coef: np.ndarray, intercept: np.ndarray, link: str):
+        self.coef = coef
+        self.intercept = intercept
+        self.link = link
+
+    def __call__(self, X: np.ndarray) -> np.ndarray:
+        raw = X @ self.coef + self.intercept
+        if self.link == "binary":
+            return _binary_probas(raw)
+        if self.link == "ovr":
+            probas = expit(raw)
+            return probas / probas.sum(axis=1, keepdims=True)
+        return softmax(raw, axis=1)
+
+
+class TreeScorer:
+    """
+    Scores transformed features with a tree ensemble.
+
+    Args:
+        ensemble (TreeEnsemble): The packed trees, or None if the model has no trees.
+        baseline (np.ndarray): The raw prediction before adding the trees (gradient boosting only).
+        output (str): Either "mean" (leaf values are already probabilities) or "raw" (gradient boosting raw predictions).
+        allows_missing (bool, optional): Whether the estimator predicts rows with missing values (hist gradient boosting only). Defaults to False.
+    """
+
+    def __init__(
+        self,
+        ensemble: TreeEnsemble,
+        baseline: np.ndarray,
+        output: str,
+        allows_missing: bool = False,
+    ):
+        self.ensemble = ensemble
+        self.baseline = baseline
+        self.output = output
+        self.allows_missing = allows_missing
+
+    def __call__(self, X: np.ndarray) -> np.ndarray:
+        if self.output == "mean":
+            return self.ensemble.summed_values(X)
+
+        raw = np.repeat(self.baseline[np.newaxis, :], len(X), axis=0)
+        if self.ensemble is not None:
+            raw = raw + self.ensemble.summed_values(X)
+
+        # Gradient boosting raw predictions have one column for binary targets and one per class otherwise
+        if raw.shape[1] == 1:
+            return _binary_probas(raw)
+        return softmax(raw, axis=1)
+
+
+class CompiledPipeline:
+    """
+    Inference-only copy of a trained model pipeline (OneHotEncoder + StandardScaler + estimator) as plain NumPy arrays.
+    Scores a dictionary of feature values or an array directly, without building a DataFrame or running sklearn input validation.
+
+    Args:
+        categorical_columns (list[str]): The one-hot encoded columns, in pipeline order.
+        categories (list[np.ndarray]): The vocabulary of each one-hot encoded column.
+        numerical_columns (list[str]): The standard scaled columns, in pipeline order.
+        means (np.ndarray): The scaler mean of each numerical column.
+        scales (np.ndarray): The scaler scale of each numerical column.
+        classes (np.ndarray): The class labels of the estimator.
+        scorer (LinearScorer or TreeScorer): Maps transformed features to class probabilities.
+    """
+
+    def __init__(
+        self,
+        categorical_columns: list[str],
+        categories: list[np.ndarray],
+        numerical_columns: list[str],
+        means: np.ndarray,
+        scales: np.ndarray,
+        classes: np.ndarray,
+        scorer,
+    ):
+        self.categorical_columns = categorical_columns
+        self.numerical_columns = numerical_columns
+        self.means = means
+        self.scales = scales
+        self.classes = classes
+        self.class_labels = classes.tolist()
+        self.scorer = scorer
+
+        # Position of each category in the transformed features
+        self.category_positions = []
+        offset = 0
+        for column_categories in categories:
+            self.category_positions.append(
+                {category: offset + i for i, category in enumerate(column_categories)}
+            )
+            offset += len(column_categories)
+        self.n_one_hot = offset
+
+    def transformed_row(self, features) -> np.ndarray:
+        """
+        Transforms a dictionary of feature values like the pipeline preprocessor does.
+        The feature data sent to /predict is accepted too (see first_record), only its first row is used.
+
+        Args:
+            features (dict or list[dict]): The feature values by column name.
+
+        Returns:
+            np.ndarray: The transformed features as a single row.
+
+        Raises:
+            ValueError: If the feature data has another shape, features are missing or not numerical where they should be,
+                or numerical features are null and the estimator does not handle missing values.
+        """
+
+        record = first_record(features)
+        if record is None:
+            raise ValueError(
+                "Feature data must be a row, a list of rows or columns of feature values."
+            )
+        missing = [
+            column
+            for column in self.categorical_columns + self.numerical_columns
+            if column not in record
+        ]
+        if missing:
+            raise ValueError(f"Missing features: {', '.join(missing)}")
+
+        row = np.zeros((1, self.n_one_hot + len(self.numerical_columns)))
+
+        for column, positions in zip(self.categorical_columns, self.category_positions):
+            position = positions.get(record[column])
+            # Unknown categories are ignored (all zeros), like OneHotEncoder(handle_unknown="ignore")
+            if position is not None:
+                row[0, position] = 1.0
+
+        numerical = np.array(
+            [_float(column, record[column]) for column in self.numerical_columns]
+        )
+        # Like the pipeline, only estimators that handle missing values accept them
+        if not self.scorer.allows_missing and np.isnan(numerical).any():
+            missing_values = [
+                column
+                for column, value in zip(self.numerical_columns, numerical)
+                if np.isnan(value)
+            ]
+            raise ValueError(
+                f"Missing values for features: {', '.join(missing_values)}"
+            )
+        row[0, self.n_one_hot :] = (numerical - self.means) / self.scales
+
+        return row
+
+    def predict_proba(self, features) -> np.ndarray:
+        """
+        Predicts class probabilities for a dictionary of feature values.
+
+        Args:
+            features (dict or list[dict]): The feature values by column name (see first_record).
+
+        Returns:
+            np.ndarray: The probability of each class.
+        """
+
+        return self.scorer(self.transformed_row(features))[0]
+
+    def predict_proba_array(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predicts class probabilities for an array of already transformed features.
+
+        Args:
+            X (np.ndarray): The transformed features, one row per sample.
+
+        Returns:
+            np.ndarray: The prediction probabilities with one row per sample and one column per class.
+        """
+
+        return self.scorer(np.atleast_2d(np.asarray(X, dtype=np.float64)))
+
+    def prediction(self, features) -> tuple[str, list, list]:
+        """
+        Makes a prediction for a dictionary of feature values, in the same format as model_prediction.
+
+        Args:
+            features (dict or list[dict]): The feature values by column name (see first_record).
+
+        Returns:
+            Tuple containing:
+            - str: Predicted class label.
+            - list: Prediction probabilities for each class.
+            - list: Class labels used by the model.
+        """
+
+        probas = self.predict_proba(features)
+        return (
+            str(self.classes[probas.argmax()]),
+            [float(x) for x in probas],
+            self.class_labels,
+        )
+
+
+def compiled_pipeline(model: Pipeline, check_X=None) -> CompiledPipeline:
+    """
+    Compiles a trained model pipeline into a CompiledPipeline.
+    SVC and any pipeline not built by trained_model are not compiled, since they need the full sklearn code path.
+
+    Args:
+        model (Pipeline): The trained sklearn model pipeline.
+        check_X (pd.DataFrame, optional): Rows to compare compiled and pipeline probabilities on. Defaults to None (no check).
+
+    Returns:
+        CompiledPipeline or None: The compiled pipeline, or None if the pipeline cannot be compiled (or does not match on check_X).
+    """
+
+    if not isinstance(model, Pipeline) or len(model.steps) != 2:
+        return None
+    preprocessor, estimator = model.steps[0][1], model.steps[1][1]
+    if not isinstance(preprocessor, ColumnTransformer):
+        return None
+
+    # Extract the one-hot vocabularies and scaler parameters
+    categorical_columns, categories = [], []
+    numerical_columns, means, scales = [], [], []
+    for name, transformer, columns in preprocessor.transformers_:
+        if name == "remainder" or len(columns) == 0:
+            continue
+        if isinstance(transformer, OneHotEncoder) and transformer.drop is None:
+            categorical_columns.extend(columns)
+            categories.extend(transformer.categories_)
+        elif isinstance(transformer, StandardScaler) and transformer.with_mean:
+            numerical_columns.extend(columns)
+            means.append(transformer.mean_)
+            scales.append(
+                transformer.scale_
+                if transformer.scale_ is not None
+                else np.ones(len(columns))
+            )
+        else:
+            return None
+
+        # The compiled row layout puts every one-hot column before the numerical ones
+        if isinstance(transformer, OneHotEncoder) and numerical_columns:
+            return None
+
+    # Extract the estimator parameters
+    scorer = _scorer(estimator)
+    if scorer is None:
+        return None
+
+    compiled = CompiledPipeline(
+        categorical_columns,
+        categories,
+        numerical_columns,
+        np.concatenate(means) if means else np.empty(0),
+        np.concatenate(scales) if scales else np.empty(0),
+        estimator.classes_,
+        scorer,
+    )
+
+    # Fall back to the pipeline if the compiled probabilities differ
+    if check_X is not None and len(check_X) > 0:
+        expected = model.predict_proba(check_X)
+        actual = np.vstack(
+            [compiled.predict_proba(row) for row in check_X.to_dict("records")]
+        )
+        if not np.allclose(actual, expected, rtol=1e-6, atol=1e-8):
+            return None
+
+    return compiled
+
+
+def _scorer(estimator):
+    # Build a callable from transformed features to probabilities for each supported estimator
+    n_classes = len(estimator.classes_)
+
+    if isinstance(estimator, (LogisticRegression, SGDClassifier)):
+        if isinstance(estimator, SGDClassifier) and estimator.loss != "log_loss":
+            return None
+        if n_classes == 2:
+            link = "binary"
+        elif (
+            isinstance(estimator, SGDClassifier)
+            or getattr(estimator, "multi_class", "auto") == "ovr"
+            or estimator.solver == "liblinear"
+        ):
+            # SGD log loss models are one-vs-rest
+            link = "ovr"
+        else:
+            link = "softmax"
+        return LinearScorer(estimator.coef_.T.copy(), estimator.intercept_.copy(), link)
+
+    if isinstance(estimator, RandomForestClassifier):
+        if estimator.n_outputs_ != 1:
+            return None
+        trees = []
+        for tree in estimator.estimators_:
+            tree_dict = _tree_nodes(tree.tree_)
+            # Leaf values are class counts or fractions depending on the sklearn version, normalize them
+            values = tree.tree_.value[:, 0, :]
+            totals = values.sum(axis=1, keepdims=True)
+            tree_dict["value"] = values / np.where(totals == 0, 1, totals) / len(
+                estimator.estimators_
+            )
+            trees.append(tree_dict)
+        return TreeScorer(
+            TreeEnsemble(trees, n_classes, float32_inputs=True), None, "mean"
+        )
+
+    if isinstance(estimator, GradientBoostingClassifier):
+        # Only constant initial predictions (the default prior) can be precomputed
+        if not (
+            estimator.init_ == "zero"
+            or type(estimator.init_).__name__ == "DummyClassifier"
+        ):
+            return None
+        baseline = estimator._raw_predict_init(
+            np.zeros((1, estimator.n_features_in_), dtype=np.float32)
+        )[0]
+        n_outputs = estimator.estimators_.shape[1]
+        trees = []
+        for stage in estimator.estimators_:
+            for k, tree in enumerate(stage):
+                tree_dict = _tree_nodes(tree.tree_)
+                value = np.zeros((tree.tree_.node_count, n_outputs))
+                value[:, k] = estimator.learning_rate * tree.tree_.value[:, 0, 0]
+                tree_dict["value"] = value
+                trees.append(tree_dict)
+        return TreeScorer(
+            TreeEnsemble(trees, n_outputs, float32_inputs=True), baseline, "raw"
+        )
+
+    if isinstance(estimator, HistGradientBoostingClassifier):
+        baseline = np.asarray(estimator._baseline_prediction, dtype=np.float64).reshape(-1)
+        n_outputs = len(baseline)
+        trees = []
+        for predictors in estimator._predictors:
+            for k, predictor in enumerate(predictors):
+                nodes = predictor.nodes
+                if nodes["is_categorical"].any():
+                    return None
+                value = np.zeros((len(nodes), n_outputs))
+                value[:, k] = nodes["value"]
+                trees.append(
+                    {
+                        "left": nodes["left"].astype(np.intp),
+                        "right": nodes["right"].astype(np.intp),
+                        "feature": nodes["feature_idx"].astype(np.intp),
+                        "threshold": nodes["num_threshold"],
+                        "missing_left": nodes["missing_go_to_left"].astype(bool),
+                        "is_leaf": nodes["is_leaf"].astype(bool),
+                        "value": value,
+                        "depth": int(nodes["depth"].max()),
+                    }
+                )
+        ensemble = TreeEnsemble(trees, n_outputs, float32_inputs=False) if trees else None
+        return TreeScorer(ensemble, baseline, "raw", allows_missing=True)
+
+    return None
+
+
+def _tree_nodes(tree) -> dict:
+    # Node arrays of an sklearn decision tree (leaves have children_left == -1)
+    is_leaf = tree.children_left == -1
+    return {
+        "left": tree.children_left.astype(np.intp),
+        "right": tree.children_right.astype(np.intp),
+        "feature": tree.feature.astype(np.intp),
+        "threshold": tree.threshold,
+        "missing_left": getattr(
+            tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=bool)
+        ).astype(bool),
+        "is_leaf": is_leaf,
+        "depth": int(tree.max_depth),
+    }
+
+
+def _binary_probas(raw: np.ndarray) -> np.ndarray:
+    positive = expit(raw[:, 0])
+    return np.column_stack([1 - positive, positive])
+
+
+def first_record(features) -> dict:
+    """
+    Takes the first row of feature data as a dictionary of feature values.
+    Accepts a row (dict of values), columns (dict of lists, like the feature data sent to /predict) or rows (list of dicts).
+
+    Args:
+        features (dict or list[dict]): The feature data.
+
+    Returns:
+        dict or None: The feature values of the first row, or None if the data has no rows or another shape (ex nested dicts).
+    """
+
+    if isinstance(features, list):
+        if not features or not isinstance(features[0], dict):
+            return None
+        features = features[0]
+    if not isinstance(features, dict):
+        return None
+
+    record = {}
+    for column, value in features.items():
+        if isinstance(value, (list, tuple)):
+            if not value:
+                return None
+            value = value[0]
+        if isinstance(value, (dict, list, tuple)):
+            return None
+        record[column] = value
+
+    return record
+
+
+def _float(column: str, value) -> float:
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Feature {column} must be a number, got {value!r}")
@@ -0,0 +1,258 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import pandas as pd
+
+
+class DatasetNotFoundError(LookupError):
+    """
+    Raised when a dataset ID is unknown or the dataset has been evicted from the store.
+    """
+
+
+class DatasetStore:
+    """
+    Store for player-specific metrics DataFrames, shared by all worker processes through a directory on disk.
+    Datasets are referenced by a handle (dataset ID) so clients do not need to send the full data back to the server.
+    Every dataset is written to disk as Parquet (with its metadata as JSON) when it is stored, so any worker can serve any dataset ID.
+    Datasets expire after a time-to-live since they were last accessed (the modification time of their files),
+    and the least recently used ones are evicted once the entry or size limits are exceeded.
+    Each worker keeps recently used datasets in memory, up to a memory budget.
+
+    Args:
+        store_dir (str): The directory to store datasets and their metadata in.
+        max_entries (int, optional): The maximum number of datasets to keep. Defaults to 32.
+        max_bytes (int, optional): The maximum total size of stored datasets on disk in bytes. Defaults to 2 GB.
+        ttl_seconds (float, optional): The number of seconds a dataset is kept after it was last accessed. Defaults to 30 minutes.
+        memory_budget_bytes (int, optional): The maximum total memory usage of datasets kept in memory by each worker. Defaults to 512 MB.
+    """
+
+    def __init__(
+        self,
+        store_dir: str,
+        max_entries: int = 32,
+        max_bytes: int = 2 * 1024**3,
+        ttl_seconds: float = 30 * 60,
+        memory_budget_bytes: int = 512 * 1024**2,
+    ):
+        self.store_dir = store_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.memory_budget_bytes = memory_budget_bytes
+
+        # dataset_id -> (DataFrame, memory usage in bytes), least recently used first
+        self._frames = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, df: pd.DataFrame, metadata: dict = None) -> str:
+        """
+        Stores a DataFrame and returns its dataset ID.
+
+        Args:
+            df (pd.DataFrame): The DataFrame to store.
+            metadata (dict, optional): Information describing the dataset (ex player ID, metric type). Defaults to None.
+
+        Returns:
+            str: The dataset ID that can be used to retrieve the DataFrame.
+        """
+
+        dataset_id = str(uuid.uuid4())
+        os.makedirs(self.store_dir, exist_ok=True)
+
+        # Write to temporary files first so other workers never read a partially written dataset
+        data_path = self._path(dataset_id, "parquet")
+        df.to_parquet(f"{data_path}.tmp")
+        os.replace(f"{data_path}.tmp", data_path)
+
+        metadata_path = self._path(dataset_id, "json")
+        with open(f"{metadata_path}.tmp", "w") as f:
+            json.dump({**(metadata or {}), "created_at": time.time()}, f, default=str)
+        os.replace(f"{metadata_path}.tmp", metadata_path)
+
+        with self._lock:
+            self._add(dataset_id, df)
+
+        self._sweep()
+
+        return dataset_id
+
+    def get(self, dataset_id: str) -> pd.DataFrame:
+        """
+        Retrieves a stored DataFrame and marks it as recently used, loading it from disk if it is not in memory.
+
+        Args:
+            dataset_id (str): The dataset ID returned by put.
+
+        Returns:
+            pd.DataFrame: The stored DataFrame.
+
+        Raises:
+            DatasetNotFoundError: If the dataset ID is unknown or the dataset has expired or been evicted.
+        """
+
+        data_path = self._touched(dataset_id)
+
+        with self._lock:
+            if dataset_id in self._frames:
+                self._frames.move_to_end(dataset_id)
+                return self._frames[dataset_id][0]
+
+        df = pd.read_parquet(data_path)
+
+        with self._lock:
+            if dataset_id not in self._frames:
+                self._add(dataset_id, df)
+
+        return df
+
+    def metadata(self, dataset_id: str) -> dict:
+        """
+        Retrieves the metadata stored alongside a dataset.
+
+        Args:
+            dataset_id (str): The dataset ID returned by put.
+
+        Returns:
+            dict: The dataset metadata.
+
+        Raises:
+            DatasetNotFoundError: If the dataset ID is unknown or the dataset has expired or been evicted.
+        """
+
+        self._touched(dataset_id)
+
+        try:
+            with open(self._path(dataset_id, "json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise DatasetNotFoundError(f"Dataset {dataset_id} not found.")
+
+    def discard(self, dataset_id: str):
+        """
+        Removes a dataset from the store if it exists.
+
+        Args:
+            dataset_id (str): The dataset ID returned by put.
+        """
+
+        if _is_uuid(dataset_id):
+            self._remove(dataset_id)
+
+    def stats(self) -> dict:
+        """
+        Summarizes the current contents of the store.
+
+        Returns:
+            dict: The number of stored datasets and their total size on disk in bytes,
+                the datasets and memory held by this worker, and the configured limits.
+        """
+
+        datasets = self._sweep()
+
+        with self._lock:
+            return {
+                "num_datasets": len(datasets),
+                "total_bytes": sum(size for _, _, size in datasets),
+                "datasets_in_memory": len(self._frames),
+                "memory_bytes": self._memory_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "memory_budget_bytes": self.memory_budget_bytes,
+            }
+
+    def _path(self, dataset_id: str, extension: str) -> str:
+        return os.path.join(self.store_dir, f"{dataset_id}.{extension}")
+
+    def _touched(self, dataset_id: str) -> str:
+        # Checks a dataset exists and has not expired, and marks it as recently used for every worker
+        data_path = self._path(dataset_id, "parquet")
+
+        try:
+            if not _is_uuid(dataset_id):
+                raise FileNotFoundError(data_path)
+            if time.time() - os.path.getmtime(data_path) > self.ttl_seconds:
+                self._remove(dataset_id)
+                raise FileNotFoundError(data_path)
+            os.utime(data_path)
+        except FileNotFoundError:
+            with self._lock:
+                self._forget(dataset_id)
+            raise DatasetNotFoundError(
+                f"Dataset {dataset_id} not found. It may have expired, request the player metrics again."
+            )
+
+        return data_path
+
+    def _sweep(self) -> list[tuple[str, float, int]]:
+        # Removes expired datasets, then the least recently used ones while the limits are exceeded,
+        # and returns the remaining (dataset ID, last access time, size) from least to most recently used
+        if not os.path.isdir(self.store_dir):
+            return []
+
+        datasets = []
+        for filename in os.listdir(self.store_dir):
+            dataset_id, extension = os.path.splitext(filename)
+            if extension != ".parquet" or not _is_uuid(dataset_id):
+                continue
+            try:
+                status = os.stat(os.path.join(self.store_dir, filename))
+            except FileNotFoundError:
+                continue
+            datasets.append((dataset_id, status.st_mtime, status.st_size))
+        datasets.sort(key=lambda dataset: dataset[1])
+
+        now = time.time()
+        total_bytes = sum(size for _, _, size in datasets)
+
+        # Always keep the most recently used dataset, even if it alone exceeds the size limit
+        while datasets and (
+            now - datasets[0][1] > self.ttl_seconds
+            or (
+                len(datasets) > 1
+                and (len(datasets) > self.max_entries or total_bytes > self.max_bytes)
+            )
+        ):
+            dataset_id, _, size = datasets.pop(0)
+            total_bytes -= size
+            self._remove(dataset_id)
+
+        return datasets
+
+    def _remove(self, dataset_id: str):
+        with self._lock:
+            self._forget(dataset_id)
+
+        for extension in ["parquet", "json"]:
+            try:
+                os.remove(self._path(dataset_id, extension))
+            except FileNotFoundError:
+                pass
+
+    def _add(self, dataset_id: str, df: pd.DataFrame):
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        self._frames[dataset_id] = (df, size)
+        self._memory_bytes += size
+
+        # Always keep the most recently used dataset, even if it alone exceeds the budget
+        while len(self._frames) > 1 and self._memory_bytes > self.memory_budget_bytes:
+            self._forget(next(iter(self._frames)))
+
+    def _forget(self, dataset_id: str):
+        entry = self._frames.pop(dataset_id, None)
+        if entry is not None:
+            self._memory_bytes -= entry[1]
+
+
+def _is_uuid(value: str) -> bool:
+    # Dataset IDs become file names, so reject anything else (ex paths)
+    try:
+        return str(uuid.UUID(value)) == value
+    except (ValueError, TypeError, AttributeError):
+        return False
@@ -1,30 +1,257 @@
-import uuid
-import io
+import json
+import os
+import time
 import warnings
 
 warnings.filterwarnings("ignore")
 
 import mlb_metrics_helpers
+from dataset_store import DatasetStore, DatasetNotFoundError
+from statcast_fetch import FetchProgressRegistry
+import serialization
+import instrumentation
+import plot_rendering
+from plot_rendering import RenderCache
+from model_store import ModelStore, ModelNotFoundError
+from training_cache import TrainingCache
+import model_search
+import streaming_training
+from streaming_training import TrainingDataNotFoundError
+import training_jobs
+from training_jobs import TrainingJobQueue, JobNotFoundError
 
 import pandas as pd
-import matplotlib
 
 # Use the 'Agg' backend which is non-interactive and does not require a GUI
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+# (matplotlib itself is only imported when the first plot is rendered)
+os.environ.setdefault("MPLBACKEND", "Agg")
 
 from flask_cors import CORS
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, g, jsonify, request
 
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["X-Dataset-Id", "Server-Timing", "X-Profile"])
 
 api_name = "mlb-metrics-api"
 api_version = "v1"
 api_base = f"/{api_name}/{api_version}"
 
-trained_models = {}
+# Trained models shared by all workers through a directory on disk, with an in-memory LRU cache per worker
+model_store = ModelStore(
+    os.environ.get(
+        "MLB_METRICS_MODEL_DIR",
+        os.path.join(os.path.expanduser("~"), ".mlb_metrics_cache", "models"),
+    ),
+    memory_budget_bytes=int(os.environ.get("MLB_METRICS_MODEL_MEMORY_MB", 1024))
+    * 1024**2,
+)
+
+
+def discard_job_result(result: dict):
+    """
+    Deletes the models stored by a job that finished after it was cancelled.
+
+    Args:
+        result (dict): The job result, with a "model_uuid" or a "leaderboard" of entries with a "model_uuid".
+    """
+
+    for entry in result.get("leaderboard", [result]):
+        model_store.delete(entry["model_uuid"])
+
+
+# Background model training on worker processes, shared fairly between users,
+# with job records next to the model store so every web worker can report and cancel any job
+training_job_queue = TrainingJobQueue(
+    os.path.join(model_store.store_dir, "jobs"),
+    max_workers=int(os.environ.get("MLB_METRICS_TRAINING_WORKERS", 2)),
+    discard_result=discard_job_result,
+)
+
+# Player-specific metrics kept server-side so clients can reference them by dataset ID,
+# shared by all workers through a directory on disk
+dataset_store = DatasetStore(
+    os.environ.get(
+        "MLB_METRICS_DATASET_DIR",
+        os.path.join(os.path.expanduser("~"), ".mlb_metrics_cache", "datasets"),
+    )
+)
+
+# Progress of player-specific metrics retrievals, keyed by client-provided fetch ID
+# and shared by all workers through a directory on disk
+fetch_progress = FetchProgressRegistry(
+    os.environ.get(
+        "MLB_METRICS_PROGRESS_DIR",
+        os.path.join(os.path.expanduser("~"), ".mlb_metrics_cache", "progress"),
+    )
+)
+
+# Rendered plot images, reused when the same plot is requested again
+render_cache = RenderCache(
+    int(os.environ.get("MLB_METRICS_RENDER_CACHE_MB", 64)) * 1024**2
+)
+
+# Sampling profiler settings, profiling every request when enabled (otherwise only requests with "profile=true")
+profiling = {
+    "enabled": os.environ.get("MLB_METRICS_PROFILE", "0") == "1",
+    "profile_dir": os.environ.get(
+        "MLB_METRICS_PROFILE_DIR",
+        os.path.join(os.path.expanduser("~"), ".mlb_metrics_cache", "profiles"),
+    ),
+}
+
+
+@app.before_request
+def start_instrumentation():
+    g.request_start = time.perf_counter()
+    g.instrumentation_token = instrumentation.start_request()
+
+    g.profiler = None
+    if profiling["enabled"] or request.args.get("profile", "false").lower() == "true":
+        g.profiler = instrumentation.SamplingProfiler()
+        g.profiler.start()
+
+    # Decode JSON bodies up front so decoding is timed separately (Flask caches the result for the endpoint)
+    if request.is_json:
+        with instrumentation.stage("decode", payload_bytes=request.content_length):
+            request.get_json(silent=True)
+
+
+@app.after_request
+def finish_instrumentation(response: Response) -> Response:
+    if "instrumentation_token" not in g:
+        return response
+
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    request_stages = instrumentation.finish_request(
+        g.pop("instrumentation_token"),
+        endpoint,
+        request.method,
+        response.status_code,
+        time.perf_counter() - g.request_start,
+        request.content_length,
+        None if response.is_streamed else response.content_length,
+    )
+    if request_stages:
+        response.headers["Server-Timing"] = instrumentation.server_timing(
+            request_stages
+        )
+
+    if g.profiler is not None:
+        g.profiler.stop()
+        response.headers["X-Profile"] = instrumentation.dump_profile(
+            profiling["profile_dir"], endpoint, g.profiler
+        )
+
+    return response
+
+
+def request_player_metrics(data: dict) -> pd.DataFrame:
+    """
+    Retrieves the player-specific metrics referenced by a request body.
+    Uses the stored dataset if a "dataset_id" is provided, otherwise builds a DataFrame from the inline "player_metrics".
+
+    Args:
+        data (dict): The JSON body of the request.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing the player-specific metrics.
+
+    Raises:
+        DatasetNotFoundError: If the dataset ID is unknown or the dataset has expired.
+        KeyError: If neither "dataset_id" nor "player_metrics" is provided.
+    """
+
+    if data.get("dataset_id"):
+        return dataset_store.get(data["dataset_id"])
+
+    return request_frame(data["player_metrics"])
+
+
+def request_frame(records) -> pd.DataFrame:
+    """
+    Builds a DataFrame from the records or columns of a request body, timed as the "frame" stage.
+
+    Args:
+        records (list or dict): The rows (list of dicts) or columns (dict of lists) of the DataFrame.
+
+    Returns:
+        pd.DataFrame: The DataFrame.
+    """
+
+    with instrumentation.stage("frame") as timing:
+        df = pd.DataFrame(records)
+        timing.rows = len(df)
+
+    return df
+
+
+def frame_response(df: pd.DataFrame, headers: dict = None) -> Response:
+    """
+    Serializes a DataFrame in the format negotiated from the request.
+    The format is taken from the "format" query parameter or the Accept header (JSON by default),
+    and the "columns" query parameter selects a subset of columns.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to send.
+        headers (dict, optional): Extra response headers. Defaults to None.
+
+    Returns:
+        Response: The Flask response containing the serialized DataFrame.
+
+    Raises:
+        NegotiationError: If the requested format, Accept header or columns are invalid
+            (NotAcceptableError if the Accept header does not accept any supported format).
+    """
+
+    response_format = serialization.negotiated_format(
+        request.args.get("format"), request.headers.get("Accept")
+    )
+    df = serialization.projected_columns(df, request.args.get("columns"))
+    mimetype = serialization.FORMAT_MIMETYPES[response_format]
+
+    if response_format == "ndjson":
+        # Stream NDJSON in chunks instead of building the whole response in memory
+        return Response(
+            serialization.ndjson_chunks(df), mimetype=mimetype, headers=headers
+        )
+
+    with instrumentation.stage("serialize", rows=len(df)) as timing:
+        payload = serialization.serialized_frame(df, response_format)
+        timing.payload_bytes = len(payload)
+
+    return Response(payload, mimetype=mimetype, headers=headers)
+
+
+def negotiation_error_response(error: serialization.NegotiationError):
+    """
+    Reports an invalid format, Accept header or column selection to the client.
+
+    Args:
+        error (NegotiationError): The error raised by frame_response.
+
+    Returns:
+        tuple[Response, int]: The error message, with status 406 if no supported format is acceptable, otherwise 400.
+    """
+
+    status = 406 if isinstance(error, serialization.NotAcceptableError) else 400
+    return jsonify({"error": str(error)}), status
+
+
+def job_user(data: dict) -> str:
+    """
+    Identifies the user a training job is queued for, so the training workers are shared fairly between users.
+    Uses the client address, which the client cannot change from one request to the next like the request body,
+    and only falls back to the "user_id" of the body when the address is unknown.
+
+    Args:
+        data (dict): The request body.
+
+    Returns:
+        str: The user key of the job.
+    """
+
+    return request.remote_addr or data.get("user_id") or "anonymous"
 
 
 @app.route(f"{api_base}/player-id", methods=["GET"])
@@ -43,6 +270,27 @@ def get_player_id():
         return jsonify({"error": str(e)}), 404
 
 
+@app.route(f"{api_base}/player-search", methods=["GET"])
+def get_player_search():
+    query = request.args.get("q")
+    limit = request.args.get("limit", default=10, type=int)
+
+    if not query:
+        return jsonify({"error": "Missing search query"}), 400
+
+    candidates = mlb_metrics_helpers.player_search(query, limit)
+    return jsonify({"candidates": candidates}), 200
+
+
+@app.route(f"{api_base}/player-index/refresh", methods=["POST"])
+def refresh_player_index():
+    try:
+        mlb_metrics_helpers.player_index.refresh()
+        return jsonify({"status": "refreshed"}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route(f"{api_base}/player-general-metrics", methods=["GET"])
 def get_player_general_metrics():
     player_id = request.args.get("player_id")
@@ -87,47 +335,209 @@ def get_player_specific_metrics():
     metric_type = request.args.get("metric_type")
     start_dt = request.args.get("start_dt")
     end_dt = request.args.get("end_dt")
+    return_handle = request.args.get("return_handle", default="false").lower() == "true"
+    fetch_id = request.args.get("fetch_id")
+    compact = request.args.get("compact", default="false").lower() == "true"
 
     # Check for required parameters
     if not all([player_id, metric_type, start_dt, end_dt]):
         return jsonify({"error": "Missing required parameters"}), 400
 
+    # Check the response format before fetching
+    try:
+        serialization.negotiated_format(
+            request.args.get("format"), request.headers.get("Accept")
+        )
+    except serialization.NegotiationError as e:
+        return negotiation_error_response(e)
+
     try:
         player_id = int(player_id)  # Convert to integer
+        progress = fetch_progress.create(fetch_id) if fetch_id else None
         metrics_df = mlb_metrics_helpers.player_specific_metrics(
-            player_id, metric_type, start_dt, end_dt
+            player_id, metric_type, start_dt, end_dt, progress=progress, compact=compact
+        )
+
+        # Keep the DataFrame server-side so later requests can reference it by ID
+        dataset_id = dataset_store.put(
+            metrics_df,
+            {
+                "player_id": player_id,
+                "metric_type": metric_type,
+                "start_dt": start_dt,
+                "end_dt": end_dt,
+                "compact": compact,
+            },
+        )
+
+        if return_handle:
+            return (
+                jsonify(
+                    {
+                        "dataset_id": dataset_id,
+                        "num_rows": len(metrics_df),
+                        "columns": metrics_df.columns.tolist(),
+                    }
+                ),
+                200,
+            )
+
+        # Serialize DataFrame in the requested format
+        return frame_response(metrics_df, {"X-Dataset-Id": dataset_id})
+
+    except serialization.NegotiationError as e:
+        return negotiation_error_response(e)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+
+
+@app.route(f"{api_base}/players-general-metrics", methods=["POST"])
+def get_players_general_metrics():
+    data = request.get_json()
+
+    if not data or not data.get("player_ids"):
+        return jsonify({"error": "Missing player IDs"}), 400
+
+    try:
+        player_ids = [int(player_id) for player_id in data["player_ids"]]
+        general_stats = mlb_metrics_helpers.players_general_metrics(player_ids)
+        return jsonify({str(k): v for k, v in general_stats.items()}), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+
+
+@app.route(f"{api_base}/players-specific-metrics", methods=["POST"])
+def get_players_specific_metrics():
+    data = request.get_json()
+
+    if not data or not data.get("players") or not data.get("metric_type"):
+        return jsonify({"error": "Missing required parameters"}), 400
+
+    try:
+        metric_type = data["metric_type"]
+        players = [
+            (int(player["player_id"]), player["start_dt"], player["end_dt"])
+            for player in data["players"]
+        ]
+    except (KeyError, TypeError, ValueError):
+        return (
+            jsonify({"error": "Each player needs a player_id, start_dt and end_dt"}),
+            400,
+        )
+
+    if metric_type not in ["pitching", "batting"]:
+        return jsonify({"error": "Invalid or missing metric type"}), 400
+
+    # Check the response format before fetching, streamed metrics are only sent as NDJSON
+    try:
+        response_format = serialization.negotiated_format(
+            request.args.get("format"), request.headers.get("Accept")
+        )
+        if data.get("stream") and response_format not in ["json", "ndjson"]:
+            raise serialization.NotAcceptableError(
+                "Streamed player metrics are only sent as NDJSON (application/x-ndjson)."
+            )
+    except serialization.NegotiationError as e:
+        return negotiation_error_response(e)
+
+    if data.get("stream"):
+        # Send each player's metrics as one line of NDJSON as soon as they are retrieved
+        def generate():
+            results = mlb_metrics_helpers.iter_players_specific_metrics(
+                players, metric_type
+            )
+            for player_id, start_dt, end_dt, metrics_df in results:
+                line = {
+                    "player_id": player_id,
+                    "start_dt": start_dt,
+                    "end_dt": end_dt,
+                    "player_metrics": json.loads(
+                        metrics_df.to_json(orient="records", date_format="iso")
+                    ),
+                }
+                yield json.dumps(line) + "\n"
+
+        return Response(generate(), mimetype="application/x-ndjson")
+
+    try:
+        metrics_df = mlb_metrics_helpers.players_specific_metrics(players, metric_type)
+
+        dataset_id = dataset_store.put(
+            metrics_df, {"player_ids": [p[0] for p in players], "metric_type": metric_type}
         )
 
-        # Convert DataFrame to JSON
-        metrics_json = metrics_df.to_json(orient="records", date_format="iso")
-        return metrics_json, 200
+        if data.get("return_handle"):
+            return (
+                jsonify(
+                    {
+                        "dataset_id": dataset_id,
+                        "num_rows": len(metrics_df),
+                        "columns": metrics_df.columns.tolist(),
+                    }
+                ),
+                200,
+            )
 
+        # Serialize DataFrame in the requested format
+        return frame_response(metrics_df, {"X-Dataset-Id": dataset_id})
+
+    except serialization.NegotiationError as e:
+        return negotiation_error_response(e)
     except ValueError as e:
         return jsonify({"error": str(e)}), 404
 
 
+@app.route(f"{api_base}/fetch-progress/<fetch_id>", methods=["GET"])
+def get_fetch_progress(fetch_id):
+    progress = fetch_progress.get(fetch_id)
+
+    if progress is None:
+        return jsonify({"error": "Fetch not found"}), 404
+
+    return jsonify(progress.as_dict()), 200
+
+
 @app.route(f"{api_base}/plate-crossing-metrics", methods=["POST"])
 def plate_crossing_metrics():
     try:
         data = request.get_json()
-        player_metrics = data["player_metrics"]
         metric_type = data["metric_type"]
 
         if metric_type not in ["pitching", "batting"]:
             return jsonify({"error": "Invalid or missing metric type"}), 400
 
-        # Convert JSON data to DataFrame
-        player_specific_metrics = pd.DataFrame(player_metrics)
+        # Retrieve stored DataFrame or convert JSON data to DataFrame
+        player_specific_metrics = request_player_metrics(data)
 
         # Apply plate_crossing_metrics function
         plate_metrics = mlb_metrics_helpers.plate_crossing_metrics(
             player_specific_metrics, metric_type
         )
 
-        # Convert DataFrame to JSON
-        plate_metrics_json = plate_metrics.to_json(orient="records", date_format="iso")
-        return plate_metrics_json, 200
+        # Return binned counts instead of every point
+        if data.get("mode") == "binned":
+            return (
+                jsonify(
+                    mlb_metrics_helpers.plate_crossing_bins(
+                        plate_metrics, metric_type, data.get("bins")
+                    )
+                ),
+                200,
+            )
 
+        # Sample the points down for the point view
+        if data.get("max_points"):
+            plate_metrics = mlb_metrics_helpers.downsampled_plate_crossing_metrics(
+                plate_metrics, metric_type, int(data["max_points"])
+            )
+
+        # Serialize DataFrame in the requested format
+        return frame_response(plate_metrics)
+
+    except DatasetNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except serialization.NegotiationError as e:
+        return negotiation_error_response(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
@@ -137,27 +547,31 @@ def model_data():
     try:
         # Retrieve JSON data from the request
         data = request.get_json()
-        player_metrics = data["player_metrics"]
         metric_type = data["metric_type"]
 
-        # Convert JSON data to DataFrame
-        player_specific_metrics = pd.DataFrame(player_metrics)
+        # Retrieve stored DataFrame or convert JSON data to DataFrame
+        player_specific_metrics = request_player_metrics(data)
 
         # Process the data using the relevant model_data function
+        # Optionally add the rolling pitch mix over this many previous pitches of the game
+        pitch_mix_window = data.get("pitch_mix_window")
+
         if metric_type == "pitching":
             processed_data = mlb_metrics_helpers.pitcher_model_data(
-                player_specific_metrics
+                player_specific_metrics, pitch_mix_window
             )
         else:
             processed_data = mlb_metrics_helpers.batter_model_data(
-                player_specific_metrics
+                player_specific_metrics, pitch_mix_window
             )
 
-        # Convert processed data back to JSON
-        processed_json = processed_data.to_json(orient="records", date_format="iso")
-
-        return processed_json, 200
+        # Serialize processed data in the requested format
+        return frame_response(processed_data)
 
+    except DatasetNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except serialization.NegotiationError as e:
+        return negotiation_error_response(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
@@ -167,45 +581,303 @@ def plate_crossing_scatter():
     try:
         # Retrieve JSON data from the request
         data = request.get_json()
-        player_metrics = data["player_metrics"]
         metric_type = data["metric_type"]
 
-        # Convert JSON data to DataFrame
-        player_specific_metrics = pd.DataFrame(player_metrics)
-
-        # Generate the plot using the mlb_metrics_helpers function
-        fig = mlb_metrics_helpers.plate_crossing_scatter(
-            player_specific_metrics, metric_type
+        image_format = data.get("format", "png")
+        if image_format not in plot_rendering.RENDER_MIMETYPES:
+            return jsonify({"error": f"Unsupported format: {image_format}"}), 400
+
+        # Retrieve stored DataFrame or convert JSON data to DataFrame
+        player_specific_metrics = request_player_metrics(data)
+
+        # Reuse the image if the same plot of the same pitches was rendered before
+        plotted_columns = [
+            mlb_metrics_helpers.plate_crossing_group_column(metric_type),
+            "plate_x",
+            "plate_z",
+        ]
+        key = plot_rendering.render_key(
+            "plate-crossing-scatter",
+            player_specific_metrics[plotted_columns],
+            metric_type,
+            data.get("mode"),
+            data.get("bins"),
+            data.get("max_points"),
+            image_format,
         )
+        image = render_cache.get(key)
+
+        if image is None:
+            with instrumentation.stage(
+                "render", rows=len(player_specific_metrics)
+            ) as timing:
+                # Generate the plot using the mlb_metrics_helpers function
+                if data.get("mode") == "heatmap":
+                    fig = mlb_metrics_helpers.plate_crossing_heatmap(
+                        player_specific_metrics, metric_type, data.get("bins")
+                    )
+                else:
+                    fig = mlb_metrics_helpers.plate_crossing_scatter(
+                        player_specific_metrics, metric_type, data.get("max_points")
+                    )
+
+                # Render the plot and close its figure
+                image = plot_rendering.figure_bytes(fig, image_format)
+                timing.payload_bytes = len(image)
+            render_cache.put(key, image)
+
+        return Response(image, mimetype=plot_rendering.RENDER_MIMETYPES[image_format])
+
+    except DatasetNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
 
-        # Save plot to a bytes buffer
-        buf = io.BytesIO()
-        fig.savefig(buf, format="png")
-        buf.seek(0)
 
-        return send_file(buf, mimetype="image/png")
+@app.route(f"{api_base}/render-cache/stats", methods=["GET"])
+def render_cache_stats():
+    return jsonify(render_cache.stats()), 200
 
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
+
+@app.route(f"{api_base}/metrics", methods=["GET"])
+def prometheus_metrics():
+    return Response(
+        instrumentation.prometheus_metrics(),
+        mimetype="text/plain; version=0.0.4",
+    )
+
+
+@app.route(f"{api_base}/profiling", methods=["GET", "POST"])
+def profiling_settings():
+    # Turn profiling of every request on or off (for this worker process)
+    if request.method == "POST":
+        data = request.get_json()
+        if not isinstance(data, dict) or not isinstance(data.get("enabled"), bool):
+            return jsonify({"error": "Missing or invalid 'enabled' flag"}), 400
+        profiling["enabled"] = data["enabled"]
+
+    return jsonify(profiling), 200
+
+
+@app.route(f"{api_base}/datasets/<dataset_id>", methods=["DELETE"])
+def delete_dataset(dataset_id):
+    dataset_store.discard(dataset_id)
+    return jsonify({"dataset_id": dataset_id}), 200
+
+
+@app.route(f"{api_base}/datasets/stats", methods=["GET"])
+def dataset_stats():
+    return jsonify(dataset_store.stats()), 200
+
+
+@app.route(f"{api_base}/statcast-cache/stats", methods=["GET"])
+def statcast_cache_stats():
+    return jsonify(mlb_metrics_helpers.statcast_cache.stats()), 200
+
+
+@app.route(f"{api_base}/upstream/stats", methods=["GET"])
+def upstream_stats():
+    return jsonify(mlb_metrics_helpers.upstream.stats()), 200
+
+
+@app.route(f"{api_base}/season-store/stats", methods=["GET"])
+def season_store_stats():
+    if mlb_metrics_helpers.season_store is None:
+        return jsonify({"error": "The season store is not enabled."}), 404
+
+    return jsonify(mlb_metrics_helpers.season_store.stats()), 200
 
 
 @app.route(f"{api_base}/tested-model", methods=["POST"])
 def tested_model():
     data = request.get_json()
-    model_data = pd.DataFrame(data["model_data"])
+    model_data = request_frame(data["model_data"])
+    target = data["target"]
+    model_type = data["model_type"]
+    metadata = {
+        "player_id": data.get("player_id"),
+        "target": target,
+        "model_type": model_type,
+        "training_rows": len(model_data),
+        "engineered_features": bool(data.get("engineered_features")),
+    }
+
+    if not data.get("sync"):
+        # Queue the training in the background and return the job ID right away
+        job_id = training_job_queue.submit(
+            job_user(data),
+            training_jobs.stored_tested_model,
+            model_store.store_dir,
+            model_data,
+            target,
+            model_type,
+            metadata,
+        )
+        return jsonify({"job_id": job_id, "status": "queued"}), 202
+
+    # Training the model and storing it with its metadata (or reusing the stored model of an identical run)
+    result = training_jobs.stored_tested_model(
+        model_store.store_dir, model_data, target, model_type, metadata
+    )
+
+    return jsonify(result), 200
+
+
+@app.route(f"{api_base}/compared-models", methods=["POST"])
+def compared_models():
+    data = request.get_json()
+    model_data = request_frame(data["model_data"])
+    target = data["target"]
+    model_types = data.get("model_types")
+    metadata = {
+        "player_id": data.get("player_id"),
+        "target": target,
+        "training_rows": len(model_data),
+        "engineered_features": bool(data.get("engineered_features")),
+    }
+
+    if not data.get("sync"):
+        # Queue the training in the background and return the job ID right away
+        job_id = training_job_queue.submit(
+            job_user(data),
+            training_jobs.stored_compared_models,
+            model_store.store_dir,
+            model_data,
+            target,
+            model_types,
+            metadata,
+            kind="comparison",
+        )
+        return jsonify({"job_id": job_id, "status": "queued"}), 202
+
+    # Training every model type on the shared preprocessed data and storing each model with its metadata
+    # (or reusing the stored models of identical runs)
+    result = training_jobs.stored_compared_models(
+        model_store.store_dir, model_data, target, model_types, metadata
+    )
+
+    return jsonify(result), 200
+
+
+@app.route(f"{api_base}/model-search", methods=["POST"])
+def model_search_endpoint():
+    data = request.get_json()
+    model_data = request_frame(data["model_data"])
     target = data["target"]
     model_type = data["model_type"]
+    metadata = {
+        "player_id": data.get("player_id"),
+        "target": target,
+        "model_type": model_type,
+        "training_rows": len(model_data),
+    }
+    search_options = {
+        option: data[option]
+        for option in ["search", "param_grid", "cv", "n_jobs", "time_budget_seconds"]
+        if data.get(option) is not None
+    }
+
+    if not data.get("sync"):
+        # Queue the search in the background and return the job ID right away
+        job_id = training_job_queue.submit(
+            job_user(data),
+            training_jobs.stored_searched_model,
+            model_store.store_dir,
+            model_data,
+            target,
+            model_type,
+            metadata,
+            search_options,
+            kind="search",
+        )
+        return jsonify({"job_id": job_id, "status": "queued"}), 202
+
+    # Searching hyperparameters
+    searched_model, accuracy, search_results = model_search.searched_model(
+        model_data, target, model_type, **search_options
+    )
 
-    # Training the model
-    trained_model, accuracy = mlb_metrics_helpers.tested_model(
-        model_data, target, model_type
+    # Storing the best model with its metadata
+    model_uuid = model_store.put(
+        searched_model,
+        {**metadata, "accuracy": accuracy, "best_params": search_results["best_params"]},
+        model_data,
     )
 
-    # Generating a UUID for the model
-    model_uuid = str(uuid.uuid4())
-    trained_models[model_uuid] = trained_model
+    return jsonify({"model_uuid": model_uuid, "accuracy": accuracy, **search_results}), 200
+
+
+@app.route(f"{api_base}/streamed-model", methods=["POST"])
+def streamed_model():
+    data = request.get_json()
+    source = data["source"]
+    model_type = data["model_type"]
+    metadata = {
+        "player_id": data.get("player_id"),
+        "model_type": model_type,
+        "source": source,
+    }
+    streaming_options = {
+        option: data[option]
+        for option in ["test_size", "epochs", "sample_rows"]
+        if data.get(option) is not None
+    }
+
+    # Every class needs held-out rows for the accuracy
+    test_size = streaming_options.get("test_size", 0.1)
+    if not isinstance(test_size, (int, float)) or not 0 < test_size < 1:
+        return jsonify({"error": "test_size must be between 0 and 1."}), 400
+
+    # Check the source before queueing, so a missing file or season is reported right away
+    try:
+        _, source_target = streaming_training.source_chunks(source)
+    except TrainingDataNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+
+    # Season store model data has a known target, files need one
+    target = data.get("target") or source_target
+    if target is None:
+        return jsonify({"error": "A target is required for model data files."}), 400
+
+    # Streaming training reads the whole model data several times, so it always runs in the background
+    job_id = training_job_queue.submit(
+        job_user(data),
+        training_jobs.stored_streamed_model,
+        model_store.store_dir,
+        source,
+        target,
+        model_type,
+        metadata,
+        streaming_options,
+        kind="streaming",
+    )
+    return jsonify({"job_id": job_id, "status": "queued"}), 202
+
+
+@app.route(f"{api_base}/training-jobs/stats", methods=["GET"])
+def training_job_stats():
+    return jsonify(training_job_queue.stats()), 200
+
+
+@app.route(f"{api_base}/training-jobs/<job_id>", methods=["GET"])
+def training_job_status(job_id):
+    try:
+        return jsonify(training_job_queue.job(job_id)), 200
+    except JobNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+
 
-    return jsonify({"model_uuid": model_uuid, "accuracy": accuracy}), 200
+@app.route(f"{api_base}/training-jobs/<job_id>/cancel", methods=["POST"])
+def cancel_training_job(job_id):
+    try:
+        return jsonify(training_job_queue.cancel(job_id)), 200
+    except JobNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+
+
+@app.route(f"{api_base}/training-cache/stats", methods=["GET"])
+def training_cache_stats():
+    return jsonify(TrainingCache(model_store).stats()), 200
 
 
 @app.route(f"{api_base}/predict", methods=["POST"])
@@ -214,28 +886,145 @@ def predict():
     model_uuid = data["model_uuid"]
     feature_data = data["feature_data"]
 
-    # Convert JSON data to DataFrame
-    feature_data = pd.DataFrame(feature_data)
+    try:
+        model = model_store.get(model_uuid)
+    except ModelNotFoundError:
+        return jsonify({"error": "Model not found"}), 404
+
+    # Imported here, so web workers only load the compiled model code (and sklearn) once they predict
+    from compiled_model import first_record
 
-    if model_uuid in trained_models:
-        model = trained_models[model_uuid]
+    try:
+        # Score the JSON data directly with the compiled model if there is one and the data has a shape it reads
+        compiled = getattr(model, "compiled_", None)
+        if compiled is not None and first_record(feature_data) is not None:
+            with instrumentation.stage("predict", rows=1):
+                prediction, prediction_probas, class_labels = compiled.prediction(
+                    feature_data
+                )
+        else:
+            # Convert JSON data to DataFrame
+            feature_data = request_frame(feature_data)
+
+            (
+                prediction,
+                prediction_probas,
+                class_labels,
+            ) = mlb_metrics_helpers.model_prediction(model, feature_data)
+    except (KeyError, ValueError) as e:
+        # Missing or invalid features
+        return jsonify({"error": str(e)}), 400
+
+    return (
+        jsonify(
+            {
+                "prediction": prediction,
+                "prediction_probas": prediction_probas,
+                "class_labels": class_labels,
+            }
+        ),
+        200,
+    )
+
+
+@app.route(f"{api_base}/batch-predict", methods=["POST"])
+def batch_predict():
+    # JSON bodies carry the model UUID and rows together, other formats pass the UUID as a query parameter
+    try:
+        if request.mimetype == "application/json":
+            data = request.get_json()
+            model_uuid = data["model_uuid"]
+            chunk_size = data.get("chunk_size")
+            feature_data = request_frame(data["feature_data"])
+        else:
+            model_uuid = request.args["model_uuid"]
+            chunk_size = request.args.get("chunk_size", type=int)
+            with instrumentation.stage(
+                "decode", payload_bytes=request.content_length
+            ) as timing:
+                feature_data = serialization.deserialized_frame(
+                    request.get_data(), request.content_type
+                )
+                timing.rows = len(feature_data)
+    except (KeyError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        model = model_store.get(model_uuid)
+    except ModelNotFoundError:
+        return jsonify({"error": "Model not found"}), 404
+
+    try:
         (
-            prediction,
+            predictions,
             prediction_probas,
             class_labels,
-        ) = mlb_metrics_helpers.model_prediction(model, feature_data)
-        return (
-            jsonify(
-                {
-                    "prediction": prediction,
-                    "prediction_probas": prediction_probas,
-                    "class_labels": class_labels,
-                }
-            ),
-            200,
+        ) = mlb_metrics_helpers.model_predictions(model, feature_data, chunk_size)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+    return (
+        jsonify(
+            {
+                "predictions": predictions,
+                "prediction_probas": prediction_probas.tolist(),
+                "class_labels": class_labels,
+            }
+        ),
+        200,
+    )
+
+
+@app.route(f"{api_base}/models", methods=["GET"])
+def list_models():
+    return jsonify({"models": model_store.list_metadata()}), 200
+
+
+@app.route(f"{api_base}/models/stats", methods=["GET"])
+def model_store_stats():
+    return jsonify(model_store.stats()), 200
+
+
+@app.route(f"{api_base}/models/<model_uuid>", methods=["GET"])
+def get_model_metadata(model_uuid):
+    try:
+        return jsonify(model_store.metadata(model_uuid)), 200
+    except ModelNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+
+
+@app.route(f"{api_base}/models/<model_uuid>/update", methods=["POST"])
+def update_model(model_uuid):
+    data = request.get_json()
+    new_model_data = request_frame(data["new_model_data"])
+
+    if not data.get("sync"):
+        # Queue the update in the background and return the job ID right away
+        job_id = training_job_queue.submit(
+            job_user(data),
+            training_jobs.stored_updated_model,
+            model_store.store_dir,
+            model_uuid,
+            new_model_data,
+            kind="update",
         )
-    else:
-        return jsonify({"error": "Model not found"}), 404
+        return jsonify({"job_id": job_id, "status": "queued"}), 202
+
+    # Updating the model with the new rows, stored under a new UUID
+    try:
+        result = training_jobs.stored_updated_model(
+            model_store.store_dir, model_uuid, new_model_data
+        )
+    except ModelNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+
+    return jsonify(result), 200
+
+
+@app.route(f"{api_base}/models/<model_uuid>", methods=["DELETE"])
+def delete_model(model_uuid):
+    model_store.delete(model_uuid)
+    return jsonify({"model_uuid": model_uuid}), 200
 
 
 @app.route(f"{api_base}/prediction-probas-bar", methods=["POST"])
@@ -245,18 +1034,39 @@ def prediction_probas_bar():
         data = request.get_json()
         prediction_probas = data["prediction_probas"]
         class_labels = data["class_labels"]
+        image_format = data.get("format", "png")
+        if image_format not in plot_rendering.RENDER_MIMETYPES:
+            return jsonify({"error": f"Unsupported format: {image_format}"}), 400
 
-        # Generate the plot using the helper function
-        fig = mlb_metrics_helpers.plot_prediction_probas(
-            prediction_probas, class_labels
+        # Reuse the image if the same probabilities were plotted before
+        key = plot_rendering.render_key(
+            "prediction-probas-bar",
+            prediction_probas,
+            class_labels,
+            data.get("style"),
+            image_format,
         )
-
-        # Save plot to a bytes buffer
-        buf = io.BytesIO()
-        fig.savefig(buf, format="png", bbox_inches="tight")
-        buf.seek(0)
-
-        return send_file(buf, mimetype="image/png")
+        image = render_cache.get(key)
+
+        if image is None:
+            with instrumentation.stage("render") as timing:
+                if data.get("style") == "seaborn":
+                    # Generate the plot using the helper function, then close its figure
+                    fig = mlb_metrics_helpers.plot_prediction_probas(
+                        prediction_probas, class_labels
+                    )
+                    image = plot_rendering.figure_bytes(
+                        fig, image_format, bbox_inches="tight"
+                    )
+                else:
+                    # Draw the simple bar chart directly with the Agg backend
+                    image = plot_rendering.prediction_probas_bar_bytes(
+                        prediction_probas, class_labels, image_format
+                    )
+                timing.payload_bytes = len(image)
+            render_cache.put(key, image)
+
+        return Response(image, mimetype=plot_rendering.RENDER_MIMETYPES[image_format])
 
     except Exception as e:
         return jsonify({"error": str(e)}), 400
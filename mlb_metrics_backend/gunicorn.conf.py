@@ -0,0 +1,23 @@
+# Gunicorn settings for serving the Flask backend with several worker processes:
+#   gunicorn --config mlb_metrics_backend/gunicorn.conf.py --chdir mlb_metrics_backend flask_backend:app
+import multiprocessing
+import os
+
+bind = os.environ.get("MLB_METRICS_BIND", "127.0.0.1:5000")
+workers = int(
+    os.environ.get("MLB_METRICS_WEB_WORKERS", min(4, multiprocessing.cpu_count()))
+)
+
+# Load the app once in the master process, so workers are forked with it already imported
+preload_app = True
+
+
+def on_starting(server):
+    # Import the heavy modules before forking, unless disabled with MLB_METRICS_WARMUP=""
+    # (workers then import them on first use)
+    import startup
+
+    import_seconds = startup.warm_up()
+    server.log.info(
+        "Warmed up %d modules in %.2fs", len(import_seconds), sum(import_seconds.values())
+    )
@@ -0,0 +1,351 @@
+import contextvars
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Upper bounds of the histogram buckets of each kind of measurement
+SECONDS_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+ROWS_BUCKETS = [1, 10, 100, 1_000, 10_000, 100_000, 1_000_000]
+BYTES_BUCKETS = [100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000]
+
+
+class Histogram:
+    """
+    Cumulative histogram in the Prometheus style, with one series of bucket counts per combination of label values.
+
+    Args:
+        name (str): The metric name.
+        description (str): The help text of the metric.
+        buckets (list): The upper bounds of the buckets (a "+Inf" bucket is added).
+        label_names (list[str]): The names of the labels observations are grouped by.
+    """
+
+    def __init__(
+        self, name: str, description: str, buckets: list, label_names: list[str]
+    ):
+        self.name = name
+        self.description = description
+        self.buckets = list(buckets)
+        self.label_names = list(label_names)
+
+        # Label values -> [bucket counts, observation count, sum of observed values]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        """
+        Records one observation.
+
+        Args:
+            value (float): The observed value.
+            **labels: The value of each label.
+        """
+
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * len(self.buckets), 0, 0.0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def exposition(self) -> list[str]:
+        """
+        Formats the histogram in the Prometheus text exposition format.
+
+        Returns:
+            list[str]: The lines of the metric.
+        """
+
+        with self._lock:
+            series = sorted(
+                (key, (list(counts), count, total))
+                for key, (counts, count, total) in self._series.items()
+            )
+
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for key, (counts, count, total) in series:
+            labels = [f'{name}="{value}"' for name, value in zip(self.label_names, key)]
+            for bound, bucket_count in zip(self.buckets + ["+Inf"], counts + [count]):
+                bucket_labels = ",".join(labels + [f'le="{bound}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {bucket_count}")
+            lines.append(f"{self.name}_sum{{{','.join(labels)}}} {total}")
+            lines.append(f"{self.name}_count{{{','.join(labels)}}} {count}")
+
+        return lines
+
+
+# Histograms of this process, exposed by the metrics endpoint
+REQUEST_SECONDS = Histogram(
+    "mlb_metrics_request_seconds",
+    "Time to handle a request.",
+    SECONDS_BUCKETS,
+    ["endpoint", "method", "status"],
+)
+REQUEST_BYTES = Histogram(
+    "mlb_metrics_request_bytes",
+    "Size of request bodies.",
+    BYTES_BUCKETS,
+    ["endpoint"],
+)
+RESPONSE_BYTES = Histogram(
+    "mlb_metrics_response_bytes",
+    "Size of response bodies (streamed responses are not measured).",
+    BYTES_BUCKETS,
+    ["endpoint"],
+)
+STAGE_SECONDS = Histogram(
+    "mlb_metrics_stage_seconds",
+    "Time spent in each stage of request handling.",
+    SECONDS_BUCKETS,
+    ["stage"],
+)
+STAGE_ROWS = Histogram(
+    "mlb_metrics_stage_rows",
+    "Number of rows handled by each stage.",
+    ROWS_BUCKETS,
+    ["stage"],
+)
+STAGE_BYTES = Histogram(
+    "mlb_metrics_stage_bytes",
+    "Size of the payload handled by each stage.",
+    BYTES_BUCKETS,
+    ["stage"],
+)
+HISTOGRAMS = [
+    REQUEST_SECONDS,
+    REQUEST_BYTES,
+    RESPONSE_BYTES,
+    STAGE_SECONDS,
+    STAGE_ROWS,
+    STAGE_BYTES,
+]
+
+# Stages timed during the current request (None outside requests)
+_request_stages = contextvars.ContextVar("request_stages", default=None)
+
+
+class StageTiming:
+    """
+    Measurements of one timed stage. The timed code can set the number of rows and payload bytes it handled.
+
+    Args:
+        name (str): The stage name (ex "fetch", "decode", "frame", "preprocess", "fit", "predict", "serialize", "render").
+        rows (int, optional): The number of rows handled. Defaults to None.
+        payload_bytes (int, optional): The size of the payload handled. Defaults to None.
+    """
+
+    def __init__(self, name: str, rows: int = None, payload_bytes: int = None):
+        self.name = name
+        self.rows = rows
+        self.payload_bytes = payload_bytes
+        self.seconds = None
+
+
+@contextmanager
+def stage(name: str, rows: int = None, payload_bytes: int = None):
+    """
+    Times a stage of request handling and records it in the stage histograms and the current request's stages.
+
+    Args:
+        name (str): The stage name.
+        rows (int, optional): The number of rows handled, if known up front. Defaults to None.
+        payload_bytes (int, optional): The size of the payload handled, if known up front. Defaults to None.
+
+    Yields:
+        StageTiming: The stage measurements, whose rows and payload_bytes can be set by the timed code.
+    """
+
+    timing = StageTiming(name, rows, payload_bytes)
+    start = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        timing.seconds = time.perf_counter() - start
+
+        STAGE_SECONDS.observe(timing.seconds, stage=name)
+        if timing.rows is not None:
+            STAGE_ROWS.observe(timing.rows, stage=name)
+        if timing.payload_bytes is not None:
+            STAGE_BYTES.observe(timing.payload_bytes, stage=name)
+
+        request_stages = _request_stages.get()
+        if request_stages is not None:
+            request_stages.append(timing)
+
+
+def start_request() -> contextvars.Token:
+    """
+    Starts collecting the stages timed while handling a request.
+
+    Returns:
+        contextvars.Token: The token to pass to finish_request.
+    """
+
+    return _request_stages.set([])
+
+
+def finish_request(
+    token: contextvars.Token,
+    endpoint: str,
+    method: str,
+    status: int,
+    seconds: float,
+    request_bytes: int = None,
+    response_bytes: int = None,
+) -> list[StageTiming]:
+    """
+    Records a handled request in the request histograms and stops collecting its stages.
+
+    Args:
+        token (contextvars.Token): The token returned by start_request.
+        endpoint (str): The URL rule of the endpoint.
+        method (str): The HTTP method.
+        status (int): The response status code.
+        seconds (float): The time to handle the request.
+        request_bytes (int, optional): The size of the request body. Defaults to None.
+        response_bytes (int, optional): The size of the response body. Defaults to None.
+
+    Returns:
+        list[StageTiming]: The stages timed while handling the request.
+    """
+
+    request_stages = _request_stages.get() or []
+    _request_stages.reset(token)
+
+    REQUEST_SECONDS.observe(seconds, endpoint=endpoint, method=method, status=status)
+    if request_bytes is not None:
+        REQUEST_BYTES.observe(request_bytes, endpoint=endpoint)
+    if response_bytes is not None:
+        RESPONSE_BYTES.observe(response_bytes, endpoint=endpoint)
+
+    return request_stages
+
+
+def server_timing(request_stages: list[StageTiming]) -> str:
+    """
+    Formats the total time of each stage as a Server-Timing header value, shown by browser developer tools.
+
+    Args:
+        request_stages (list[StageTiming]): The stages timed while handling a request.
+
+    Returns:
+        str: The header value (ex "fetch;dur=812.4, serialize;dur=35.0").
+    """
+
+    stage_seconds = {}
+    for timing in request_stages:
+        stage_seconds[timing.name] = (
+            stage_seconds.get(timing.name, 0.0) + timing.seconds
+        )
+
+    return ", ".join(
+        f"{name};dur={seconds * 1000:.1f}" for name, seconds in stage_seconds.items()
+    )
+
+
+def prometheus_metrics() -> str:
+    """
+    Formats every histogram of this process in the Prometheus text exposition format.
+
+    Returns:
+        str: The metrics page.
+    """
+
+    return "\n".join(
+        line for histogram in HISTOGRAMS for line in histogram.exposition()
+    ) + "\n"
+
+
+class SamplingProfiler:
+    """
+    Sampling profiler of one thread. A background thread records the call stack of the profiled thread at a fixed interval,
+    so the profiled code runs without tracing overhead.
+    The samples are counted per call stack in the folded format read by flame graph tools (ex flamegraph.pl, speedscope).
+
+    Args:
+        thread_id (int, optional): The ident of the thread to profile. Defaults to None (the calling thread).
+        interval (float, optional): The time between samples in seconds. Defaults to 0.005.
+    """
+
+    def __init__(self, thread_id: int = None, interval: float = 0.005):
+        self.thread_id = threading.get_ident() if thread_id is None else thread_id
+        self.interval = interval
+
+        self.samples = Counter()
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+
+    def start(self):
+        """
+        Starts sampling the profiled thread.
+        """
+
+        self._sampler.start()
+
+    def stop(self) -> Counter:
+        """
+        Stops sampling.
+
+        Returns:
+            Counter: The number of samples of each folded call stack.
+        """
+
+        self._stopped.set()
+        self._sampler.join()
+        return self.samples
+
+    def folded(self) -> str:
+        """
+        Formats the samples in the folded format, one "frame;frame;frame count" line per call stack.
+
+        Returns:
+            str: The folded samples.
+        """
+
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.items())
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                file_name = os.path.basename(code.co_filename)
+                stack.append(f"{code.co_name} ({file_name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+
+def dump_profile(profile_dir: str, endpoint: str, profiler: SamplingProfiler) -> str:
+    """
+    Writes the folded samples of a profiled request to a file.
+
+    Args:
+        profile_dir (str): The directory of profile files.
+        endpoint (str): The URL rule of the profiled endpoint.
+        profiler (SamplingProfiler): The stopped profiler of the request.
+
+    Returns:
+        str: The name of the written file.
+    """
+
+    os.makedirs(profile_dir, exist_ok=True)
+    endpoint_name = endpoint.strip("/").replace("/", "_")
+    endpoint_name = endpoint_name.replace("<", "").replace(">", "")
+    timestamp = f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 10**9:09d}"
+    file_name = f"{timestamp}-{endpoint_name}.folded"
+    with open(os.path.join(profile_dir, file_name), "w") as f:
+        f.write(profiler.folded())
+
+    return file_name
@@ -1,32 +1,100 @@
-from typing import Literal
-import datetime
+from __future__ import annotations
 
-import pybaseball as pb
-import statsapi
+from typing import TYPE_CHECKING, Iterator, Literal
+import copy
+import datetime
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-
-from sklearn.model_selection import train_test_split
-from sklearn.compose import make_column_selector as selector
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
-from sklearn.compose import ColumnTransformer
-from sklearn.linear_model import LogisticRegression
-from sklearn.svm import SVC
-from sklearn.ensemble import (
-    RandomForestClassifier,
-    GradientBoostingClassifier,
-    HistGradientBoostingClassifier,
+
+# Heavy dependencies are imported on first use by the helpers of each feature area
+# (pybaseball and statsapi to fetch data, matplotlib and seaborn to plot, sklearn to model),
+# so importing this module stays fast
+if TYPE_CHECKING:
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+
+from statcast_cache import StatcastCache
+from season_store import SeasonStore
+from statcast_fetch import FetchProgress, chunked_metrics
+from player_index import DEFAULT_SNAPSHOT_PATH, PlayerIndex
+from compact_frames import compact_frame, register_columns, registered_columns
+from upstream import Upstream
+from instrumentation import stage
+from model_data import MODEL_DATA_SPECS, prepared_model_data
+from strike_zone import STRIKE_ZONE_HALF_WIDTH
+
+# Number of date windows fetched at the same time, and the size of each window
+fetch_workers = int(os.environ.get("MLB_METRICS_FETCH_WORKERS", 4))
+fetch_window = os.environ.get("MLB_METRICS_FETCH_WINDOW", "month")
+
+# Number of players retrieved at the same time by the bulk helpers
+bulk_workers = int(os.environ.get("MLB_METRICS_BULK_WORKERS", 4))
+
+# Upstream calls (pybaseball and MLB-StatsAPI) shared by all helpers: identical calls in flight are coalesced,
+# and HTTP requests share pooled connections and a rate limit (set MLB_METRICS_UPSTREAM_RATE and MLB_METRICS_UPSTREAM_BURST)
+upstream = Upstream(
+    rate=float(os.environ.get("MLB_METRICS_UPSTREAM_RATE", 10)),
+    burst=int(os.environ.get("MLB_METRICS_UPSTREAM_BURST", 20)),
+    pool_size=fetch_workers * bulk_workers,
 )
-from sklearn.pipeline import make_pipeline, Pipeline
+
+# Persistent cache of player-specific metrics, shared by all calls to player_specific_metrics
+statcast_cache = StatcastCache(
+    os.environ.get(
+        "MLB_METRICS_CACHE_DIR",
+        os.path.join(os.path.expanduser("~"), ".mlb_metrics_cache", "statcast"),
+    )
+)
+
+# Local store of league-wide seasons (see season_store.py), read by player_specific_metrics instead of fetching
+# when it covers the requested dates. Enabled by setting MLB_METRICS_SEASON_STORE_DIR
+season_store = (
+    SeasonStore(os.environ["MLB_METRICS_SEASON_STORE_DIR"], upstream=upstream)
+    if os.environ.get("MLB_METRICS_SEASON_STORE_DIR")
+    else None
+)
+
+# Columns used as features and classes for pitcher models (predict zone for throw)
+PITCHER_MODEL_COLUMNS = MODEL_DATA_SPECS["pitching"].columns
+
+# Columns used as features and classes for batter models (predict result of swing)
+BATTER_MODEL_COLUMNS = MODEL_DATA_SPECS["batting"].columns
+
+# Columns of player-specific metrics read by each helper, kept in compact mode
+register_columns(
+    "player_specific_metrics", ["game_date", "game_pk", "at_bat_number", "pitch_number"]
+)
+register_columns(
+    "plate_crossing_metrics", ["pitch_name", "description", "plate_x", "plate_z"]
+)
+register_columns("pitcher_model_data", PITCHER_MODEL_COLUMNS)
+register_columns("batter_model_data", BATTER_MODEL_COLUMNS)
+
+# Model types trained by compared_models
+SKLEARN_MODEL_TYPES = [
+    "logistic_regression",
+    "random_forest",
+    "gradient_boosting",
+    "hist_gradient_boosting",
+    "svc",
+    "sgd_logistic_regression",
+]
+
+# Index of the Chadwick register, built on first use for player ID lookups and search
+player_index = PlayerIndex(DEFAULT_SNAPSHOT_PATH, upstream=upstream)
+
+# Seconds general metrics (player_stat_data) are cached
+stat_data_ttl = float(os.environ.get("MLB_METRICS_STAT_DATA_TTL", 300))
 
 
 def player_id(last_name: str, first_name: str, player_num: int = 0) -> int:
     """
     Finds the player ID based on the player's last name and first name.
-    Uses pybaseball's playerid_lookup function.
+    Uses the in-process player_index built from the Chadwick register (the table behind pybaseball's playerid_lookup).
 
     Args:
         last_name (str): The last name of the player.
@@ -40,20 +108,38 @@ def player_id(last_name: str, first_name: str, player_num: int = 0) -> int:
         ValueError: If the player ID lookup is empty.
     """
 
-    try:
-        return pb.playerid_lookup(last_name, first_name)["key_mlbam"][player_num]
-    except KeyError:
+    player_ids = player_index.player_ids(last_name, first_name)
+
+    if not 0 <= player_num < len(player_ids):
         raise ValueError(
             "Player ID lookup failed. No player found with the given name."
         )
 
+    return player_ids[player_num]
+
+
+def player_search(query: str, limit: int = 10) -> list[dict]:
+    """
+    Searches for players by full or partial name, for typeahead and typo-tolerant lookups.
+    Uses the in-process player_index.
+
+    Args:
+        query (str): The search text (ex "kersh", "clayton kershaw").
+        limit (int, optional): The maximum number of candidates to return. Defaults to 10.
+
+    Returns:
+        list[dict]: The ranked candidate players with their ID, name, first and last season played, and match score.
+    """
+
+    return player_index.search(query, limit)
+
 
 def player_general_metrics(
     player_id: int, timeline_type: Literal["career", "season"] = "career"
 ) -> dict:
     """
     Retrieves the general metrics for a player based on their ID.
-    Uses MLB-StatsAPI's player_stat_data function.
+    Uses MLB-StatsAPI's player_stat_data function, through the upstream access layer (results are cached for stat_data_ttl seconds).
 
     Args:
         player_id (int): The ID of the player.
@@ -63,7 +149,16 @@ def player_general_metrics(
         dict: A dictionary containing the general metrics of the player.
     """
 
-    return statsapi.player_stat_data(player_id, type=timeline_type)
+    import statsapi
+
+    with stage("fetch"):
+        return upstream.call(
+            ("player_stat_data", player_id, timeline_type),
+            statsapi.player_stat_data,
+            player_id,
+            type=timeline_type,
+            ttl=stat_data_ttl,
+        )
 
 
 def parse_career_timeline(player_metrics: dict) -> tuple[str, str]:
@@ -90,31 +185,237 @@ def player_specific_metrics(
     metric_type: Literal["pitching", "batting"],
     start_dt: str,
     end_dt: str,
+    use_cache: bool = True,
+    progress: FetchProgress = None,
+    compact: bool = False,
 ) -> pd.DataFrame:
     """
     Retrieves the specific metrics for a player based on their ID, metric type, and date range.
     Only works for pitcher and batter metrics.
     Uses pybaseball's statcast_pitcher and statcast_batter functions.
+    Previously fetched days are served from the on-disk statcast_cache, so only missing days are fetched.
+    Date ranges covered by the season_store (when enabled) are read from it instead.
+
+    Args:
+        player_id (int): The ID of the player.
+        metric_type (Literal["pitching", "batting"]): The type of metric to retrieve (either "pitching" or "batting").
+        start_dt (str): The start date for the metrics retrieval in the format "YYYY-MM-DD".
+        end_dt (str): The end date for the metrics retrieval in the format "YYYY-MM-DD".
+        use_cache (bool, optional): Whether to use the on-disk cache and season store. Defaults to True.
+        progress (FetchProgress, optional): Progress object updated as date windows are fetched. Defaults to None.
+        compact (bool, optional): Whether to keep only the columns registered by helpers, with categorical strings and downcast numbers. Defaults to False.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing the specific metrics of the player.
+    """
+
+    if metric_type not in ["pitching", "batting"]:
+        raise ValueError("Invalid metric_type. Must be either 'pitching' or 'batting'.")
+
+    def fetch(player_id, metric_type, start_dt, end_dt):
+        with stage("fetch") as timing:
+            metrics = fetched_specific_metrics(
+                player_id, metric_type, start_dt, end_dt, progress=progress
+            )
+            timing.rows = len(metrics)
+        return metrics
+
+    try:
+        # Read from the season store when it has every requested day, only the registered columns in compact mode
+        if (
+            use_cache
+            and season_store is not None
+            and season_store.covers(metric_type, start_dt, end_dt)
+        ):
+            with stage("store") as timing:
+                metrics = season_store.player_metrics(
+                    player_id,
+                    metric_type,
+                    start_dt,
+                    end_dt,
+                    columns=registered_columns() if compact else None,
+                )
+                timing.rows = len(metrics)
+        elif use_cache:
+            metrics = statcast_cache.player_metrics(
+                player_id, metric_type, start_dt, end_dt, fetch
+            )
+        else:
+            metrics = fetch(player_id, metric_type, start_dt, end_dt)
+    finally:
+        if progress is not None:
+            progress.finish()
+
+    return compact_frame(metrics) if compact else metrics
+
+
+def fetched_specific_metrics(
+    player_id: int,
+    metric_type: Literal["pitching", "batting"],
+    start_dt: str,
+    end_dt: str,
+    progress: FetchProgress = None,
+) -> pd.DataFrame:
+    """
+    Fetches the specific metrics for a player from Statcast, without using the cache.
+    The date range is split into windows (see fetch_window) that are fetched concurrently by up to fetch_workers threads.
 
     Args:
         player_id (int): The ID of the player.
         metric_type (Literal["pitching", "batting"]): The type of metric to retrieve (either "pitching" or "batting").
         start_dt (str): The start date for the metrics retrieval in the format "YYYY-MM-DD".
         end_dt (str): The end date for the metrics retrieval in the format "YYYY-MM-DD".
+        progress (FetchProgress, optional): Progress object updated as date windows are fetched. Defaults to None.
 
     Returns:
         pd.DataFrame: A DataFrame containing the specific metrics of the player.
     """
 
+    return chunked_metrics(
+        statcast_window_metrics,
+        player_id,
+        metric_type,
+        start_dt,
+        end_dt,
+        window=fetch_window,
+        max_workers=fetch_workers,
+        progress=progress,
+    )
+
+
+def statcast_window_metrics(
+    player_id: int,
+    metric_type: Literal["pitching", "batting"],
+    start_dt: str,
+    end_dt: str,
+) -> pd.DataFrame:
+    """
+    Fetches the specific metrics for a player within a single date window.
+    Uses pybaseball's statcast_pitcher and statcast_batter functions, through the upstream access layer.
+
+    Args:
+        player_id (int): The ID of the player.
+        metric_type (Literal["pitching", "batting"]): The type of metric to retrieve (either "pitching" or "batting").
+        start_dt (str): The start date for the metrics retrieval in the format "YYYY-MM-DD".
+        end_dt (str): The end date for the metrics retrieval in the format "YYYY-MM-DD".
+
+    Returns:
+        pd.DataFrame: A DataFrame containing the specific metrics of the player.
+    """
+
+    import pybaseball as pb
+
     if metric_type == "pitching":
-        return pb.statcast_pitcher(
-            start_dt=start_dt, end_dt=end_dt, player_id=player_id
-        )
+        statcast_function = pb.statcast_pitcher
     elif metric_type == "batting":
-        return pb.statcast_batter(start_dt=start_dt, end_dt=end_dt, player_id=player_id)
+        statcast_function = pb.statcast_batter
     else:
         raise ValueError("Invalid metric_type. Must be either 'pitching' or 'batting'.")
 
+    # Users opening the same player at once share one upstream request per window
+    return upstream.call(
+        ("statcast", metric_type, player_id, start_dt, end_dt),
+        statcast_function,
+        start_dt=start_dt,
+        end_dt=end_dt,
+        player_id=player_id,
+    )
+
+
+def players_general_metrics(
+    player_ids: list[int], timeline_type: Literal["career", "season"] = "career"
+) -> dict[int, dict]:
+    """
+    Retrieves the general metrics for multiple players concurrently.
+    Duplicate player IDs are only retrieved once.
+
+    Args:
+        player_ids (list[int]): The IDs of the players.
+        timeline_type (str): The type of metrics to retrieve. Should be either "career" or "season". Defaults to "career".
+
+    Returns:
+        dict[int, dict]: A dictionary mapping each player ID to their general metrics.
+    """
+
+    unique_ids = list(dict.fromkeys(player_ids))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(bulk_workers, len(unique_ids)))) as pool:
+        metrics = pool.map(
+            lambda player_id: player_general_metrics(player_id, timeline_type),
+            unique_ids,
+        )
+        return dict(zip(unique_ids, metrics))
+
+
+def iter_players_specific_metrics(
+    players: list[tuple[int, str, str]],
+    metric_type: Literal["pitching", "batting"],
+) -> Iterator[tuple[int, str, str, pd.DataFrame]]:
+    """
+    Retrieves the specific metrics for multiple players concurrently, yielding each player's metrics as soon as they are retrieved.
+    Duplicate (player ID, start date, end date) requests are only retrieved once.
+
+    Args:
+        players (list[tuple[int, str, str]]): The (player ID, start date, end date) of each player, with dates in the format "YYYY-MM-DD".
+        metric_type (Literal["pitching", "batting"]): The type of metric to retrieve (either "pitching" or "batting").
+
+    Yields:
+        tuple[int, str, str, pd.DataFrame]: The player ID, start date, end date and specific metrics, in order of completion.
+    """
+
+    if metric_type not in ["pitching", "batting"]:
+        raise ValueError("Invalid metric_type. Must be either 'pitching' or 'batting'.")
+
+    unique_players = list(dict.fromkeys(players))
+    if not unique_players:
+        return
+
+    with ThreadPoolExecutor(max_workers=max(1, min(bulk_workers, len(unique_players)))) as pool:
+        futures = {
+            pool.submit(
+                player_specific_metrics, player_id, metric_type, start_dt, end_dt
+            ): (player_id, start_dt, end_dt)
+            for player_id, start_dt, end_dt in unique_players
+        }
+
+        for future in as_completed(futures):
+            player_id, start_dt, end_dt = futures[future]
+            yield player_id, start_dt, end_dt, future.result()
+
+
+def players_specific_metrics(
+    players: list[tuple[int, str, str]],
+    metric_type: Literal["pitching", "batting"],
+) -> pd.DataFrame:
+    """
+    Retrieves the specific metrics for multiple players concurrently and combines them into one DataFrame.
+
+    Args:
+        players (list[tuple[int, str, str]]): The (player ID, start date, end date) of each player, with dates in the format "YYYY-MM-DD".
+        metric_type (Literal["pitching", "batting"]): The type of metric to retrieve (either "pitching" or "batting").
+
+    Returns:
+        pd.DataFrame: A DataFrame containing the specific metrics of all players, with a "player_id" column identifying each player.
+    """
+
+    results = {
+        (player_id, start_dt, end_dt): metrics
+        for player_id, start_dt, end_dt, metrics in iter_players_specific_metrics(
+            players, metric_type
+        )
+    }
+
+    # Combine in the requested order so the output does not depend on completion order
+    frames = [
+        results[player].assign(player_id=player[0])
+        for player in dict.fromkeys(players)
+        if not results[player].empty
+    ]
+    if not frames:
+        return pd.DataFrame(columns=["player_id"])
+
+    return pd.concat(frames, ignore_index=True)
+
 
 def plate_crossing_metrics(
     player_specific_metrics: pd.DataFrame, metric_type: Literal["pitching", "batting"]
@@ -140,8 +441,123 @@ def plate_crossing_metrics(
         return plate_crossing_metrics[["description", "plate_x", "plate_z"]]
 
 
+def plate_crossing_group_column(metric_type: Literal["pitching", "batting"]) -> str:
+    """
+    Retrieves the column that plate crossing metrics are grouped by.
+
+    Parameters:
+        metric_type (Literal["pitching", "batting"]): The type of metrics (either "pitching" or "batting").
+
+    Returns:
+        str: "pitch_name" for pitching metrics, "description" for batting metrics.
+    """
+    return "pitch_name" if metric_type == "pitching" else "description"
+
+
+def downsampled_plate_crossing_metrics(
+    plate_metrics: pd.DataFrame,
+    metric_type: Literal["pitching", "batting"],
+    max_points: int,
+) -> pd.DataFrame:
+    """
+    Samples plate crossing metrics down to about max_points rows, keeping the share of each pitch name (or description)
+    and at least one row of each.
+
+    Parameters:
+        plate_metrics (pd.DataFrame): DataFrame containing plate crossing metrics (from plate_crossing_metrics).
+        metric_type (Literal["pitching", "batting"]): The type of metrics (either "pitching" or "batting").
+        max_points (int): The number of rows to keep.
+
+    Returns:
+        pd.DataFrame: The sampled plate crossing metrics, in their original order.
+    """
+    if len(plate_metrics) <= max_points:
+        return plate_metrics
+
+    group_column = plate_crossing_group_column(metric_type)
+    fraction = max_points / len(plate_metrics)
+
+    # Rank rows by a random key within each group, and keep the first rows of every group
+    random_key = pd.Series(
+        np.random.default_rng(0).random(len(plate_metrics)), index=plate_metrics.index
+    )
+    grouped_key = random_key.groupby(
+        plate_metrics[group_column], observed=True, dropna=False
+    )
+    rank = grouped_key.rank(method="first")
+    group_size = grouped_key.transform("size")
+    keep = rank <= np.maximum(1, np.round(group_size * fraction))
+
+    return plate_metrics[keep.to_numpy()]
+
+
+def plate_crossing_bins(
+    plate_metrics: pd.DataFrame,
+    metric_type: Literal["pitching", "batting"],
+    bins: int = None,
+) -> dict:
+    """
+    Counts plate crossings in a 2D grid of plate_x and plate_z bins for each pitch name (or description).
+    Every group shares the same bin edges, and all counts are computed in one vectorized pass.
+    Without a fixed number of bins, the bin width follows the Freedman-Diaconis rule over the central 99% of pitches
+    (between 8 and 50 bins per axis), so small samples get coarse grids and careers get fine ones.
+
+    Parameters:
+        plate_metrics (pd.DataFrame): DataFrame containing plate crossing metrics (from plate_crossing_metrics).
+        metric_type (Literal["pitching", "batting"]): The type of metrics (either "pitching" or "batting").
+        bins (int, optional): The number of bins per axis. Defaults to None (adaptive).
+
+    Returns:
+        dict: The group column, group names, x and z bin edges, and the counts of each group
+            (one list per z bin, from low to high, each with one count per x bin), and the number of pitches.
+    """
+    group_column = plate_crossing_group_column(metric_type)
+
+    x = plate_metrics["plate_x"].to_numpy(dtype=float)
+    z = plate_metrics["plate_z"].to_numpy(dtype=float)
+    group_codes, groups = pd.factorize(plate_metrics[group_column])
+
+    def edges(values):
+        if len(values) == 0:
+            return np.linspace(-1.0, 1.0, (bins or 8) + 1)
+        low, high = np.percentile(values, [0.5, 99.5])
+        if high <= low:
+            low, high = low - 0.5, high + 0.5
+        if bins:
+            return np.linspace(low, high, bins + 1)
+        central = values[(values >= low) & (values <= high)]
+        n_bins = len(np.histogram_bin_edges(central, bins="fd")) - 1
+        return np.linspace(low, high, min(max(n_bins, 8), 50) + 1)
+
+    # Round the edges so the returned edges are exactly the ones used for counting
+    x_edges, z_edges = edges(x).round(4), edges(z).round(4)
+    n_x, n_z = len(x_edges) - 1, len(z_edges) - 1
+
+    # Bin index of every pitch, with pitches outside the edges clipped to the outer bins
+    x_bins = np.clip(np.searchsorted(x_edges, x, side="right") - 1, 0, n_x - 1)
+    z_bins = np.clip(np.searchsorted(z_edges, z, side="right") - 1, 0, n_z - 1)
+
+    # Count every (group, z bin, x bin) cell at once (pitches without a group have code -1 and are skipped)
+    grouped = group_codes >= 0
+    cells = (group_codes[grouped] * n_z + z_bins[grouped]) * n_x + x_bins[grouped]
+    counts = np.bincount(cells, minlength=len(groups) * n_z * n_x).reshape(
+        len(groups), n_z, n_x
+    )
+
+    return {
+        "group_column": group_column,
+        "groups": [str(group) for group in groups],
+        "x_edges": x_edges.tolist(),
+        "z_edges": z_edges.tolist(),
+        "counts": counts.tolist(),
+        "total": int(grouped.sum()),
+    }
+
+
 def plate_crossing_scatter(
-    specific_stats: pd.DataFrame, metric_type: Literal["pitching", "batting"]
+    specific_stats: pd.DataFrame,
+    metric_type: Literal["pitching", "batting"],
+    max_points: int = None,
 ):
     """
     Generates a scatter plot for plate crossing metrics for either pitching or batting.
@@ -149,11 +565,15 @@ def plate_crossing_scatter(
     Parameters:
         specific_stats (pd.DataFrame): DataFrame containing player-specific stats.
         metric_type (Literal["pitching", "batting"]): The type of metrics to plot (either "pitching" or "batting").
+        max_points (int, optional): The number of points to sample the plot down to. Defaults to None (every point).
 
     Returns:
         matplotlib.figure.Figure: A matplotlib figure containing the generated scatter plot.
     """
 
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     # Retrieve the relevant plate crossing metrics
     if metric_type == "pitching":
         data = plate_crossing_metrics(specific_stats, "pitching")
@@ -164,6 +584,9 @@ def plate_crossing_scatter(
         hue = "description"
         title = "Scatter Plot of Batting Events Crossing Plate"
 
+    if max_points:
+        data = downsampled_plate_crossing_metrics(data, metric_type, max_points)
+
     # Set up the plot
     fig, ax = plt.subplots(figsize=(8, 6))
 
@@ -172,9 +595,9 @@ def plate_crossing_scatter(
         data=data, x="plate_x", y="plate_z", hue=hue, s=100, alpha=0.5, ax=ax
     )
 
-    # Customize the axes
-    ax.axvline(x=-0.71, color="gray", linestyle="--")  # left bound of strike zone
-    ax.axvline(x=0.71, color="gray", linestyle="--")  # right bound of strike zone
+    # Customize the axes, with the left and right bounds of strike zone
+    ax.axvline(x=-STRIKE_ZONE_HALF_WIDTH, color="gray", linestyle="--")
+    ax.axvline(x=STRIKE_ZONE_HALF_WIDTH, color="gray", linestyle="--")
 
     # Add labels and legend
     ax.set_title(title)
@@ -185,6 +608,71 @@ def plate_crossing_scatter(
     return fig
 
 
+def plate_crossing_heatmap(
+    specific_stats: pd.DataFrame,
+    metric_type: Literal["pitching", "batting"],
+    bins: int = None,
+):
+    """
+    Generates heatmaps of plate crossing counts, one per pitch name (or description), from plate_crossing_bins.
+
+    Parameters:
+        specific_stats (pd.DataFrame): DataFrame containing player-specific stats.
+        metric_type (Literal["pitching", "batting"]): The type of metrics to plot (either "pitching" or "batting").
+        bins (int, optional): The number of bins per axis. Defaults to None (adaptive).
+
+    Returns:
+        matplotlib.figure.Figure: A matplotlib figure containing the generated heatmaps.
+    """
+
+    import matplotlib.pyplot as plt
+
+    # Count the relevant plate crossing metrics in bins
+    binned = plate_crossing_bins(
+        plate_crossing_metrics(specific_stats, metric_type), metric_type, bins
+    )
+    if metric_type == "pitching":
+        title = "Heatmaps of Types of Pitches Crossing Plate"
+    else:
+        title = "Heatmaps of Batting Events Crossing Plate"
+
+    # Set up one plot per group
+    n_groups = max(len(binned["groups"]), 1)
+    n_cols = min(n_groups, 3)
+    n_rows = -(-n_groups // n_cols)
+    fig, axes = plt.subplots(
+        n_rows,
+        n_cols,
+        figsize=(4 * n_cols, 3.5 * n_rows),
+        sharex=True,
+        sharey=True,
+        squeeze=False,
+        layout="constrained",
+    )
+
+    for ax, group, counts in zip(axes.flat, binned["groups"], binned["counts"]):
+        mesh = ax.pcolormesh(
+            binned["x_edges"], binned["z_edges"], counts, cmap="viridis"
+        )
+        fig.colorbar(mesh, ax=ax, label="Pitches")
+
+        # Customize the axes, with the left and right bounds of strike zone
+        ax.axvline(x=-STRIKE_ZONE_HALF_WIDTH, color="gray", linestyle="--")
+        ax.axvline(x=STRIKE_ZONE_HALF_WIDTH, color="gray", linestyle="--")
+        ax.set_title(group)
+
+    # Hide unused plots
+    for ax in axes.flat[len(binned["groups"]) :]:
+        ax.set_visible(False)
+
+    # Add labels
+    fig.suptitle(title)
+    fig.supxlabel("Horizontal Position (feet)")
+    fig.supylabel("Vertical Position (feet)")
+
+    return fig
+
+
 def plot_prediction_probas(prediction_probas, class_labels):
     """
     Creates a bar plot of prediction probabilities using Seaborn and returns the Matplotlib figure.
@@ -196,6 +684,9 @@ def plot_prediction_probas(prediction_probas, class_labels):
     Returns:
         matplotlib.figure.Figure: A matplotlib figure containing the generated bar plot.
     """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     # Create a color palette with the same number of colors as there are classes
     palette = sns.color_palette("tab10")
 
@@ -214,84 +705,40 @@ def plot_prediction_probas(prediction_probas, class_labels):
     return fig
 
 
-def pitcher_model_data(player_specific_metrics: pd.DataFrame) -> pd.DataFrame:
+def pitcher_model_data(
+    player_specific_metrics: pd.DataFrame, pitch_mix_window: int = None
+) -> pd.DataFrame:
     """
     Processes player-specific metrics for model training.
 
     Parameters:
         player_specific_metrics (pd.DataFrame): DataFrame containing player-specific metrics.
+        pitch_mix_window (int, optional): If set, adds the rolling pitch mix over this many previous pitches of the game
+            (see pitch_features.pitch_mix_features). Defaults to None (no pitch mix).
 
     Returns:
         pd.DataFrame: DataFrame prepared for pitcher model training (predict zone for throw).
     """
-    # columns to use as features and classes
-    col_to_keep = [
-        "pitch_type",
-        "release_speed",
-        "release_pos_x",
-        "release_pos_y",
-        "release_spin_rate",
-        "spin_axis",
-        "p_throws",
-        "vx0",
-        "vy0",
-        "vz0",
-        "ax",
-        "ay",
-        "az",
-        "zone",
-    ]
-
-    # Select only the relevant target columns
-    pitcher_model_data = player_specific_metrics[col_to_keep]
+    # Keep the rows without missing values in the pitching spec columns (see model_data.MODEL_DATA_SPECS)
+    return prepared_model_data(player_specific_metrics, "pitching", pitch_mix_window)
 
-    # Drop rows with missing values
-    pitcher_model_data.dropna(inplace=True)
 
-    return pitcher_model_data
-
-
-def batter_model_data(player_specific_metrics: pd.DataFrame) -> pd.DataFrame:
+def batter_model_data(
+    player_specific_metrics: pd.DataFrame, pitch_mix_window: int = None
+) -> pd.DataFrame:
     """
     Processes player-specific metrics for model training.
 
     Parameters:
         player_specific_metrics (pd.DataFrame): DataFrame containing player-specific metrics.
+        pitch_mix_window (int, optional): If set, adds the rolling mix of pitches seen over this many previous pitches of the game
+            (see pitch_features.pitch_mix_features). Defaults to None (no pitch mix).
 
     Returns:
         pd.DataFrame: DataFrame prepared for batter model training (predict result of swing).
     """
-    # columns to use as features and classes
-    col_to_keep = [
-        "pitch_type",
-        "release_speed",
-        "release_pos_x",
-        "release_pos_y",
-        "release_spin_rate",
-        "spin_axis",
-        "p_throws",
-        "plate_x",
-        "plate_z",
-        "vx0",
-        "vy0",
-        "vz0",
-        "ax",
-        "ay",
-        "az",
-        "description",
-    ]
-
-    # Select only the relevant target columns
-    batter_model_data = player_specific_metrics[col_to_keep]
-    batter_model_data = batter_model_data[
-        (batter_model_data["description"] == "hit_into_play")
-        | (batter_model_data["description"] == "swinging_strike")
-    ]
-
-    # Drop rows with missing values
-    batter_model_data.dropna(inplace=True)
-
-    return batter_model_data
+    # Keep the swings (hit into play or swinging strike) without missing values in the batting spec columns
+    return prepared_model_data(player_specific_metrics, "batting", pitch_mix_window)
 
 
 def model_datasets(
@@ -312,6 +759,8 @@ def model_datasets(
             - y_test (pd.Series): Testing class dataset.
     """
 
+    from sklearn.model_selection import train_test_split
+
     # Split into feature and class datasets
     X = model_data.drop(columns=[target])
     y = model_data[target]
@@ -324,8 +773,124 @@ def model_datasets(
     return (X_train, X_test, y_train, y_test)
 
 
+def sklearn_model(
+    sklearn_model_type: Literal[
+        "logistic_regression",
+        "random_forest",
+        "gradient_boosting",
+        "hist_gradient_boosting",
+        "svc",
+        "sgd_logistic_regression",
+    ]
+):
+    """
+    Creates an untrained sklearn model of the specified type.
+
+    Args:
+        sklearn_model_type (Literal): The type of sklearn model to create. Must be one of:
+            - "logistic_regression"
+            - "random_forest"
+            - "gradient_boosting"
+            - "hist_gradient_boosting"
+            - "svc"
+            - "sgd_logistic_regression"
+
+    Returns:
+        The untrained sklearn model.
+    """
+    from sklearn.ensemble import (
+        GradientBoostingClassifier,
+        HistGradientBoostingClassifier,
+        RandomForestClassifier,
+    )
+    from sklearn.linear_model import LogisticRegression, SGDClassifier
+    from sklearn.svm import SVC
+
+    if sklearn_model_type == "logistic_regression":
+        return LogisticRegression(random_state=0)
+    elif sklearn_model_type == "random_forest":
+        return RandomForestClassifier(random_state=0)
+    elif sklearn_model_type == "gradient_boosting":
+        return GradientBoostingClassifier(random_state=0)
+    elif sklearn_model_type == "hist_gradient_boosting":
+        return HistGradientBoostingClassifier(random_state=0)
+    elif sklearn_model_type == "svc":
+        return SVC(random_state=0, probability=True)
+    elif sklearn_model_type == "sgd_logistic_regression":
+        return SGDClassifier(loss="log_loss", random_state=0)
+    else:
+        raise ValueError(
+            "Invalid sklearn_model_type. Please choose a valid model type."
+        )
+
+
+def column_preprocessor(
+    X: pd.DataFrame, engineered_features: bool = False
+) -> ColumnTransformer:
+    """
+    Creates the (unfitted) preprocessor of model pipelines: one-hot encoding for categorical columns and standard scaling for numerical columns.
+    With engineered features, the trajectory features of pitch_features (plate time, break, in-zone flags) are computed
+    from the raw Statcast columns and standard scaled as well.
+
+    Parameters:
+        X (pd.DataFrame): Feature dataset, used to select the categorical and numerical columns.
+        engineered_features (bool, optional): Whether to add the trajectory features (if X has their input columns). Defaults to False.
+
+    Returns:
+        ColumnTransformer: The preprocessor for the feature dataset.
+    """
+    from sklearn.compose import ColumnTransformer
+    from sklearn.compose import make_column_selector as selector
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    # Select numerical and categorical columns
+    numerical_columns_selector = selector(dtype_exclude=[object, "category"])
+    categorical_columns_selector = selector(dtype_include=[object, "category"])
+
+    numerical_columns = numerical_columns_selector(X)
+    categorical_columns = categorical_columns_selector(X)
+
+    # Preprocess categorical and numerical columns
+    categorical_preprocessor = OneHotEncoder(handle_unknown="ignore")
+    numerical_preprocessor = StandardScaler()
+
+    transformers = [
+        ("one-hot-encoder", categorical_preprocessor, categorical_columns),
+        ("standard_scaler", numerical_preprocessor, numerical_columns),
+    ]
+
+    # Compute the trajectory features from the raw columns, then scale them
+    if engineered_features:
+        from pitch_features import (
+            PLATE_LOCATION_COLUMNS,
+            TRAJECTORY_COLUMNS,
+            TrajectoryFeatures,
+        )
+
+        if set(TRAJECTORY_COLUMNS).issubset(X.columns):
+            trajectory_columns = TRAJECTORY_COLUMNS + [
+                column for column in PLATE_LOCATION_COLUMNS if column in X.columns
+            ]
+            transformers.append(
+                (
+                    "trajectory_features",
+                    make_pipeline(TrajectoryFeatures(), StandardScaler()),
+                    trajectory_columns,
+                )
+            )
+
+    preprocessor = ColumnTransformer(transformers)
+
+    return preprocessor
+
+
 def trained_model(
-    X_train: pd.DataFrame, y_train: pd.Series, sklearn_model: Pipeline
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    sklearn_model: Pipeline,
+    compile_model: bool = True,
+    engineered_features: bool = False,
 ) -> Pipeline:
     """
     Trains a baseball model using the provided training data.
@@ -334,31 +899,30 @@ def trained_model(
         X_train (pd.DataFrame): Training feature dataset.
         y_train (pd.Series): Training class dataset.
         sklearn_model (object): Type of model to be trained.
+        compile_model (bool, optional): Whether to compile the trained pipeline for fast single-row predictions. Defaults to True.
+        engineered_features (bool, optional): Whether the preprocessor adds the trajectory features. Defaults to False.
 
     Returns:
         Pipeline : sklearn pipeline for processing and predicting baseball data point.
+            Its compiled_ attribute holds a CompiledPipeline for fast single-row predictions (None if the model cannot be compiled).
     """
-    # Select numerical and categorical columns
-    numerical_columns_selector = selector(dtype_exclude=object)
-    categorical_columns_selector = selector(dtype_include=object)
+    from sklearn.pipeline import make_pipeline
 
-    numerical_columns = numerical_columns_selector(X_train)
-    categorical_columns = categorical_columns_selector(X_train)
+    from compiled_model import compiled_pipeline
 
-    # Preprocess categorical and numerical columns
-    categorical_preprocessor = OneHotEncoder(handle_unknown="ignore")
-    numerical_preprocessor = StandardScaler()
+    preprocessor = column_preprocessor(X_train, engineered_features)
 
-    preprocessor = ColumnTransformer(
-        [
-            ("one-hot-encoder", categorical_preprocessor, categorical_columns),
-            ("standard_scaler", numerical_preprocessor, numerical_columns),
-        ]
-    )
-
-    # Create and train the model
+    # Create and train the model, fitting the preprocessor and the estimator as separate stages (as the pipeline's fit does)
     model = make_pipeline(preprocessor, sklearn_model)
-    model.fit(X_train, y_train)
+    with stage("preprocess", rows=len(X_train)):
+        Xt_train = preprocessor.fit_transform(X_train)
+    with stage("fit", rows=len(X_train)):
+        sklearn_model.fit(Xt_train, y_train)
+
+    # Compile a NumPy-only inference path, checked against the pipeline on some training rows
+    model.compiled_ = (
+        compiled_pipeline(model, X_train.iloc[:100]) if compile_model else None
+    )
 
     return model
 
@@ -372,10 +936,13 @@ def tested_model(
         "gradient_boosting",
         "hist_gradient_boosting",
         "svc",
+        "sgd_logistic_regression",
     ],
+    engineered_features: bool = False,
 ) -> tuple[Pipeline, float]:
     """
     Trains and evaluates a player model using the specified sklearn model type.
+    Training is deterministic, so stored results are reused by fingerprint (see training_cache.TrainingCache and training_jobs.stored_tested_model).
 
     Args:
         model_data (pd.DataFrame): The input data for training the model.
@@ -386,6 +953,8 @@ def tested_model(
             - "gradient_boosting"
             - "hist_gradient_boosting"
             - "svc"
+            - "sgd_logistic_regression"
+        engineered_features (bool, optional): Whether the preprocessor adds the trajectory features of pitch_features. Defaults to False.
 
     Returns:
         tuple[Pipeline, float]: A tuple containing the trained model pipeline and the accuracy score.
@@ -394,22 +963,10 @@ def tested_model(
     X_train, X_test, y_train, y_test = model_datasets(model_data, target)
 
     # Train the model
-    if sklearn_model_type == "logistic_regression":
-        model_type = LogisticRegression(random_state=0)
-    elif sklearn_model_type == "random_forest":
-        model_type = RandomForestClassifier(random_state=0)
-    elif sklearn_model_type == "gradient_boosting":
-        model_type = GradientBoostingClassifier(random_state=0)
-    elif sklearn_model_type == "hist_gradient_boosting":
-        model_type = HistGradientBoostingClassifier(random_state=0)
-    elif sklearn_model_type == "svc":
-        model_type = SVC(random_state=0, probability=True)
-    else:
-        raise ValueError(
-            "Invalid sklearn_model_type. Please choose a valid model type."
-        )
-
-    model = trained_model(X_train, y_train, model_type)
+    model_type = sklearn_model(sklearn_model_type)
+    model = trained_model(
+        X_train, y_train, model_type, engineered_features=engineered_features
+    )
 
     # Evaluate the model
     accuracy = model.score(X_test, y_test)
@@ -417,6 +974,185 @@ def tested_model(
     return (model, accuracy)
 
 
+def compared_models(
+    model_data: pd.DataFrame,
+    target: str,
+    sklearn_model_types: list[str] = None,
+    n_jobs: int = None,
+    engineered_features: bool = False,
+) -> list[dict]:
+    """
+    Trains and evaluates several player model types on the same data, ranked by accuracy.
+    The data is split and preprocessed once, and every estimator is fitted on the shared transformed matrices
+    (sparse when the one-hot encoded columns make them mostly zeros), instead of once per tested_model call.
+    Results are the same as tested_model.
+
+    Args:
+        model_data (pd.DataFrame): The input data for training the models.
+        target (str): The target column to predict.
+        sklearn_model_types (list[str], optional): The types of sklearn model to train. Defaults to None (SKLEARN_MODEL_TYPES).
+        n_jobs (int, optional): The number of estimators fitted at the same time, in threads. Defaults to None (one at a time).
+        engineered_features (bool, optional): Whether the preprocessor adds the trajectory features of pitch_features. Defaults to False.
+
+    Returns:
+        list[dict]: The leaderboard, one entry per model type with its rank, trained model pipeline, accuracy,
+            fit time and shared preprocessing time in seconds.
+    """
+    from joblib import Parallel, delayed
+    from scipy import sparse
+    from sklearn.pipeline import Pipeline
+
+    from compiled_model import compiled_pipeline
+
+    sklearn_model_types = sklearn_model_types or SKLEARN_MODEL_TYPES
+    estimators = {
+        model_type: sklearn_model(model_type) for model_type in sklearn_model_types
+    }
+
+    start = time.perf_counter()
+
+    # Split and preprocess once for every model type
+    X_train, X_test, y_train, y_test = model_datasets(model_data, target)
+    preprocessor = column_preprocessor(X_train, engineered_features)
+    with stage("preprocess", rows=len(model_data)):
+        Xt_train = preprocessor.fit_transform(X_train)
+        Xt_test = preprocessor.transform(X_test)
+    preprocessing_seconds = time.perf_counter() - start
+
+    def fitted(model_type):
+        fit_start = time.perf_counter()
+
+        # HistGradientBoosting only accepts dense matrices
+        estimator = estimators[model_type]
+        dense = sparse.issparse(Xt_train) and model_type == "hist_gradient_boosting"
+        with stage("fit", rows=len(y_train)):
+            estimator.fit(Xt_train.toarray() if dense else Xt_train, y_train)
+        accuracy = estimator.score(Xt_test.toarray() if dense else Xt_test, y_test)
+
+        # Pipeline with the same step names as make_pipeline in trained_model
+        model = Pipeline(
+            [
+                ("columntransformer", preprocessor),
+                (type(estimator).__name__.lower(), estimator),
+            ]
+        )
+        model.compiled_ = compiled_pipeline(model, X_train.iloc[:100])
+
+        return model, accuracy, time.perf_counter() - fit_start
+
+    results = Parallel(n_jobs=n_jobs, prefer="threads")(
+        delayed(fitted)(model_type) for model_type in sklearn_model_types
+    )
+
+    leaderboard = [
+        {
+            "model_type": model_type,
+            "model": model,
+            "accuracy": accuracy,
+            "fit_seconds": fit_seconds,
+            "preprocessing_seconds": preprocessing_seconds,
+        }
+        for model_type, (model, accuracy, fit_seconds) in zip(
+            sklearn_model_types, results
+        )
+    ]
+
+    # Rank by accuracy, most accurate first
+    ranked = sorted(leaderboard, key=lambda entry: -entry["accuracy"])
+    for rank, entry in enumerate(ranked, start=1):
+        entry["rank"] = rank
+
+    return ranked
+
+
+def updated_model(
+    model: Pipeline,
+    model_data: pd.DataFrame,
+    new_model_data: pd.DataFrame,
+    target: str,
+    warm_start_estimators: int = None,
+) -> tuple[Pipeline, float, str]:
+    """
+    Updates a trained player model with new rows (ex the pitches of a new game) instead of retraining it from scratch.
+    The fitted preprocessor is kept as is, so the one-hot vocabulary and scaling stay the same as the original model.
+    SGD logistic regression models are updated with partial_fit on the new rows only,
+    gradient boosting models add trees (warm start) fitted on all rows,
+    and other models (or new rows with classes the model never saw) refit the estimator on all rows.
+
+    Args:
+        model (Pipeline): The trained sklearn model pipeline (not modified).
+        model_data (pd.DataFrame): The data the model was trained on.
+        new_model_data (pd.DataFrame): The new rows, with the same columns as the model data.
+        target (str): The target column to predict.
+        warm_start_estimators (int, optional): The number of trees added by a warm start. Defaults to None (10% of the current trees).
+
+    Returns:
+        tuple[Pipeline, float, str]: The updated model pipeline, the accuracy of the original model on the new rows,
+            and the update method ("partial_fit", "warm_start" or "refit").
+    """
+    from scipy import sparse
+    from sklearn.ensemble import (
+        GradientBoostingClassifier,
+        HistGradientBoostingClassifier,
+    )
+    from sklearn.linear_model import SGDClassifier
+
+    from compiled_model import compiled_pipeline
+
+    # Trained models can be shared (ex by the memory cache of the model store), so update a copy
+    model = copy.deepcopy(model)
+    preprocessor, estimator = model.steps[0][1], model.steps[-1][1]
+
+    X_new = new_model_data.drop(columns=[target])
+    y_new = new_model_data[target]
+
+    # Evaluate the original model on the new rows before learning from them
+    accuracy = model.score(X_new, y_new)
+
+    known_classes = np.isin(y_new, estimator.classes_).all()
+
+    if isinstance(estimator, SGDClassifier) and known_classes:
+        with stage("fit", rows=len(X_new)):
+            estimator.partial_fit(preprocessor.transform(X_new), y_new)
+        update_method = "partial_fit"
+    else:
+        all_data = pd.concat([model_data, new_model_data], ignore_index=True)
+        Xt_all = preprocessor.transform(all_data.drop(columns=[target]))
+        y_all = all_data[target]
+
+        # HistGradientBoosting only accepts dense matrices
+        if sparse.issparse(Xt_all) and isinstance(
+            estimator, HistGradientBoostingClassifier
+        ):
+            Xt_all = Xt_all.toarray()
+
+        if isinstance(estimator, GradientBoostingClassifier) and known_classes:
+            n_estimators = estimator.n_estimators_
+            estimator.set_params(
+                warm_start=True,
+                n_estimators=n_estimators
+                + (warm_start_estimators or max(1, n_estimators // 10)),
+            )
+            update_method = "warm_start"
+        elif isinstance(estimator, HistGradientBoostingClassifier) and known_classes:
+            n_iter = estimator.n_iter_
+            estimator.set_params(
+                warm_start=True,
+                max_iter=n_iter + (warm_start_estimators or max(1, n_iter // 10)),
+            )
+            update_method = "warm_start"
+        else:
+            update_method = "refit"
+
+        with stage("fit", rows=len(y_all)):
+            estimator.fit(Xt_all, y_all)
+
+    # Compile a NumPy-only inference path, checked against the pipeline on some new rows
+    model.compiled_ = compiled_pipeline(model, X_new.iloc[:100])
+
+    return model, accuracy, update_method
+
+
 def model_prediction(model: Pipeline, sample_X: pd.DataFrame) -> (str, list, list):
     """
     Makes predictions using the trained model on the provided sample data.
@@ -431,13 +1167,49 @@ def model_prediction(model: Pipeline, sample_X: pd.DataFrame) -> (str, list, lis
         - list: Prediction probabilities for each class.
         - list: Class labels used by the model.
     """
-    prediction = model.predict(sample_X)[0]
-    prediction = str(prediction)
+    predictions, prediction_probas, class_labels = model_predictions(
+        model, sample_X.iloc[:1]
+    )
+
+    prediction = predictions[0]
+    prediction_probas = [float(x) for x in prediction_probas[0]]
+
+    return prediction, prediction_probas, class_labels
+
+
+def model_predictions(
+    model: Pipeline, X: pd.DataFrame, chunk_size: int = None
+) -> tuple[list[str], np.ndarray, list]:
+    """
+    Makes predictions for every row of the provided data.
+    Runs the pipeline once per chunk with predict_proba and derives each predicted label from the most probable class.
 
-    prediction_probas = model.predict_proba(sample_X)[0].tolist()
-    prediction_probas = [float(x) for x in prediction_probas]
+    Parameters:
+        model (Pipeline): The trained sklearn model pipeline.
+        X (pd.DataFrame): Feature dataset for prediction.
+        chunk_size (int, optional): The number of rows processed at a time, to keep memory bounded. Defaults to None (all rows at once).
+
+    Returns:
+        Tuple containing:
+        - list[str]: Predicted class label for each row.
+        - np.ndarray: Prediction probabilities with one row per sample and one column per class.
+        - list: Class labels used by the model.
+    """
+    if len(X) == 0:
+        prediction_probas = np.empty((0, len(model.classes_)))
+    else:
+        chunk_size = chunk_size or len(X)
+        with stage("predict", rows=len(X)):
+            prediction_probas = np.vstack(
+                [
+                    model.predict_proba(X.iloc[start : start + chunk_size])
+                    for start in range(0, len(X), chunk_size)
+                ]
+            )
 
     # Retrieve class labels
     class_labels = model.classes_.tolist()
 
-    return prediction, prediction_probas, class_labels
+    predictions = model.classes_[prediction_probas.argmax(axis=1)].astype(str).tolist()
+
+    return predictions, prediction_probas, class_labels
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+
+class ModelDataSpec:
+    """
+    Declares how model data is prepared from player-specific metrics for one kind of model.
+
+    Args:
+        target (str): The target column to predict.
+        features (list[str]): The feature columns, in model data order.
+        target_values (list, optional): The target values rows are kept for. Defaults to None (every value).
+    """
+
+    def __init__(
+        self,
+        target: str,
+        features: list[str],
+        target_values: list = None,
+    ):
+        self.target = target
+        self.features = list(features)
+        self.target_values = None if target_values is None else list(target_values)
+
+    @property
+    def columns(self) -> list[str]:
+        """
+        The columns of the model data: the features followed by the target.
+        """
+
+        return self.features + [self.target]
+
+
+# Statcast columns describing the release and trajectory of a pitch, shared by every model
+PITCH_RELEASE_FEATURES = [
+    "pitch_type",
+    "release_speed",
+    "release_pos_x",
+    "release_pos_y",
+    "release_spin_rate",
+    "spin_axis",
+    "p_throws",
+]
+PITCH_TRAJECTORY_FEATURES = ["vx0", "vy0", "vz0", "ax", "ay", "az"]
+
+# Model data of each metric type:
+# - pitching: predict the zone of a throw
+# - batting: predict the result of a swing (the plate location is known when the batter swings)
+MODEL_DATA_SPECS = {
+    "pitching": ModelDataSpec(
+        target="zone",
+        features=PITCH_RELEASE_FEATURES + PITCH_TRAJECTORY_FEATURES,
+    ),
+    "batting": ModelDataSpec(
+        target="description",
+        features=PITCH_RELEASE_FEATURES
+        + ["plate_x", "plate_z"]
+        + PITCH_TRAJECTORY_FEATURES,
+        target_values=["hit_into_play", "swinging_strike"],
+    ),
+}
+
+
+def model_data_spec(metric_type: str) -> ModelDataSpec:
+    """
+    Looks up the model data spec of a metric type.
+
+    Args:
+        metric_type (str): The type of metrics (either "pitching" or "batting").
+
+    Returns:
+        ModelDataSpec: The model data spec.
+    """
+
+    if metric_type not in MODEL_DATA_SPECS:
+        raise ValueError(
+            f"Invalid metric_type '{metric_type}'. "
+            f"Must be one of: {', '.join(MODEL_DATA_SPECS)}."
+        )
+
+    return MODEL_DATA_SPECS[metric_type]
+
+
+def model_data_rows(
+    player_specific_metrics: pd.DataFrame, spec: ModelDataSpec
+) -> np.ndarray:
+    """
+    Finds the rows of player-specific metrics kept in model data, with one combined mask over only the spec columns:
+    rows with a missing value in any column, or a target value the spec does not keep, are dropped.
+
+    Args:
+        player_specific_metrics (pd.DataFrame): DataFrame containing player-specific metrics.
+        spec (ModelDataSpec): The model data spec.
+
+    Returns:
+        np.ndarray: The positions of the kept rows.
+    """
+
+    keep = np.ones(len(player_specific_metrics), dtype=bool)
+    for column in spec.columns:
+        keep &= player_specific_metrics[column].notna().to_numpy()
+
+    if spec.target_values is not None:
+        keep &= (
+            player_specific_metrics[spec.target].isin(spec.target_values).to_numpy()
+        )
+
+    return np.flatnonzero(keep)
+
+
+def prepared_model_data(
+    player_specific_metrics: pd.DataFrame,
+    metric_type: str,
+    pitch_mix_window: int = None,
+) -> pd.DataFrame:
+    """
+    Prepares model data from player-specific metrics in a single pass: the kept rows are found with one mask,
+    then each needed column is gathered once into its own contiguous array of the output, without intermediate copies of the metrics.
+
+    Args:
+        player_specific_metrics (pd.DataFrame): DataFrame containing player-specific metrics.
+        metric_type (str): The type of metrics (either "pitching" or "batting").
+        pitch_mix_window (int, optional): If set, adds the rolling pitch mix over this many previous pitches of the game
+            (see pitch_features.pitch_mix_features), placed before the target column. Defaults to None (no pitch mix).
+
+    Returns:
+        pd.DataFrame: The model data, with the spec columns (and dtypes) and the index of the kept rows.
+    """
+
+    spec = model_data_spec(metric_type)
+    rows = model_data_rows(player_specific_metrics, spec)
+
+    columns = {
+        column: player_specific_metrics[column].array.take(rows)
+        for column in spec.features
+    }
+
+    # The pitch mix is computed on all the metrics, so pitches dropped from the model data still count in the mix
+    if pitch_mix_window:
+        from pitch_features import pitch_mix_features
+
+        mix = pitch_mix_features(player_specific_metrics, pitch_mix_window)
+        for column in mix.columns:
+            columns[column] = mix[column].to_numpy()[rows]
+
+    columns[spec.target] = player_specific_metrics[spec.target].array.take(rows)
+
+    # The gathered arrays are new, so the frame keeps them as they are instead of consolidating them into more copies
+    return pd.DataFrame(columns, index=player_specific_metrics.index[rows], copy=False)
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import math
+import os
+import time
+from typing import TYPE_CHECKING, Literal
+
+import numpy as np
+import pandas as pd
+
+import mlb_metrics_helpers
+
+if TYPE_CHECKING:
+    from sklearn.pipeline import Pipeline
+
+# Hyperparameters searched for each model type, unless the caller provides a grid
+PARAM_GRIDS = {
+    "logistic_regression": {"C": [0.01, 0.1, 1.0, 10.0]},
+    "random_forest": {
+        "n_estimators": [100, 300],
+        "max_depth": [None, 10, 20],
+        "min_samples_leaf": [1, 5],
+    },
+    "gradient_boosting": {
+        "n_estimators": [100, 200],
+        "learning_rate": [0.05, 0.1],
+        "max_depth": [3, 5],
+    },
+    "hist_gradient_boosting": {
+        "learning_rate": [0.05, 0.1],
+        "max_leaf_nodes": [15, 31, 63],
+        "l2_regularization": [0.0, 1.0],
+    },
+    "svc": {"C": [0.1, 1.0, 10.0], "gamma": ["scale", 0.1]},
+    "sgd_logistic_regression": {"alpha": [1e-5, 1e-4, 1e-3]},
+}
+
+# Number of folds and candidates fitted at the same time (-1 uses every core)
+default_n_jobs = int(os.environ.get("MLB_METRICS_SEARCH_JOBS", -1))
+
+
+def fold_score(
+    sklearn_model_type: str,
+    params: dict,
+    X: pd.DataFrame,
+    y: pd.Series,
+    train_index: np.ndarray,
+    test_index: np.ndarray,
+) -> tuple[float, float]:
+    """
+    Trains a candidate model on one cross-validation fold and scores it on the held-out rows.
+
+    Args:
+        sklearn_model_type (str): The type of sklearn model to use.
+        params (dict): The hyperparameters of the candidate.
+        X (pd.DataFrame): The feature dataset.
+        y (pd.Series): The class dataset.
+        train_index (np.ndarray): The positions of the training rows of the fold.
+        test_index (np.ndarray): The positions of the held-out rows of the fold.
+
+    Returns:
+        tuple[float, float]: The accuracy on the held-out rows and the fit time in seconds.
+    """
+
+    estimator = mlb_metrics_helpers.sklearn_model(sklearn_model_type).set_params(
+        **params
+    )
+
+    start = time.perf_counter()
+    model = mlb_metrics_helpers.trained_model(
+        X.iloc[train_index], y.iloc[train_index], estimator, compile_model=False
+    )
+    fit_seconds = time.perf_counter() - start
+
+    return model.score(X.iloc[test_index], y.iloc[test_index]), fit_seconds
+
+
+def searched_model(
+    model_data: pd.DataFrame,
+    target: str,
+    sklearn_model_type: Literal[
+        "logistic_regression",
+        "random_forest",
+        "gradient_boosting",
+        "hist_gradient_boosting",
+        "svc",
+        "sgd_logistic_regression",
+    ],
+    search: Literal["grid", "halving"] = "grid",
+    param_grid: dict = None,
+    cv: int = 5,
+    n_jobs: int = None,
+    time_budget_seconds: float = None,
+    halving_factor: int = 3,
+) -> tuple[Pipeline, float, dict]:
+    """
+    Searches hyperparameters of a player model with stratified k-fold cross-validation on the training split,
+    then retrains the best candidate on the whole training split and evaluates it on the test split (like tested_model).
+    Grid search scores every candidate on all training rows. Successive halving scores every candidate on a subsample,
+    then keeps the best 1/halving_factor of candidates for the next round with halving_factor times more rows.
+    The folds of several candidates are fitted in parallel. Once the time budget is exceeded,
+    no more candidates are started (after the first batch) and the best candidate scored so far is used.
+
+    Args:
+        model_data (pd.DataFrame): The input data for training the model.
+        target (str): The target column to predict.
+        sklearn_model_type (Literal): The type of sklearn model to use. Must be one of:
+            - "logistic_regression"
+            - "random_forest"
+            - "gradient_boosting"
+            - "hist_gradient_boosting"
+            - "svc"
+            - "sgd_logistic_regression"
+        search (Literal["grid", "halving"], optional): The search strategy. Defaults to "grid".
+        param_grid (dict, optional): The values to search for each hyperparameter. Defaults to None (PARAM_GRIDS of the model type).
+        cv (int, optional): The number of cross-validation folds. Defaults to 5.
+        n_jobs (int, optional): The number of fits run at the same time (-1 uses every core). Defaults to None (default_n_jobs).
+        time_budget_seconds (float, optional): The time after which no more candidates are started. Defaults to None (no limit).
+        halving_factor (int, optional): The candidate reduction and row growth factor of successive halving rounds. Defaults to 3.
+
+    Returns:
+        tuple[Pipeline, float, dict]: The best model pipeline, its accuracy on the test split, and the search results
+            (best parameters, per candidate mean/std accuracy and mean fit time, and whether the time budget ran out).
+    """
+    from joblib import Parallel, delayed, effective_n_jobs
+    from sklearn.model_selection import ParameterGrid, StratifiedKFold
+
+    if search not in ["grid", "halving"]:
+        raise ValueError("Invalid search. Must be either 'grid' or 'halving'.")
+
+    start = time.perf_counter()
+    n_jobs = default_n_jobs if n_jobs is None else n_jobs
+
+    # Split into training and testing datasets, the search only sees the training rows
+    X_train, X_test, y_train, y_test = mlb_metrics_helpers.model_datasets(
+        model_data, target
+    )
+
+    candidates = list(ParameterGrid(param_grid or PARAM_GRIDS[sklearn_model_type]))
+    results = [
+        {
+            "params": params,
+            "mean_score": None,
+            "std_score": None,
+            "mean_fit_seconds": None,
+            "n_samples": None,
+            "round": None,
+            "rank": None,
+        }
+        for params in candidates
+    ]
+
+    # Rows used by each round: all of them for grid search, growing by halving_factor for successive halving
+    if search == "grid":
+        round_samples = [len(X_train)]
+    else:
+        n_rounds = max(1, math.ceil(math.log(len(candidates), halving_factor)))
+        min_samples = min(len(X_train), cv * y_train.nunique() * 2)
+        round_samples = [
+            max(min_samples, len(X_train) // halving_factor ** (n_rounds - 1 - i))
+            for i in range(n_rounds)
+        ]
+
+    # Subsamples are prefixes of one shuffled order, so each round's rows include the previous round's
+    order = np.random.default_rng(0).permutation(len(X_train))
+    folds = StratifiedKFold(n_splits=cv, shuffle=True, random_state=0)
+
+    remaining = list(range(len(candidates)))
+    timed_out = False
+    # Score this many candidates between time budget checks, enough to keep every worker busy
+    batch_size = max(1, math.ceil(effective_n_jobs(n_jobs) / cv))
+
+    with Parallel(n_jobs=n_jobs) as parallel:
+        for round_index, n_samples in enumerate(round_samples):
+            X_round = X_train.iloc[np.sort(order[:n_samples])]
+            y_round = y_train.iloc[np.sort(order[:n_samples])]
+            splits = list(folds.split(X_round, y_round))
+
+            scored = []
+            for batch_start in range(0, len(remaining), batch_size):
+                # The first batch always runs, so there is a best candidate
+                if (
+                    time_budget_seconds is not None
+                    and (round_index > 0 or batch_start > 0)
+                    and time.perf_counter() - start > time_budget_seconds
+                ):
+                    timed_out = True
+                    break
+
+                batch = remaining[batch_start : batch_start + batch_size]
+                fold_results = parallel(
+                    delayed(fold_score)(
+                        sklearn_model_type,
+                        candidates[candidate],
+                        X_round,
+                        y_round,
+                        train_index,
+                        test_index,
+                    )
+                    for candidate in batch
+                    for train_index, test_index in splits
+                )
+
+                for i, candidate in enumerate(batch):
+                    scores, fit_seconds = zip(*fold_results[i * cv : (i + 1) * cv])
+                    results[candidate].update(
+                        {
+                            "mean_score": float(np.mean(scores)),
+                            "std_score": float(np.std(scores)),
+                            "mean_fit_seconds": float(np.mean(fit_seconds)),
+                            "n_samples": n_samples,
+                            "round": round_index,
+                        }
+                    )
+                    scored.append(candidate)
+
+            # Keep the best candidates of this round for the next one
+            if scored:
+                scored.sort(key=lambda c: -results[c]["mean_score"])
+                remaining = scored[: max(1, math.ceil(len(scored) / halving_factor))]
+            if timed_out or len(remaining) == 1:
+                break
+
+    # Rank candidates by the last round they reached, then by mean accuracy
+    ranked = sorted(
+        (i for i, result in enumerate(results) if result["round"] is not None),
+        key=lambda i: (-results[i]["round"], -results[i]["mean_score"]),
+    )
+    for rank, candidate in enumerate(ranked, start=1):
+        results[candidate]["rank"] = rank
+    best_params = candidates[ranked[0]]
+
+    # Retrain the best candidate on the whole training split and evaluate it
+    estimator = mlb_metrics_helpers.sklearn_model(sklearn_model_type).set_params(
+        **best_params
+    )
+    model = mlb_metrics_helpers.trained_model(X_train, y_train, estimator)
+    accuracy = model.score(X_test, y_test)
+
+    return (
+        model,
+        accuracy,
+        {
+            "best_params": best_params,
+            "search": search,
+            "cv": cv,
+            "candidates": results,
+            "timed_out": timed_out,
+            "seconds": time.perf_counter() - start,
+        },
+    )
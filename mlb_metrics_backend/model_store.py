@@ -0,0 +1,244 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import pandas as pd
+
+
+class ModelNotFoundError(LookupError):
+    """
+    Raised when a model UUID is unknown to the model store.
+    """
+
+
+class ModelStore:
+    """
+    Store for trained model pipelines, shared by all worker processes through a directory on disk.
+    Every model is written to disk with joblib when it is stored, so any worker can serve any model UUID.
+    Each worker keeps recently used models in memory, evicting the least recently used ones once the memory budget is exceeded,
+    and lazily reloads evicted models from disk (memory-mapping large arrays where possible).
+    The training data of a model can be stored with it (as Parquet), so the model can be updated with new rows later.
+
+    Args:
+        store_dir (str): The directory to store models and their metadata in.
+        memory_budget_bytes (int, optional): The maximum total size of models kept in memory. Defaults to 1 GB.
+    """
+
+    def __init__(self, store_dir: str, memory_budget_bytes: int = 1024**3):
+        self.store_dir = store_dir
+        self.memory_budget_bytes = memory_budget_bytes
+
+        # model_uuid -> (model, size in bytes)
+        self._models = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_loads = 0
+
+    def put(
+        self, model, metadata: dict = None, training_data: pd.DataFrame = None
+    ) -> str:
+        """
+        Stores a trained model and returns its UUID.
+
+        Args:
+            model: The trained model (ex sklearn Pipeline).
+            metadata (dict, optional): Information describing the model (ex player, target, model type, training rows, accuracy). Defaults to None.
+            training_data (pd.DataFrame, optional): The data the model was trained on, kept for later updates. Defaults to None.
+
+        Returns:
+            str: The UUID of the stored model.
+        """
+
+        import joblib
+
+        model_uuid = str(uuid.uuid4())
+        os.makedirs(self.store_dir, exist_ok=True)
+
+        # Write to temporary files first so other workers never load a partially written model
+        model_path = self._path(model_uuid, "joblib")
+        joblib.dump(model, f"{model_path}.tmp")
+        os.replace(f"{model_path}.tmp", model_path)
+
+        if training_data is not None:
+            data_path = self._path(model_uuid, "parquet")
+            training_data.to_parquet(f"{data_path}.tmp", index=False)
+            os.replace(f"{data_path}.tmp", data_path)
+
+        size_bytes = os.path.getsize(model_path)
+        metadata = {
+            **(metadata or {}),
+            "model_uuid": model_uuid,
+            "size_bytes": size_bytes,
+            "has_training_data": training_data is not None,
+            "created_at": time.time(),
+        }
+
+        metadata_path = self._path(model_uuid, "json")
+        with open(f"{metadata_path}.tmp", "w") as f:
+            json.dump(metadata, f)
+        os.replace(f"{metadata_path}.tmp", metadata_path)
+
+        with self._lock:
+            self._add(model_uuid, model, size_bytes)
+
+        return model_uuid
+
+    def get(self, model_uuid: str):
+        """
+        Retrieves a stored model, loading it from disk if it is not in memory.
+
+        Args:
+            model_uuid (str): The UUID of the model.
+
+        Returns:
+            The trained model.
+
+        Raises:
+            ModelNotFoundError: If no model with the UUID exists.
+        """
+
+        with self._lock:
+            if model_uuid in self._models:
+                self._models.move_to_end(model_uuid)
+                self.memory_hits += 1
+                return self._models[model_uuid][0]
+
+        import joblib
+
+        model_path = self._path(model_uuid, "joblib")
+        if not _is_uuid(model_uuid) or not os.path.exists(model_path):
+            raise ModelNotFoundError(f"Model {model_uuid} not found.")
+
+        model = joblib.load(model_path, mmap_mode="r")
+
+        with self._lock:
+            self.disk_loads += 1
+            if model_uuid not in self._models:
+                self._add(model_uuid, model, os.path.getsize(model_path))
+
+        return model
+
+    def metadata(self, model_uuid: str) -> dict:
+        """
+        Retrieves the metadata of a stored model.
+
+        Args:
+            model_uuid (str): The UUID of the model.
+
+        Returns:
+            dict: The model metadata, including its size in bytes.
+
+        Raises:
+            ModelNotFoundError: If no model with the UUID exists.
+        """
+
+        metadata_path = self._path(model_uuid, "json")
+        if not _is_uuid(model_uuid) or not os.path.exists(metadata_path):
+            raise ModelNotFoundError(f"Model {model_uuid} not found.")
+
+        with open(metadata_path) as f:
+            return json.load(f)
+
+    def training_data(self, model_uuid: str) -> pd.DataFrame:
+        """
+        Retrieves the training data stored with a model.
+
+        Args:
+            model_uuid (str): The UUID of the model.
+
+        Returns:
+            pd.DataFrame: The data the model was trained on.
+
+        Raises:
+            ModelNotFoundError: If no model with the UUID exists, or it was stored without training data.
+        """
+
+        data_path = self._path(model_uuid, "parquet")
+        if not _is_uuid(model_uuid) or not os.path.exists(data_path):
+            raise ModelNotFoundError(f"Training data of model {model_uuid} not found.")
+
+        return pd.read_parquet(data_path)
+
+    def list_metadata(self) -> list[dict]:
+        """
+        Retrieves the metadata of all stored models, most recent first.
+
+        Returns:
+            list[dict]: The metadata of each model.
+        """
+
+        if not os.path.isdir(self.store_dir):
+            return []
+
+        metadata = []
+        for filename in os.listdir(self.store_dir):
+            if filename.endswith(".json"):
+                try:
+                    metadata.append(self.metadata(filename[: -len(".json")]))
+                except (ModelNotFoundError, json.JSONDecodeError):
+                    continue
+
+        return sorted(metadata, key=lambda m: m["created_at"], reverse=True)
+
+    def delete(self, model_uuid: str):
+        """
+        Removes a model (and its training data) from memory and disk.
+
+        Args:
+            model_uuid (str): The UUID of the model.
+        """
+
+        with self._lock:
+            self._remove(model_uuid)
+
+        if _is_uuid(model_uuid):
+            for extension in ["joblib", "json", "parquet"]:
+                path = self._path(model_uuid, extension)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def stats(self) -> dict:
+        """
+        Summarizes the models held in memory by this worker.
+
+        Returns:
+            dict: The number and size of models in memory, the memory budget, and the number of memory hits and disk loads.
+        """
+
+        with self._lock:
+            return {
+                "models_in_memory": len(self._models),
+                "memory_bytes": self._memory_bytes,
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "memory_hits": self.memory_hits,
+                "disk_loads": self.disk_loads,
+            }
+
+    def _path(self, model_uuid: str, extension: str) -> str:
+        return os.path.join(self.store_dir, f"{model_uuid}.{extension}")
+
+    def _add(self, model_uuid: str, model, size_bytes: int):
+        self._models[model_uuid] = (model, size_bytes)
+        self._memory_bytes += size_bytes
+
+        # Always keep the most recently used model, even if it alone exceeds the budget
+        while len(self._models) > 1 and self._memory_bytes > self.memory_budget_bytes:
+            self._remove(next(iter(self._models)))
+
+    def _remove(self, model_uuid: str):
+        entry = self._models.pop(model_uuid, None)
+        if entry is not None:
+            self._memory_bytes -= entry[1]
+
+
+def _is_uuid(value: str) -> bool:
+    # Model UUIDs become file names, so reject anything else (ex paths)
+    try:
+        return str(uuid.UUID(value)) == value
+    except (ValueError, TypeError, AttributeError):
+        return False
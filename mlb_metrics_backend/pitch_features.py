@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+
+from strike_zone import (
+    STRIKE_ZONE_BOTTOM,
+    STRIKE_ZONE_HALF_WIDTH,
+    STRIKE_ZONE_TOP,
+)
+
+# Statcast trajectories are parameterized at y=50 ft, and the front of home plate is at y=17/12 ft
+TRAJECTORY_Y = 50.0
+PLATE_Y = 17 / 12
+GRAVITY = 32.174
+
+# Columns the trajectory features are computed from (plate_x and plate_z are used when present)
+TRAJECTORY_COLUMNS = ["release_pos_x", "release_pos_y", "vx0", "vy0", "ax", "ay", "az"]
+PLATE_LOCATION_COLUMNS = ["plate_x", "plate_z"]
+
+
+def trajectory_features(X: pd.DataFrame) -> pd.DataFrame:
+    """
+    Computes pitch movement features from the Statcast trajectory columns, vectorized over every row:
+    - plate_time: the flight time from release to the front of home plate (seconds)
+    - horizontal_break and induced_vertical_break: the movement caused by spin over the flight, without gravity (feet)
+    - crossing_x: the horizontal plate location (plate_x when present, otherwise extrapolated from the trajectory)
+    - in_zone_x: whether the pitch crosses within the strike zone width (±STRIKE_ZONE_HALF_WIDTH)
+    - in_zone: whether the pitch crosses within the strike zone (only when plate_z is present)
+
+    Args:
+        X (pd.DataFrame): Feature dataset with the TRAJECTORY_COLUMNS (and optionally plate_x and plate_z).
+
+    Returns:
+        pd.DataFrame: The features, with the index of X.
+    """
+
+    release_pos_x, release_pos_y, vx0, vy0, ax, ay, az = (
+        X[column].to_numpy(dtype=float) for column in TRAJECTORY_COLUMNS
+    )
+
+    # Times the ball is at release and at the plate, relative to y=50 ft
+    release_time = _time_at(release_pos_y, vy0, ay)
+    plate_time = _time_at(PLATE_Y, vy0, ay)
+    flight_time = plate_time - release_time
+
+    # Movement from spin, from the constant accelerations over the flight
+    horizontal_break = 0.5 * ax * flight_time**2
+    induced_vertical_break = 0.5 * (az + GRAVITY) * flight_time**2
+
+    if "plate_x" in X:
+        crossing_x = X["plate_x"].to_numpy(dtype=float)
+    else:
+        # Horizontal position at y=50 ft, back-propagated from the release point
+        x50 = release_pos_x - vx0 * release_time - 0.5 * ax * release_time**2
+        crossing_x = x50 + vx0 * plate_time + 0.5 * ax * plate_time**2
+    in_zone_x = np.abs(crossing_x) <= STRIKE_ZONE_HALF_WIDTH
+
+    features = {
+        "plate_time": flight_time,
+        "horizontal_break": horizontal_break,
+        "induced_vertical_break": induced_vertical_break,
+        "crossing_x": crossing_x,
+        "in_zone_x": in_zone_x.astype(float),
+    }
+    if "plate_z" in X:
+        plate_z = X["plate_z"].to_numpy(dtype=float)
+        features["in_zone"] = (
+            in_zone_x & (plate_z >= STRIKE_ZONE_BOTTOM) & (plate_z <= STRIKE_ZONE_TOP)
+        ).astype(float)
+
+    return pd.DataFrame(features, index=X.index)
+
+
+def pitch_mix_features(
+    player_specific_metrics: pd.DataFrame,
+    window: int = 20,
+    pitch_types: list[str] = None,
+) -> pd.DataFrame:
+    """
+    Computes the rolling pitch mix before each pitch: the share of each pitch type among the previous pitches of the same game
+    (up to window pitches, the current pitch excluded), vectorized with cumulative counts instead of a rolling window per game.
+    For pitching metrics this is the pitcher's recent mix, for batting metrics the mix the batter has seen.
+
+    Args:
+        player_specific_metrics (pd.DataFrame): DataFrame containing player-specific metrics,
+            with the pitch_type, game_pk, at_bat_number and pitch_number columns.
+        window (int, optional): The number of previous pitches the mix is computed over. Defaults to 20.
+        pitch_types (list[str], optional): The pitch types to compute shares for. Defaults to None (every pitch type in the metrics).
+
+    Returns:
+        pd.DataFrame: One "mix_<pitch type>" column per pitch type (0 for the first pitch of a game), with the index of the metrics.
+    """
+
+    if pitch_types is None:
+        pitch_types = sorted(player_specific_metrics["pitch_type"].dropna().unique())
+
+    # Put the pitches in the order they were thrown
+    order = np.lexsort(
+        (
+            player_specific_metrics["pitch_number"].to_numpy(),
+            player_specific_metrics["at_bat_number"].to_numpy(),
+            player_specific_metrics["game_pk"].to_numpy(),
+        )
+    )
+    games = player_specific_metrics["game_pk"].to_numpy()[order]
+    thrown = player_specific_metrics["pitch_type"].to_numpy()[order]
+
+    # Counts of each pitch type before each pitch, with a leading row of zeros
+    is_type = thrown[:, np.newaxis] == np.array(pitch_types, dtype=object)
+    counts = np.vstack([np.zeros((1, len(pitch_types))), np.cumsum(is_type, axis=0)])
+
+    # The window starts at the first pitch of the game or window pitches earlier
+    positions = np.arange(len(order))
+    game_starts = np.r_[0, np.flatnonzero(games[1:] != games[:-1]) + 1]
+    game_start = game_starts[np.searchsorted(game_starts, positions, side="right") - 1]
+    window_start = np.maximum(game_start, positions - window)
+
+    window_counts = counts[positions] - counts[window_start]
+    window_sizes = (positions - window_start)[:, np.newaxis]
+    shares = np.divide(
+        window_counts,
+        window_sizes,
+        out=np.zeros_like(window_counts),
+        where=window_sizes > 0,
+    )
+
+    # Back to the order of the metrics
+    mix = np.empty_like(shares)
+    mix[order] = shares
+
+    return pd.DataFrame(
+        mix,
+        columns=[f"mix_{pitch_type}" for pitch_type in pitch_types],
+        index=player_specific_metrics.index,
+    )
+
+
+class TrajectoryFeatures(BaseEstimator, TransformerMixin):
+    """
+    Transformer computing trajectory_features, so the features are part of model pipelines
+    and predictions only need the raw Statcast columns.
+    """
+
+    def fit(self, X: pd.DataFrame, y=None):
+        self.feature_names_out_ = np.array(
+            trajectory_features(X.iloc[:0]).columns, dtype=object
+        )
+        return self
+
+    def transform(self, X: pd.DataFrame) -> np.ndarray:
+        return trajectory_features(X).to_numpy()
+
+    def get_feature_names_out(self, input_features=None) -> np.ndarray:
+        return self.feature_names_out_
+
+
+def _time_at(y: np.ndarray, vy0: np.ndarray, ay: np.ndarray) -> np.ndarray:
+    # Time (relative to y=50 ft) at which the ball reaches y, from y(t) = 50 + vy0 t + ay t^2 / 2,
+    # in a form that stays finite when ay is 0
+    distance = y - TRAJECTORY_Y
+    return -2 * distance / (np.sqrt(vy0**2 + 2 * ay * distance) - vy0)
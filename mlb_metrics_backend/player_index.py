@@ -0,0 +1,276 @@
+import argparse
+import bisect
+import os
+import threading
+import unicodedata
+from collections import defaultdict
+
+import pandas as pd
+
+from upstream import Upstream
+
+# Local register snapshot used to build the index without downloading the register
+DEFAULT_SNAPSHOT_PATH = os.environ.get(
+    "MLB_METRICS_PLAYER_REGISTER",
+    os.path.join(os.path.expanduser("~"), ".mlb_metrics_cache", "chadwick_register.csv"),
+)
+
+REGISTER_COLUMNS = [
+    "name_last",
+    "name_first",
+    "key_mlbam",
+    "mlb_played_first",
+    "mlb_played_last",
+]
+
+
+def normalized_name(name: str) -> str:
+    """
+    Normalizes a name for lookups by removing accents, lowercasing, and collapsing whitespace.
+
+    Args:
+        name (str): The name to normalize.
+
+    Returns:
+        str: The normalized name.
+    """
+
+    if not isinstance(name, str):
+        return ""
+
+    decomposed = unicodedata.normalize("NFKD", name)
+    without_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(without_accents.lower().split())
+
+
+def name_trigrams(name: str) -> set[str]:
+    """
+    Splits a normalized name into the set of 3-character substrings used for fuzzy matching.
+
+    Args:
+        name (str): The normalized name.
+
+    Returns:
+        set[str]: The trigrams of the name, padded so short names still have trigrams.
+    """
+
+    padded = f"  {name} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class PlayerIndex:
+    """
+    In-process index of the Chadwick register for player ID lookups and player search.
+    Built once from a local snapshot file if it exists, otherwise from pybaseball's chadwick_register.
+
+    Holds a hash map of normalized (last name, first name) to players for exact lookups,
+    sorted name lists for prefix (typeahead) search, and a trigram index for fuzzy search.
+
+    Args:
+        snapshot_path (str): The path of the local register snapshot (CSV).
+        upstream (Upstream, optional): The upstream access layer the register is downloaded through. Defaults to None (direct download).
+    """
+
+    def __init__(self, snapshot_path: str, upstream: Upstream = None):
+        self.snapshot_path = snapshot_path
+        self.upstream = upstream
+
+        self._players = None
+        self._lock = threading.Lock()
+
+    def player_ids(self, last_name: str, first_name: str) -> list[int]:
+        """
+        Finds the IDs of all players with the given name, in register order (like pybaseball's playerid_lookup).
+
+        Args:
+            last_name (str): The last name of the player.
+            first_name (str): The first name of the player.
+
+        Returns:
+            list[int]: The IDs of the matching players.
+        """
+
+        self._ensure_built()
+        key = (normalized_name(last_name), normalized_name(first_name))
+        return [self._players[i]["player_id"] for i in self._exact.get(key, [])]
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """
+        Searches for players by full or partial name, ranking exact matches first, then prefix matches, then fuzzy matches.
+        Ties are ranked by the most recent season played.
+
+        Args:
+            query (str): The search text (ex "kersh", "clayton kershaw", "kershaw clayton").
+            limit (int, optional): The maximum number of candidates to return. Defaults to 10.
+
+        Returns:
+            list[dict]: The candidate players with their ID, name, first and last season played, and match score.
+        """
+
+        self._ensure_built()
+        query = normalized_name(query)
+        if not query:
+            return []
+
+        scores = {}
+
+        # Exact and prefix matches on "first last" and "last first"
+        for names in (self._full_names, self._reversed_names):
+            position = bisect.bisect_left(names, (query,))
+            while position < len(names) and names[position][0].startswith(query):
+                name, i = names[position]
+                scores[i] = max(scores.get(i, 0.0), 1.0 if name == query else 0.9)
+                position += 1
+
+        # Fuzzy matches using trigram similarity
+        if len(scores) < limit:
+            query_trigrams = name_trigrams(query)
+            shared = defaultdict(int)
+            for trigram in query_trigrams:
+                for i in self._trigrams.get(trigram, ()):
+                    shared[i] += 1
+
+            for i, count in shared.items():
+                similarity = (
+                    2 * count / (len(query_trigrams) + self._players[i]["num_trigrams"])
+                )
+                if similarity >= 0.3:
+                    scores[i] = max(scores.get(i, 0.0), 0.8 * similarity)
+
+        ranked = sorted(
+            scores.items(),
+            key=lambda item: (item[1], self._players[item[0]]["mlb_played_last"]),
+            reverse=True,
+        )
+
+        return [
+            {
+                "player_id": self._players[i]["player_id"],
+                "name_first": self._players[i]["name_first"],
+                "name_last": self._players[i]["name_last"],
+                "mlb_played_first": self._players[i]["mlb_played_first"],
+                "mlb_played_last": self._players[i]["mlb_played_last"],
+                "score": round(score, 3),
+            }
+            for i, score in ranked[:limit]
+        ]
+
+    def refresh(self, save: bool = True):
+        """
+        Rebuilds the index from a freshly downloaded Chadwick register.
+
+        Args:
+            save (bool, optional): Whether to overwrite the local snapshot with the downloaded register. Defaults to True.
+        """
+
+        register = downloaded_register(self.upstream)[REGISTER_COLUMNS]
+
+        if save:
+            os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+            register.to_csv(f"{self.snapshot_path}.tmp", index=False)
+            os.replace(f"{self.snapshot_path}.tmp", self.snapshot_path)
+
+        with self._lock:
+            self._build(register)
+
+    def _ensure_built(self):
+        if self._players is not None:
+            return
+
+        with self._lock:
+            if self._players is not None:
+                return
+
+            if os.path.exists(self.snapshot_path):
+                register = pd.read_csv(self.snapshot_path)
+            else:
+                register = downloaded_register(self.upstream)
+
+            self._build(register[REGISTER_COLUMNS])
+
+    def _build(self, register: pd.DataFrame):
+        players = []
+        exact = defaultdict(list)
+        full_names = []
+        reversed_names = []
+        trigrams = defaultdict(list)
+
+        for row in register.itertuples(index=False):
+            i = len(players)
+            player_id = -1 if pd.isna(row.key_mlbam) else int(row.key_mlbam)
+            last = normalized_name(row.name_last)
+            first = normalized_name(row.name_first)
+
+            exact[(last, first)].append(i)
+
+            # Only players with an MLB ID can be returned by search
+            if player_id == -1:
+                players.append({"player_id": player_id})
+                continue
+
+            full_name = f"{first} {last}".strip()
+            full_names.append((full_name, i))
+            reversed_names.append((f"{last} {first}".strip(), i))
+
+            full_trigrams = name_trigrams(full_name)
+            for trigram in full_trigrams:
+                trigrams[trigram].append(i)
+
+            players.append(
+                {
+                    "player_id": player_id,
+                    "name_first": row.name_first if isinstance(row.name_first, str) else "",
+                    "name_last": row.name_last if isinstance(row.name_last, str) else "",
+                    "mlb_played_first": _season(row.mlb_played_first),
+                    "mlb_played_last": _season(row.mlb_played_last),
+                    "num_trigrams": len(full_trigrams),
+                }
+            )
+
+        full_names.sort()
+        reversed_names.sort()
+
+        self._exact = dict(exact)
+        self._full_names = full_names
+        self._reversed_names = reversed_names
+        self._trigrams = dict(trigrams)
+        self._players = players
+
+
+def downloaded_register(upstream: Upstream = None) -> pd.DataFrame:
+    """
+    Downloads the Chadwick register of players.
+    Uses pybaseball's chadwick_register function, through the upstream access layer if one is given.
+
+    Args:
+        upstream (Upstream, optional): The upstream access layer. Defaults to None (direct download).
+
+    Returns:
+        pd.DataFrame: The register, one row per player.
+    """
+
+    import pybaseball as pb
+
+    if upstream is None:
+        return pb.chadwick_register()
+
+    return upstream.call(("chadwick_register",), pb.chadwick_register)
+
+
+def _season(value) -> int:
+    return -1 if pd.isna(value) else int(value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the local player ID index.")
+    parser.add_argument("command", choices=["refresh"])
+    parser.add_argument(
+        "--snapshot-path",
+        default=DEFAULT_SNAPSHOT_PATH,
+        help="The path of the local register snapshot.",
+    )
+    args = parser.parse_args()
+
+    index = PlayerIndex(args.snapshot_path)
+    index.refresh(save=True)
+    print(f"Saved player register snapshot to {args.snapshot_path}")
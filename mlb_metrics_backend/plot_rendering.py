@@ -0,0 +1,223 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# matplotlib and Pillow are imported on first render, so importing this module stays fast
+
+# Mimetype of each image format plots can be rendered in
+RENDER_MIMETYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "webp": "image/webp",
+}
+
+
+def render_key(*parts) -> str:
+    """
+    Hashes the inputs and options of a plot into a render cache key.
+    DataFrames are hashed by content, other parts by their representation.
+
+    Args:
+        *parts: The DataFrames and options the plot depends on.
+
+    Returns:
+        str: The hex digest identifying the rendered plot.
+    """
+
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, pd.DataFrame):
+            digest.update(repr(list(part.columns)).encode())
+            digest.update(
+                pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes()
+            )
+        else:
+            digest.update(repr(part).encode())
+
+    return digest.hexdigest()
+
+
+def figure_bytes(fig, image_format: str = "png", **savefig_kwargs) -> bytes:
+    """
+    Renders a figure to image bytes and closes it, so figures created with pyplot are not kept in memory.
+
+    Args:
+        fig (matplotlib.figure.Figure): The figure to render.
+        image_format (str, optional): The image format ("png", "svg" or "webp"). Defaults to "png".
+        **savefig_kwargs: Extra arguments of savefig (ex bbox_inches="tight").
+
+    Returns:
+        bytes: The rendered image.
+    """
+
+    import matplotlib.pyplot as plt
+
+    try:
+        return _saved(fig, image_format, **savefig_kwargs)
+    finally:
+        plt.close(fig)
+
+
+# One reusable figure per thread for the probability bar chart fast path
+_bar_figures = threading.local()
+
+
+def prediction_probas_bar_bytes(
+    prediction_probas: list, class_labels: list, image_format: str = "png"
+) -> bytes:
+    """
+    Renders a bar plot of prediction probabilities directly with the Agg backend.
+    Draws the same chart as plot_prediction_probas without seaborn or pyplot, with fixed margins instead of a tight bounding box.
+    Each thread reuses one figure, and only updates the bar heights when the class labels are the same as the previous chart.
+
+    Args:
+        prediction_probas (list): List of prediction probabilities.
+        class_labels (list): List of class labels corresponding to the probabilities.
+        image_format (str, optional): The image format ("png", "svg" or "webp"). Defaults to "png".
+
+    Returns:
+        bytes: The rendered image.
+    """
+
+    from matplotlib import colormaps
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    # Colors of the bars, matching seaborn's "tab10" palette
+    tab10_colors = colormaps["tab10"].colors
+    labels = [str(label) for label in class_labels]
+
+    if getattr(_bar_figures, "labels", None) != labels:
+        fig = getattr(_bar_figures, "figure", None)
+        if fig is None:
+            fig = Figure(figsize=(8, 6))
+            FigureCanvasAgg(fig)
+            fig.subplots_adjust(left=0.1, right=0.97, bottom=0.1, top=0.93)
+            _bar_figures.figure = fig
+        fig.clear()
+
+        ax = fig.add_subplot()
+        positions = range(len(labels))
+        _bar_figures.bars = ax.bar(
+            positions,
+            prediction_probas,
+            color=[tab10_colors[i % len(tab10_colors)] for i in positions],
+        )
+
+        # Customize the plot
+        ax.set_xticks(list(positions))
+        ax.set_xticklabels(labels)
+        ax.set_xlabel("Class")
+        ax.set_ylabel("Probability")
+        ax.set_title("Model Prediction Probabilities")
+        _bar_figures.labels = labels
+    else:
+        # Same classes as the previous chart, only the bar heights change
+        for bar, proba in zip(_bar_figures.bars, prediction_probas):
+            bar.set_height(proba)
+        ax = _bar_figures.bars[0].axes if labels else _bar_figures.figure.axes[0]
+        ax.relim()
+        ax.autoscale_view()
+
+    return _saved(_bar_figures.figure, image_format)
+
+
+class RenderCache:
+    """
+    Bounded cache of rendered plot images, keyed by a content hash of the plot inputs and options (see render_key).
+    Evicts the least recently used images once their total size exceeds the byte budget.
+
+    Args:
+        max_bytes (int, optional): The maximum total size of cached images. Defaults to 64 MB.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024**2):
+        self.max_bytes = max_bytes
+
+        self._images = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> bytes:
+        """
+        Retrieves a cached image.
+
+        Args:
+            key (str): The render key.
+
+        Returns:
+            bytes or None: The rendered image, or None if it is not cached.
+        """
+
+        with self._lock:
+            if key not in self._images:
+                self.misses += 1
+                return None
+
+            self._images.move_to_end(key)
+            self.hits += 1
+            return self._images[key]
+
+    def put(self, key: str, image: bytes):
+        """
+        Caches a rendered image. Images larger than the whole budget are not cached.
+
+        Args:
+            key (str): The render key.
+            image (bytes): The rendered image.
+        """
+
+        if len(image) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._images:
+                self._bytes -= len(self._images.pop(key))
+
+            self._images[key] = image
+            self._bytes += len(image)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def stats(self) -> dict:
+        """
+        Summarizes the cache usage since the process started.
+
+        Returns:
+            dict: The number and total size of cached images, the byte budget, and the number of hits and misses.
+        """
+
+        with self._lock:
+            return {
+                "cached_images": len(self._images),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def _saved(fig, image_format: str, **savefig_kwargs) -> bytes:
+    buf = io.BytesIO()
+    # Render WebP from PNG with Pillow, which works with every matplotlib version
+    fig.savefig(
+        buf,
+        format="png" if image_format == "webp" else image_format,
+        **savefig_kwargs,
+    )
+
+    if image_format == "webp":
+        from PIL import Image
+
+        webp_buf = io.BytesIO()
+        Image.open(buf).save(webp_buf, format="WEBP")
+        return webp_buf.getvalue()
+
+    return buf.getvalue()
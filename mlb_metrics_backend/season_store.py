@@ -0,0 +1,493 @@
+import argparse
+import datetime
+import functools
+import json
+import os
+import shutil
+import threading
+from typing import Callable, Iterator, Literal
+
+import numpy as np
+import pandas as pd
+
+from model_data import model_data_spec, prepared_model_data
+from statcast_cache import (
+    PITCH_IDENTITY_COLUMNS,
+    added_range,
+    date_range_metrics,
+    missing_ranges,
+)
+from upstream import Upstream
+
+# Column identifying the player of each metric type in league-wide Statcast data
+PLAYER_COLUMNS = {"pitching": "pitcher", "batting": "batter"}
+
+# Rows written to a season file at a time when sorting a season by player
+WRITE_BATCH_ROWS = 65_536
+
+
+class SeasonStore:
+    """
+    Local store of league-wide Statcast seasons, for analysis across players without fetching each one.
+    Each season is stored once per metric type as an uncompressed Arrow IPC (Feather v2) file sorted by player,
+    alongside a JSON index of the row range of each player and the date range the season covers.
+    Files are memory-mapped, so a player's rows are a zero-copy slice of the season and only the pages read are loaded.
+
+    Args:
+        store_dir (str): The directory to store seasons in.
+        upstream (Upstream, optional): The upstream access layer seasons are fetched through by default. Defaults to None (direct fetch).
+    """
+
+    def __init__(self, store_dir: str, upstream: Upstream = None):
+        self.store_dir = store_dir
+        self.upstream = upstream
+
+        self.reads = 0
+
+        # (metric type, season) -> (memory-mapped table, season index)
+        self._seasons = {}
+        self._lock = threading.Lock()
+
+    def load_season(
+        self,
+        season: int,
+        fetch: Callable[[str, str], pd.DataFrame] = None,
+        window_days: int = 7,
+    ) -> dict:
+        """
+        Bulk-loads the Statcast data of a whole season into the store, replacing any previous load.
+        The season is fetched a window at a time, and each window is written to a staging file on disk,
+        so the season never has to fit in memory as a DataFrame. The staged windows are then sorted by player
+        (most recent pitch first, like pybaseball) into one file per metric type.
+
+        Args:
+            season (int): The season to load.
+            fetch (Callable, optional): Function called as fetch(start_dt, end_dt) to retrieve all pitches within a date range.
+                Defaults to None (pybaseball's statcast, through the upstream access layer of the store).
+            window_days (int, optional): The number of days fetched at a time. Defaults to 7.
+
+        Returns:
+            dict: The number of rows and players stored for each metric type.
+        """
+
+        import pyarrow as pa
+
+        if fetch is None:
+            fetch = functools.partial(statcast_range_metrics, upstream=self.upstream)
+
+        # Games from today onwards may still be in progress, so the current season is only covered up to yesterday
+        start = datetime.date(season, 1, 1)
+        end = min(
+            datetime.date(season, 12, 31),
+            datetime.date.today() - datetime.timedelta(days=1),
+        )
+        if end < start:
+            raise ValueError(f"Season {season} has not started yet.")
+
+        staging_dir = os.path.join(self.store_dir, "staging", str(season))
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+
+        try:
+            # Stage each window of pitches as its own Arrow file
+            window_start = start
+            while window_start <= end:
+                window_end = min(
+                    window_start + datetime.timedelta(days=window_days - 1), end
+                )
+                metrics = fetch(window_start.isoformat(), window_end.isoformat())
+                if metrics is not None and not metrics.empty:
+                    _write_table(
+                        os.path.join(staging_dir, f"{window_start.isoformat()}.arrow"),
+                        pa.Table.from_pandas(metrics, preserve_index=False),
+                    )
+                window_start = window_end + datetime.timedelta(days=1)
+
+            staged = [
+                _mapped_table(os.path.join(staging_dir, file_name))
+                for file_name in sorted(os.listdir(staging_dir))
+            ]
+            if staged:
+                season_table = pa.concat_tables(staged, promote_options="permissive")
+            else:
+                # No games yet, the season is still covered (with no rows)
+                season_table = pa.table(
+                    {
+                        column: pa.array([], pa.int64())
+                        for column in PLAYER_COLUMNS.values()
+                    }
+                )
+
+            summary = {}
+            for metric_type in PLAYER_COLUMNS:
+                summary[metric_type] = self._write_season(
+                    season, metric_type, season_table, (start, end)
+                )
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+        return summary
+
+    def seasons(self, metric_type: Literal["pitching", "batting"]) -> list[int]:
+        """
+        Lists the seasons loaded in the store.
+
+        Args:
+            metric_type (Literal["pitching", "batting"]): The type of metrics (either "pitching" or "batting").
+
+        Returns:
+            list[int]: The loaded seasons, in order.
+        """
+
+        metric_dir = os.path.join(self.store_dir, metric_type)
+        if not os.path.isdir(metric_dir):
+            return []
+
+        return sorted(
+            int(file_name[: -len(".json")])
+            for file_name in os.listdir(metric_dir)
+            if file_name.endswith(".json")
+        )
+
+    def covers(
+        self, metric_type: Literal["pitching", "batting"], start_dt: str, end_dt: str
+    ) -> bool:
+        """
+        Checks whether every day of a date range is covered by the loaded seasons.
+
+        Args:
+            metric_type (Literal["pitching", "batting"]): The type of metrics (either "pitching" or "batting").
+            start_dt (str): The start date in the format "YYYY-MM-DD".
+            end_dt (str): The end date in the format "YYYY-MM-DD".
+
+        Returns:
+            bool: Whether the player metrics within the date range can be read from the store.
+        """
+
+        start = datetime.date.fromisoformat(start_dt)
+        end = datetime.date.fromisoformat(end_dt)
+
+        coverage = []
+        for season in range(start.year, end.year + 1):
+            try:
+                index = self._season(metric_type, season)[1]
+            except FileNotFoundError:
+                return False
+            season_start, season_end = index["coverage"]
+            coverage = added_range(
+                coverage,
+                datetime.date.fromisoformat(season_start),
+                datetime.date.fromisoformat(season_end),
+            )
+
+        return not missing_ranges(coverage, start, end)
+
+    def player_table(
+        self,
+        player_id: int,
+        metric_type: Literal["pitching", "batting"],
+        season: int,
+        columns: list[str] = None,
+    ):
+        """
+        Reads a player's rows of a season as a zero-copy slice of the memory-mapped season file.
+
+        Args:
+            player_id (int): The ID of the player.
+            metric_type (Literal["pitching", "batting"]): The type of metrics (either "pitching" or "batting").
+            season (int): The season to read.
+            columns (list[str], optional): The columns to read (missing columns are skipped). Defaults to None (every column).
+
+        Returns:
+            pyarrow.Table: The player's rows of the season, most recent pitch first.
+        """
+
+        table, index = self._season(metric_type, season)
+        start, stop = index["players"].get(str(player_id), (0, 0))
+
+        player_rows = table.slice(start, stop - start)
+        if columns is not None:
+            player_rows = player_rows.select(
+                [column for column in columns if column in table.column_names]
+            )
+
+        return player_rows
+
+    def player_metrics(
+        self,
+        player_id: int,
+        metric_type: Literal["pitching", "batting"],
+        start_dt: str,
+        end_dt: str,
+        columns: list[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Reads the specific metrics of a player within a date range from the loaded seasons,
+        in the same format as player_specific_metrics. Only the player's rows are converted to pandas.
+
+        Args:
+            player_id (int): The ID of the player.
+            metric_type (Literal["pitching", "batting"]): The type of metrics (either "pitching" or "batting").
+            start_dt (str): The start date in the format "YYYY-MM-DD".
+            end_dt (str): The end date in the format "YYYY-MM-DD".
+            columns (list[str], optional): The columns to read. Defaults to None (every column).
+
+        Returns:
+            pd.DataFrame: The specific metrics of the player within the date range, most recent pitch first.
+        """
+
+        import pyarrow as pa
+
+        start = datetime.date.fromisoformat(start_dt)
+        end = datetime.date.fromisoformat(end_dt)
+
+        # game_date is needed to select the date range
+        read_columns = (
+            None if columns is None else list(dict.fromkeys(["game_date"] + columns))
+        )
+        tables = [
+            self.player_table(player_id, metric_type, season, read_columns)
+            for season in range(end.year, start.year - 1, -1)
+        ]
+        with self._lock:
+            self.reads += 1
+
+        tables = [table for table in tables if table.num_rows]
+        if not tables:
+            return pd.DataFrame()
+
+        metrics = date_range_metrics(
+            pa.concat_tables(tables, promote_options="permissive").to_pandas(),
+            start,
+            end,
+        )
+        return metrics if columns is None else metrics[
+            [column for column in columns if column in metrics.columns]
+        ]
+
+    def model_data(
+        self,
+        metric_type: Literal["pitching", "batting"],
+        seasons: list[int],
+        pitch_types: list[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Prepares league-wide model data, pooling the rows of every player of the loaded seasons
+        (ex batter model data of all hitters facing sliders). Only the model data columns are read from the season files,
+        and the pitch types are filtered before converting to pandas.
+
+        Args:
+            metric_type (Literal["pitching", "batting"]): The type of metrics (either "pitching" or "batting").
+            seasons (list[int]): The seasons to pool.
+            pitch_types (list[str], optional): The pitch types to keep. Defaults to None (every pitch type).
+
+        Returns:
+            pd.DataFrame: The pooled model data, in the format of model_data.prepared_model_data.
+        """
+
+        frames = list(self.model_data_chunks(metric_type, seasons, pitch_types))
+        if not frames:
+            return pd.DataFrame(columns=model_data_spec(metric_type).columns)
+
+        return pd.concat(frames, ignore_index=True)
+
+    def model_data_chunks(
+        self,
+        metric_type: Literal["pitching", "batting"],
+        seasons: list[int],
+        pitch_types: list[str] = None,
+        chunk_rows: int = 65_536,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Prepares league-wide model data a chunk of season rows at a time, for training on more rows than fit in memory
+        (see streaming_training.streamed_model). The same seasons always give the same chunks.
+
+        Args:
+            metric_type (Literal["pitching", "batting"]): The type of metrics (either "pitching" or "batting").
+            seasons (list[int]): The seasons to pool.
+            pitch_types (list[str], optional): The pitch types to keep. Defaults to None (every pitch type).
+            chunk_rows (int, optional): The number of season rows prepared at a time. Defaults to 65,536.
+
+        Yields:
+            pd.DataFrame: The model data of each chunk (chunks without model data rows are skipped).
+        """
+
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        spec = model_data_spec(metric_type)
+
+        for season in seasons:
+            table = self._season(metric_type, season)[0].select(spec.columns)
+            for batch in table.to_batches(max_chunksize=chunk_rows):
+                if pitch_types is not None:
+                    batch = batch.filter(
+                        pc.is_in(batch["pitch_type"], value_set=pa.array(pitch_types))
+                    )
+                chunk = prepared_model_data(batch.to_pandas(), metric_type)
+                if not chunk.empty:
+                    yield chunk
+
+    def stats(self) -> dict:
+        """
+        Summarizes the store contents.
+
+        Returns:
+            dict: The loaded seasons with their rows and players for each metric type,
+                the number of player reads since the process started, and the store size on disk in bytes.
+        """
+
+        size_bytes = 0
+        for root, _, files in os.walk(self.store_dir):
+            size_bytes += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+
+        seasons = {}
+        for metric_type in PLAYER_COLUMNS:
+            seasons[metric_type] = {}
+            for season in self.seasons(metric_type):
+                index = self._season(metric_type, season)[1]
+                seasons[metric_type][season] = {
+                    "rows": index["rows"],
+                    "players": len(index["players"]),
+                    "coverage": index["coverage"],
+                }
+
+        with self._lock:
+            reads = self.reads
+
+        return {"seasons": seasons, "reads": reads, "size_bytes": size_bytes}
+
+    def _path(self, metric_type: str, season: int, extension: str) -> str:
+        return os.path.join(self.store_dir, metric_type, f"{season}.{extension}")
+
+    def _season(self, metric_type: str, season: int) -> tuple:
+        with self._lock:
+            if (metric_type, season) not in self._seasons:
+                with open(self._path(metric_type, season, "json")) as f:
+                    index = json.load(f)
+                self._seasons[(metric_type, season)] = (
+                    _mapped_table(self._path(metric_type, season, "arrow")),
+                    index,
+                )
+
+            return self._seasons[(metric_type, season)]
+
+    def _write_season(
+        self, season: int, metric_type: str, season_table, coverage: tuple
+    ) -> dict:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        player_column = PLAYER_COLUMNS[metric_type]
+
+        # Order by player, then most recent pitch first like pybaseball
+        sort_keys = [(player_column, "ascending")] + [
+            (column, "descending")
+            for column in ["game_date"] + PITCH_IDENTITY_COLUMNS
+            if column in season_table.column_names
+        ]
+        order = pc.sort_indices(season_table, sort_keys=sort_keys)
+
+        # Pitches without a player (nulls are sorted last) cannot be looked up, so they are left out of the order,
+        # and the player IDs are integers (nulls would have made them floats, ex "605400.0")
+        order = order[: len(order) - season_table[player_column].null_count]
+
+        # Row range of each player in the sorted rows
+        players = (
+            pc.take(season_table[player_column], order).cast(pa.int64()).to_numpy()
+        )
+        starts = np.r_[0, np.flatnonzero(players[1:] != players[:-1]) + 1]
+        stops = np.r_[starts[1:], len(players)]
+        index = {
+            "rows": len(players),
+            "coverage": [coverage[0].isoformat(), coverage[1].isoformat()],
+            "players": {
+                str(players[s]): [int(s), int(e)] for s, e in zip(starts, stops)
+            },
+        }
+
+        # Write the sorted rows a batch at a time, so only one batch is copied in memory
+        path = self._path(metric_type, season, "arrow")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with pa.OSFile(f"{path}.tmp", "wb") as sink:
+            with pa.ipc.new_file(sink, season_table.schema) as writer:
+                for batch_start in range(0, len(players), WRITE_BATCH_ROWS):
+                    batch_order = order[batch_start : batch_start + WRITE_BATCH_ROWS]
+                    writer.write_table(season_table.take(batch_order))
+
+        # Replace the season and its index, so readers never see a partially written file
+        with self._lock:
+            os.replace(f"{path}.tmp", path)
+            index_path = self._path(metric_type, season, "json")
+            with open(f"{index_path}.tmp", "w") as f:
+                json.dump(index, f)
+            os.replace(f"{index_path}.tmp", index_path)
+            self._seasons.pop((metric_type, season), None)
+
+        return {"rows": index["rows"], "players": len(index["players"])}
+
+
+def statcast_range_metrics(
+    start_dt: str, end_dt: str, upstream: Upstream = None
+) -> pd.DataFrame:
+    """
+    Fetches every pitch within a date range from Statcast.
+    Uses pybaseball's statcast function, through the upstream access layer if one is given.
+
+    Args:
+        start_dt (str): The start date in the format "YYYY-MM-DD".
+        end_dt (str): The end date in the format "YYYY-MM-DD".
+        upstream (Upstream, optional): The upstream access layer. Defaults to None (direct fetch).
+
+    Returns:
+        pd.DataFrame: A DataFrame containing the pitches of every player within the date range.
+    """
+
+    import pybaseball as pb
+
+    if upstream is None:
+        return pb.statcast(start_dt=start_dt, end_dt=end_dt, verbose=False)
+
+    return upstream.call(
+        ("statcast", start_dt, end_dt),
+        pb.statcast,
+        start_dt=start_dt,
+        end_dt=end_dt,
+        verbose=False,
+    )
+
+
+def _write_table(path: str, table):
+    import pyarrow as pa
+
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _mapped_table(path: str):
+    # Uncompressed IPC files are read without copying, the buffers point into the memory map
+    import pyarrow as pa
+
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Bulk-load league-wide Statcast seasons into the season store."
+    )
+    parser.add_argument("seasons", type=int, nargs="+")
+    parser.add_argument(
+        "--store-dir",
+        default=os.environ.get(
+            "MLB_METRICS_SEASON_STORE_DIR",
+            os.path.join(os.path.expanduser("~"), ".mlb_metrics_cache", "seasons"),
+        ),
+    )
+    parser.add_argument("--window-days", type=int, default=7)
+    args = parser.parse_args()
+
+    # Bulk loads send many requests, so keep them under the default rate limit
+    store = SeasonStore(args.store_dir, upstream=Upstream())
+    for season in args.seasons:
+        print(season, store.load_season(season, window_days=args.window_days))
@@ -0,0 +1,195 @@
+import io
+import json
+from typing import Iterator, Literal
+
+import pandas as pd
+
+# Response formats for DataFrames and their MIME types
+FORMAT_MIMETYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Number of rows serialized per chunk when streaming NDJSON
+NDJSON_CHUNK_ROWS = 5000
+
+
+class NegotiationError(ValueError):
+    """
+    Raised when the requested format, Accept header or columns of a response are invalid.
+    """
+
+
+class NotAcceptableError(NegotiationError):
+    """
+    Raised when the Accept header of a request does not accept any supported format.
+    """
+
+
+def negotiated_format(
+    format_param: str = None, accept_header: str = None
+) -> Literal["json", "ndjson", "arrow", "parquet"]:
+    """
+    Chooses the response format from an explicit format parameter or the Accept header of a request.
+    Defaults to JSON, so existing clients are unaffected.
+
+    Args:
+        format_param (str, optional): The requested format name (ex "arrow"). Defaults to None.
+        accept_header (str, optional): The Accept header of the request. Defaults to None.
+
+    Returns:
+        Literal["json", "ndjson", "arrow", "parquet"]: The response format.
+
+    Raises:
+        NegotiationError: If the format parameter is not a supported format, or the Accept header is malformed.
+        NotAcceptableError: If the Accept header does not accept any supported format (nor */* or application/*).
+    """
+
+    if format_param:
+        if format_param not in FORMAT_MIMETYPES:
+            raise NegotiationError(
+                f"Invalid format. Must be one of {list(FORMAT_MIMETYPES.keys())}."
+            )
+        return format_param
+
+    if accept_header:
+        # Use the first supported MIME type in order of the client's preference
+        accepted = []
+        for i, part in enumerate(accept_header.split(",")):
+            mimetype, *params = [p.strip() for p in part.split(";")]
+            quality = 1.0
+            for param in params:
+                if param.startswith("q="):
+                    try:
+                        quality = float(param[2:])
+                    except ValueError:
+                        raise NegotiationError(f"Invalid Accept quality: '{param}'.")
+            # A quality of 0 means the MIME type is not acceptable
+            if mimetype and quality > 0:
+                accepted.append((-quality, i, mimetype))
+
+        for _, _, mimetype in sorted(accepted):
+            if mimetype in ["*/*", "application/*"]:
+                return "json"
+            for name, format_mimetype in FORMAT_MIMETYPES.items():
+                if mimetype == format_mimetype:
+                    return name
+
+        raise NotAcceptableError(
+            f"None of the accepted types are supported. Must be one of {list(FORMAT_MIMETYPES.values())}."
+        )
+
+    return "json"
+
+
+def projected_columns(df: pd.DataFrame, columns_param: str = None) -> pd.DataFrame:
+    """
+    Selects a subset of columns from a DataFrame.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to project.
+        columns_param (str, optional): Comma-separated column names (ex "pitch_name,plate_x,plate_z"). Defaults to None (all columns).
+
+    Returns:
+        pd.DataFrame: The DataFrame with only the requested columns.
+
+    Raises:
+        NegotiationError: If any requested column does not exist.
+    """
+
+    if not columns_param:
+        return df
+
+    columns = [c.strip() for c in columns_param.split(",") if c.strip()]
+    unknown = [c for c in columns if c not in df.columns]
+    if unknown:
+        raise NegotiationError(f"Unknown columns: {unknown}")
+
+    return df[columns]
+
+
+def serialized_frame(
+    df: pd.DataFrame, response_format: Literal["json", "ndjson", "arrow", "parquet"]
+) -> bytes:
+    """
+    Serializes a DataFrame in a single piece.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to serialize.
+        response_format (Literal["json", "ndjson", "arrow", "parquet"]): The serialization format.
+
+    Returns:
+        bytes: The serialized DataFrame.
+    """
+
+    if response_format == "json":
+        return df.to_json(orient="records", date_format="iso").encode()
+    elif response_format == "ndjson":
+        return b"".join(ndjson_chunks(df))
+    elif response_format == "arrow":
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue()
+    elif response_format == "parquet":
+        buf = io.BytesIO()
+        df.to_parquet(buf, index=False)
+        return buf.getvalue()
+    else:
+        raise ValueError(
+            f"Invalid format. Must be one of {list(FORMAT_MIMETYPES.keys())}."
+        )
+
+
+def ndjson_chunks(df: pd.DataFrame, chunk_rows: int = NDJSON_CHUNK_ROWS) -> Iterator[bytes]:
+    """
+    Serializes a DataFrame as newline-delimited JSON, one chunk of rows at a time, so it can be streamed.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to serialize.
+        chunk_rows (int, optional): The number of rows per chunk. Defaults to NDJSON_CHUNK_ROWS.
+
+    Yields:
+        bytes: NDJSON lines for each chunk of rows.
+    """
+
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start : start + chunk_rows]
+        lines = chunk.to_json(orient="records", lines=True, date_format="iso")
+        yield (lines if lines.endswith("\n") else lines + "\n").encode()
+
+
+def deserialized_frame(body: bytes, content_type: str) -> pd.DataFrame:
+    """
+    Builds a DataFrame from a request body in JSON (records or columns), NDJSON or Arrow IPC format.
+
+    Args:
+        body (bytes): The request body.
+        content_type (str): The Content-Type header of the request.
+
+    Returns:
+        pd.DataFrame: The DataFrame sent in the request.
+
+    Raises:
+        ValueError: If the content type is not supported.
+    """
+
+    mimetype = (content_type or FORMAT_MIMETYPES["json"]).split(";")[0].strip()
+
+    if mimetype == FORMAT_MIMETYPES["json"]:
+        return pd.DataFrame(json.loads(body))
+    elif mimetype == FORMAT_MIMETYPES["ndjson"]:
+        return pd.DataFrame([json.loads(line) for line in body.splitlines() if line.strip()])
+    elif mimetype == FORMAT_MIMETYPES["arrow"]:
+        import pyarrow as pa
+
+        return pa.ipc.open_stream(body).read_all().to_pandas()
+    else:
+        raise ValueError(
+            f"Unsupported content type {mimetype}. Must be JSON, NDJSON or Arrow IPC."
+        )
@@ -0,0 +1,58 @@
+import importlib
+import os
+import time
+
+# Heavy modules of each feature area, imported on first use by the helpers
+FEATURE_MODULES = {
+    "fetch": ["pybaseball", "statsapi"],
+    "plotting": ["matplotlib.pyplot", "seaborn", "PIL.Image"],
+    "modelling": [
+        "joblib",
+        "scipy.sparse",
+        "sklearn.compose",
+        "sklearn.ensemble",
+        "sklearn.linear_model",
+        "sklearn.model_selection",
+        "sklearn.pipeline",
+        "sklearn.preprocessing",
+        "sklearn.svm",
+        "compiled_model",
+        "pitch_features",
+    ],
+}
+
+
+def warm_up(areas: list[str] = None) -> dict:
+    """
+    Imports the heavy modules of feature areas ahead of the first request that needs them.
+    Called before forking workers (see gunicorn.conf.py), so all workers share the loaded modules copy-on-write.
+
+    Args:
+        areas (list[str], optional): The feature areas to load ("fetch", "plotting" and/or "modelling").
+            Defaults to None (the MLB_METRICS_WARMUP environment variable, comma-separated, or every area).
+
+    Returns:
+        dict: The import time in seconds of each module.
+    """
+
+    if areas is None:
+        areas = os.environ.get("MLB_METRICS_WARMUP", ",".join(FEATURE_MODULES))
+        areas = [area.strip() for area in areas.split(",") if area.strip()]
+
+    for area in areas:
+        if area not in FEATURE_MODULES:
+            raise ValueError(
+                f"Invalid area '{area}'. Must be one of: {', '.join(FEATURE_MODULES)}."
+            )
+
+    # Plots are rendered with the non-interactive 'Agg' backend
+    os.environ.setdefault("MPLBACKEND", "Agg")
+
+    import_seconds = {}
+    for area in areas:
+        for module in FEATURE_MODULES[area]:
+            start = time.perf_counter()
+            importlib.import_module(module)
+            import_seconds[module] = time.perf_counter() - start
+
+    return import_seconds
@@ -0,0 +1,343 @@
+import datetime
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Literal
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows, where the backend runs as a single process
+    fcntl = None
+
+# Columns that identify a single pitch, used to drop duplicate rows when merging fetched data
+PITCH_IDENTITY_COLUMNS = ["game_pk", "at_bat_number", "pitch_number"]
+
+
+class StatcastCache:
+    """
+    Persistent on-disk cache for player-specific Statcast metrics.
+    Each player and metric type is stored as a directory of Parquet partitions alongside a JSON record of the date ranges that have been fetched.
+    Requests for date ranges that are fully covered are served from disk, otherwise only the missing days are fetched
+    and appended as a new partition (partitions are compacted into one once there are more than max_partitions).
+    Each player and metric type is locked across threads and worker processes while it is read and filled.
+
+    Args:
+        cache_dir (str): The directory to store cached metrics in.
+        max_partitions (int, optional): The number of partitions kept before they are compacted. Defaults to 8.
+    """
+
+    def __init__(self, cache_dir: str, max_partitions: int = 8):
+        self.cache_dir = cache_dir
+        self.max_partitions = max_partitions
+
+        self.hits = 0
+        self.misses = 0
+        self.partial_hits = 0
+        self.fetched_days = 0
+
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    def player_metrics(
+        self,
+        player_id: int,
+        metric_type: Literal["pitching", "batting"],
+        start_dt: str,
+        end_dt: str,
+        fetch: Callable[[int, str, str, str], pd.DataFrame],
+    ) -> pd.DataFrame:
+        """
+        Retrieves the specific metrics for a player, fetching only the days that are not already cached.
+
+        Args:
+            player_id (int): The ID of the player.
+            metric_type (Literal["pitching", "batting"]): The type of metric to retrieve (either "pitching" or "batting").
+            start_dt (str): The start date for the metrics retrieval in the format "YYYY-MM-DD".
+            end_dt (str): The end date for the metrics retrieval in the format "YYYY-MM-DD".
+            fetch (Callable): Function called as fetch(player_id, metric_type, start_dt, end_dt) to retrieve uncached metrics.
+
+        Returns:
+            pd.DataFrame: A DataFrame containing the specific metrics of the player within the date range.
+        """
+
+        start = datetime.date.fromisoformat(start_dt)
+        end = datetime.date.fromisoformat(end_dt)
+
+        with self._key_lock(player_id, metric_type):
+            coverage = self._read_coverage(player_id, metric_type)
+            missing = missing_ranges(coverage, start, end)
+
+            # Count the request as a hit, miss, or partial hit
+            requested_days = max((end - start).days + 1, 0)
+            missing_days = sum((e - s).days + 1 for s, e in missing)
+            with self._stats_lock:
+                if missing_days == 0:
+                    self.hits += 1
+                elif missing_days == requested_days:
+                    self.misses += 1
+                else:
+                    self.partial_hits += 1
+                self.fetched_days += missing_days
+
+            partitions = self._partitions(player_id, metric_type)
+            metrics = merged_metrics([pd.read_parquet(path) for path in partitions])
+
+            if missing:
+                fetched = merged_metrics(
+                    [
+                        fetch(player_id, metric_type, s.isoformat(), e.isoformat())
+                        for s, e in missing
+                    ]
+                )
+                metrics = merged_metrics([metrics, fetched])
+
+                # Games from today onwards may still be in progress, so do not mark them as covered
+                last_complete_day = datetime.date.today() - datetime.timedelta(days=1)
+                for s, e in missing:
+                    if s <= last_complete_day:
+                        coverage = added_range(coverage, s, min(e, last_complete_day))
+
+                # Append the fetched rows, or rewrite everything as one partition once there are too many
+                if len(partitions) >= self.max_partitions:
+                    self._write_partition(player_id, metric_type, metrics)
+                    for path in partitions:
+                        os.remove(path)
+                else:
+                    self._write_partition(player_id, metric_type, fetched)
+                self._write_coverage(player_id, metric_type, coverage)
+
+        return date_range_metrics(metrics, start, end)
+
+    def stats(self) -> dict:
+        """
+        Summarizes the cache usage since the process started.
+
+        Returns:
+            dict: The number of hits, misses and partial hits, the number of days fetched upstream, and the cache size on disk in bytes.
+        """
+
+        size_bytes = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for filename in files:
+                try:
+                    size_bytes += os.path.getsize(os.path.join(root, filename))
+                except FileNotFoundError:
+                    # Removed by a compaction in another worker
+                    continue
+
+        with self._stats_lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "partial_hits": self.partial_hits,
+                "fetched_days": self.fetched_days,
+                "size_bytes": size_bytes,
+            }
+
+    @contextmanager
+    def _key_lock(self, player_id: int, metric_type: str):
+        # Lock out other threads of this process, then other worker processes (with a lock file)
+        with self._locks_lock:
+            lock = self._locks.setdefault((player_id, metric_type), threading.Lock())
+
+        with lock:
+            if fcntl is None:
+                yield
+                return
+
+            path = self._path(player_id, metric_type, "lock")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _path(self, player_id: int, metric_type: str, extension: str) -> str:
+        return os.path.join(self.cache_dir, metric_type, f"{player_id}.{extension}")
+
+    def _partitions(self, player_id: int, metric_type: str) -> list[str]:
+        # Partitions in the order they were written (after the single file of earlier cache versions),
+        # so the latest rows of a pitch are kept when merging
+        partitions = []
+
+        legacy_path = self._path(player_id, metric_type, "parquet")
+        if os.path.exists(legacy_path):
+            partitions.append(legacy_path)
+
+        partition_dir = os.path.join(self.cache_dir, metric_type, str(player_id))
+        if os.path.isdir(partition_dir):
+            partitions += [
+                os.path.join(partition_dir, filename)
+                for filename in sorted(os.listdir(partition_dir))
+                if filename.endswith(".parquet")
+            ]
+
+        return partitions
+
+    def _read_coverage(self, player_id: int, metric_type: str) -> list:
+        path = self._path(player_id, metric_type, "json")
+        if not os.path.exists(path):
+            return []
+
+        with open(path) as f:
+            return [
+                (datetime.date.fromisoformat(s), datetime.date.fromisoformat(e))
+                for s, e in json.load(f)["coverage"]
+            ]
+
+    def _write_coverage(self, player_id: int, metric_type: str, coverage: list):
+        path = self._path(player_id, metric_type, "json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with _replaced_file(path, "w") as f:
+            json.dump(
+                {"coverage": [[s.isoformat(), e.isoformat()] for s, e in coverage]}, f
+            )
+
+    def _write_partition(
+        self, player_id: int, metric_type: str, metrics: pd.DataFrame
+    ):
+        if metrics.empty:
+            return
+
+        # Partition names sort in the order they were written
+        partition_dir = os.path.join(self.cache_dir, metric_type, str(player_id))
+        os.makedirs(partition_dir, exist_ok=True)
+        path = os.path.join(
+            partition_dir, f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+        )
+
+        with _replaced_file(path, "wb") as f:
+            metrics.to_parquet(f, index=False)
+
+
+@contextmanager
+def _replaced_file(path: str, mode: str):
+    # Writes to a uniquely named temporary file in the same directory, then moves it into place,
+    # so readers never see a partially written file and concurrent writers never share a temporary file
+    with tempfile.NamedTemporaryFile(
+        mode, dir=os.path.dirname(path), suffix=".tmp", delete=False
+    ) as f:
+        try:
+            yield f
+        except BaseException:
+            f.close()
+            os.remove(f.name)
+            raise
+    os.replace(f.name, path)
+
+
+def missing_ranges(
+    coverage: list, start: datetime.date, end: datetime.date
+) -> list[tuple[datetime.date, datetime.date]]:
+    """
+    Finds the date ranges between start and end (inclusive) that are not covered.
+
+    Args:
+        coverage (list): Sorted, non-overlapping (start, end) date ranges that are covered.
+        start (datetime.date): The start of the requested range.
+        end (datetime.date): The end of the requested range.
+
+    Returns:
+        list[tuple[datetime.date, datetime.date]]: The uncovered (start, end) date ranges.
+    """
+
+    one_day = datetime.timedelta(days=1)
+    missing = []
+    current = start
+
+    for covered_start, covered_end in coverage:
+        if covered_end < current:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > current:
+            missing.append((current, covered_start - one_day))
+        current = covered_end + one_day
+
+    if current <= end:
+        missing.append((current, end))
+
+    return missing
+
+
+def added_range(coverage: list, start: datetime.date, end: datetime.date) -> list:
+    """
+    Adds a date range to the covered date ranges, merging overlapping and adjacent ranges.
+
+    Args:
+        coverage (list): Sorted, non-overlapping (start, end) date ranges that are covered.
+        start (datetime.date): The start of the range to add.
+        end (datetime.date): The end of the range to add.
+
+    Returns:
+        list: The updated sorted, non-overlapping date ranges.
+    """
+
+    one_day = datetime.timedelta(days=1)
+    merged = []
+
+    for covered_start, covered_end in sorted(coverage + [(start, end)]):
+        if merged and covered_start <= merged[-1][1] + one_day:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], covered_end))
+        else:
+            merged.append((covered_start, covered_end))
+
+    return merged
+
+
+def merged_metrics(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Combines Statcast frames, dropping duplicate pitches and ordering the rows like pybaseball (most recent first).
+
+    Args:
+        frames (list[pd.DataFrame]): The frames to combine.
+
+    Returns:
+        pd.DataFrame: The combined frame.
+    """
+
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+
+    metrics = pd.concat(frames, ignore_index=True)
+
+    if all(column in metrics.columns for column in PITCH_IDENTITY_COLUMNS):
+        metrics = metrics.drop_duplicates(subset=PITCH_IDENTITY_COLUMNS, keep="last")
+        metrics = metrics.sort_values(
+            ["game_date"] + PITCH_IDENTITY_COLUMNS, ascending=False
+        )
+
+    return metrics.reset_index(drop=True)
+
+
+def date_range_metrics(
+    metrics: pd.DataFrame, start: datetime.date, end: datetime.date
+) -> pd.DataFrame:
+    """
+    Selects the rows of a Statcast frame with a game date between start and end (inclusive).
+
+    Args:
+        metrics (pd.DataFrame): The Statcast frame.
+        start (datetime.date): The start of the date range.
+        end (datetime.date): The end of the date range.
+
+    Returns:
+        pd.DataFrame: The rows within the date range.
+    """
+
+    if metrics.empty:
+        return metrics
+
+    game_dates = pd.to_datetime(metrics["game_date"]).dt.date
+    return metrics[(game_dates >= start) & (game_dates <= end)].reset_index(drop=True)
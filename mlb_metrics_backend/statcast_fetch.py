@@ -0,0 +1,269 @@
+import datetime
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Literal
+
+import pandas as pd
+
+from statcast_cache import merged_metrics
+
+
+class FetchProgress:
+    """
+    Thread-safe progress of a chunked Statcast retrieval.
+    Chunks are counted as they are scheduled and completed, so progress can be reported while the retrieval is running.
+    With a path, every change is also written to that JSON file, so any worker process can report the progress.
+
+    Args:
+        path (str, optional): The JSON file the progress is written to. Defaults to None (kept in memory only).
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.total_chunks = 0
+        self.completed_chunks = 0
+        self.failed_chunks = 0
+        self.done = False
+        self._lock = threading.Lock()
+
+    def add(self, num_chunks: int):
+        with self._lock:
+            self.total_chunks += num_chunks
+            self._save()
+
+    def advance(self, failed: bool = False):
+        with self._lock:
+            self.completed_chunks += 1
+            if failed:
+                self.failed_chunks += 1
+            self._save()
+
+    def finish(self):
+        with self._lock:
+            self.done = True
+            self._save()
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return self._as_dict()
+
+    def _as_dict(self) -> dict:
+        return {
+            "total_chunks": self.total_chunks,
+            "completed_chunks": self.completed_chunks,
+            "failed_chunks": self.failed_chunks,
+            "done": self.done,
+        }
+
+    def _save(self):
+        if self.path is None:
+            return
+
+        # Replace the file in one step, so readers in other workers never see a partial write
+        temporary_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(self._as_dict(), f)
+        os.replace(temporary_path, self.path)
+
+
+class FetchProgressRegistry:
+    """
+    Registry of FetchProgress objects keyed by a client-provided fetch ID, shared by all worker processes through a directory on disk,
+    so progress can be polled from any worker. The oldest entries are removed once max_entries is exceeded.
+
+    Args:
+        progress_dir (str): The directory to write progress files in.
+        max_entries (int, optional): The maximum number of progress entries to keep. Defaults to 256.
+    """
+
+    def __init__(self, progress_dir: str, max_entries: int = 256):
+        self.progress_dir = progress_dir
+        self.max_entries = max_entries
+
+    def create(self, fetch_id: str) -> FetchProgress:
+        os.makedirs(self.progress_dir, exist_ok=True)
+        progress = FetchProgress(self._path(fetch_id))
+        # Write the initial state right away, so polls find the fetch before its first chunk is scheduled
+        progress.add(0)
+
+        self._evict()
+
+        return progress
+
+    def get(self, fetch_id: str) -> FetchProgress:
+        try:
+            with open(self._path(fetch_id)) as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        progress = FetchProgress()
+        progress.total_chunks = state["total_chunks"]
+        progress.completed_chunks = state["completed_chunks"]
+        progress.failed_chunks = state["failed_chunks"]
+        progress.done = state["done"]
+
+        return progress
+
+    def _path(self, fetch_id: str) -> str:
+        # Fetch IDs come from clients, so hash them into safe file names
+        digest = hashlib.sha1(str(fetch_id).encode()).hexdigest()
+        return os.path.join(self.progress_dir, f"{digest}.json")
+
+    def _evict(self):
+        paths = []
+        for filename in os.listdir(self.progress_dir):
+            if not filename.endswith(".json"):
+                continue
+            path = os.path.join(self.progress_dir, filename)
+            try:
+                paths.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                continue
+
+        for _, path in sorted(paths)[: max(len(paths) - self.max_entries, 0)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def date_windows(
+    start_dt: str, end_dt: str, window: Literal["season", "month"] = "month"
+) -> list[tuple[str, str]]:
+    """
+    Splits a date range into consecutive season (calendar year) or month windows.
+
+    Args:
+        start_dt (str): The start date in the format "YYYY-MM-DD".
+        end_dt (str): The end date in the format "YYYY-MM-DD".
+        window (Literal["season", "month"], optional): The size of each window. Defaults to "month".
+
+    Returns:
+        list[tuple[str, str]]: The (start, end) dates of each window, in chronological order.
+    """
+
+    if window not in ["season", "month"]:
+        raise ValueError("Invalid window. Must be either 'season' or 'month'.")
+
+    start = datetime.date.fromisoformat(start_dt)
+    end = datetime.date.fromisoformat(end_dt)
+
+    windows = []
+    current = start
+    while current <= end:
+        if window == "season":
+            next_start = datetime.date(current.year + 1, 1, 1)
+        elif current.month == 12:
+            next_start = datetime.date(current.year + 1, 1, 1)
+        else:
+            next_start = datetime.date(current.year, current.month + 1, 1)
+
+        window_end = min(next_start - datetime.timedelta(days=1), end)
+        windows.append((current.isoformat(), window_end.isoformat()))
+        current = next_start
+
+    return windows
+
+
+def retried_fetch(
+    fetch: Callable[..., pd.DataFrame],
+    *args,
+    max_retries: int = 3,
+    backoff_seconds: float = 1.0,
+) -> pd.DataFrame:
+    """
+    Calls a fetch function, retrying with exponential backoff and jitter if it raises an exception.
+
+    Args:
+        fetch (Callable): The function to call.
+        *args: The arguments to call the function with.
+        max_retries (int, optional): The number of retries after the first attempt. Defaults to 3.
+        backoff_seconds (float, optional): The delay before the first retry, doubled for each further retry. Defaults to 1.0.
+
+    Returns:
+        pd.DataFrame: The result of the fetch function.
+    """
+
+    for attempt in range(max_retries + 1):
+        try:
+            return fetch(*args)
+        except Exception:
+            if attempt == max_retries:
+                raise
+            time.sleep(backoff_seconds * 2**attempt * (1 + random.random()))
+
+
+def chunked_metrics(
+    fetch: Callable[[int, str, str, str], pd.DataFrame],
+    player_id: int,
+    metric_type: Literal["pitching", "batting"],
+    start_dt: str,
+    end_dt: str,
+    window: Literal["season", "month"] = "month",
+    max_workers: int = 4,
+    max_retries: int = 3,
+    backoff_seconds: float = 1.0,
+    progress: FetchProgress = None,
+) -> pd.DataFrame:
+    """
+    Retrieves the specific metrics for a player by fetching date windows concurrently.
+    The windows are merged in order and duplicate pitches are dropped.
+
+    Args:
+        fetch (Callable): Function called as fetch(player_id, metric_type, start_dt, end_dt) to retrieve one window.
+        player_id (int): The ID of the player.
+        metric_type (Literal["pitching", "batting"]): The type of metric to retrieve (either "pitching" or "batting").
+        start_dt (str): The start date for the metrics retrieval in the format "YYYY-MM-DD".
+        end_dt (str): The end date for the metrics retrieval in the format "YYYY-MM-DD".
+        window (Literal["season", "month"], optional): The size of each fetched window. Defaults to "month".
+        max_workers (int, optional): The maximum number of windows fetched at the same time. Defaults to 4.
+        max_retries (int, optional): The number of retries for each window. Defaults to 3.
+        backoff_seconds (float, optional): The delay before the first retry of a window. Defaults to 1.0.
+        progress (FetchProgress, optional): Progress object updated as windows complete. Defaults to None.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing the specific metrics of the player.
+    """
+
+    windows = date_windows(start_dt, end_dt, window)
+    if progress is not None:
+        progress.add(len(windows))
+
+    frames = [None] * len(windows)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(windows)))) as pool:
+        futures = {
+            pool.submit(
+                retried_fetch,
+                fetch,
+                player_id,
+                metric_type,
+                window_start,
+                window_end,
+                max_retries=max_retries,
+                backoff_seconds=backoff_seconds,
+            ): i
+            for i, (window_start, window_end) in enumerate(windows)
+        }
+
+        for future in as_completed(futures):
+            failed = future.exception() is not None
+            if progress is not None:
+                progress.advance(failed=failed)
+
+            if failed:
+                # Stop waiting on windows that have not started, the retrieval cannot succeed
+                for other in futures:
+                    other.cancel()
+                raise future.exception()
+
+            frames[futures[future]] = future.result()
+
+    return merged_metrics(frames)
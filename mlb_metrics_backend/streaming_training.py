@@ -0,0 +1,353 @@
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Literal
+
+import numpy as np
+import pandas as pd
+
+import mlb_metrics_helpers
+from instrumentation import stage
+from model_data import model_data_spec
+
+if TYPE_CHECKING:
+    from sklearn.pipeline import Pipeline
+
+# Model types that can be trained without holding the model data in memory:
+# SGD logistic regression learns chunk by chunk with partial_fit,
+# hist gradient boosting is fitted on a bounded sample of rows (its binning subsamples 200,000 rows anyway)
+STREAMING_MODEL_TYPES = ["sgd_logistic_regression", "hist_gradient_boosting"]
+
+# Rows read from a model data file at a time
+DEFAULT_CHUNK_ROWS = 50_000
+
+# Rows hist gradient boosting models are fitted on
+DEFAULT_SAMPLE_ROWS = 200_000
+
+# Training rows kept to fit the preprocessor's column layout and check the compiled model
+LAYOUT_ROWS = 1_000
+
+# Directory of model data files that streaming training can read by name
+training_data_dir = os.environ.get(
+    "MLB_METRICS_TRAINING_DATA_DIR",
+    os.path.join(os.path.expanduser("~"), ".mlb_metrics_cache", "training_data"),
+)
+
+
+class TrainingDataNotFoundError(LookupError):
+    """
+    Raised when the model data of a streaming training source cannot be found.
+    """
+
+
+def file_chunks(
+    path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS, columns: list[str] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Reads a model data file in chunks of rows, so the file never has to fit in memory.
+    Parquet files are read by record batches, Arrow IPC (Feather) files are memory-mapped, and CSV files are parsed in chunks.
+
+    Args:
+        path (str): The path of a ".parquet", ".arrow", ".feather" or ".csv" file.
+        chunk_rows (int, optional): The maximum number of rows per chunk. Defaults to DEFAULT_CHUNK_ROWS.
+        columns (list[str], optional): The columns to read. Defaults to None (every column).
+
+    Yields:
+        pd.DataFrame: The chunks of the file, in order.
+    """
+
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+
+    elif extension in [".arrow", ".feather"]:
+        import pyarrow as pa
+
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        if columns is not None:
+            table = table.select(columns)
+        for batch in table.to_batches(max_chunksize=chunk_rows):
+            yield batch.to_pandas()
+
+    elif extension == ".csv":
+        yield from pd.read_csv(path, chunksize=chunk_rows, usecols=columns)
+
+    else:
+        raise ValueError(
+            f"Unsupported model data file '{path}'. "
+            "Must be a .parquet, .arrow, .feather or .csv file."
+        )
+
+
+def source_chunks(
+    source: dict, chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> tuple[Callable[[], Iterator[pd.DataFrame]], str]:
+    """
+    Resolves the model data source of a streaming training request. Either:
+    - {"file": name}: a model data file in training_data_dir (see file_chunks for the formats)
+    - {"seasons": [...], "metric_type": ..., "pitch_types": [...]}: league-wide model data of the season store
+      (pitch_types is optional, see season_store.SeasonStore.model_data_chunks)
+
+    Args:
+        source (dict): The model data source.
+        chunk_rows (int, optional): The number of rows read at a time. Defaults to DEFAULT_CHUNK_ROWS.
+
+    Returns:
+        tuple[Callable, str]: The function reading the model data chunks,
+            and the target of the model data (None for files, whose target must be given).
+
+    Raises:
+        TrainingDataNotFoundError: If the file does not exist, or the season store is not enabled or lacks a season.
+    """
+
+    if "file" in source:
+        # Only files directly in the training data directory can be read
+        file_name = os.path.basename(source["file"])
+        path = os.path.join(training_data_dir, file_name)
+        if file_name != source["file"] or not os.path.isfile(path):
+            raise TrainingDataNotFoundError(
+                f"Model data file '{source['file']}' not found."
+            )
+
+        return lambda: file_chunks(path, chunk_rows), None
+
+    season_store = mlb_metrics_helpers.season_store
+    if season_store is None:
+        raise TrainingDataNotFoundError("The season store is not enabled.")
+
+    metric_type = source["metric_type"]
+    seasons = [int(season) for season in source["seasons"]]
+    missing_seasons = set(seasons) - set(season_store.seasons(metric_type))
+    if missing_seasons:
+        raise TrainingDataNotFoundError(
+            f"Seasons {sorted(missing_seasons)} are not in the season store."
+        )
+
+    return (
+        lambda: season_store.model_data_chunks(
+            metric_type, seasons, source.get("pitch_types"), chunk_rows
+        ),
+        model_data_spec(metric_type).target,
+    )
+
+
+class StreamedSplit:
+    """
+    Stratified train/holdout split of rows as they stream by, without knowing the class counts up front.
+    Of the rows of each class, the k-th one is held out whenever floor(k * test_size) increases,
+    so every class is split in the test_size proportion (within one row) and reading the same rows again gives the same split.
+
+    Args:
+        test_size (float, optional): The proportion of each class held out. Defaults to 0.1.
+    """
+
+    def __init__(self, test_size: float = 0.1):
+        self.test_size = test_size
+        self.class_counts = {}
+
+    def holdout_mask(self, y: np.ndarray) -> np.ndarray:
+        """
+        Splits the next rows of the stream.
+
+        Args:
+            y (np.ndarray): The class of each row.
+
+        Returns:
+            np.ndarray: Whether each row is held out.
+        """
+
+        holdout = np.zeros(len(y), dtype=bool)
+        for label in pd.unique(y):
+            positions = np.flatnonzero(y == label)
+            seen = self.class_counts.get(label, 0)
+
+            k = seen + np.arange(1, len(positions) + 1)
+            holdout[positions] = np.floor(k * self.test_size) > np.floor(
+                (k - 1) * self.test_size
+            )
+            self.class_counts[label] = seen + len(positions)
+
+        return holdout
+
+
+def streamed_model(
+    chunks: Callable[[], Iterable[pd.DataFrame]],
+    target: str,
+    sklearn_model_type: Literal["sgd_logistic_regression", "hist_gradient_boosting"],
+    test_size: float = 0.1,
+    epochs: int = 5,
+    sample_rows: int = DEFAULT_SAMPLE_ROWS,
+    random_state: int = 0,
+) -> tuple[Pipeline, float, dict]:
+    """
+    Trains and evaluates a player model on model data streamed in chunks, so peak memory depends on the chunk size
+    (and sample_rows for hist gradient boosting) instead of the number of rows. The chunks are read several times:
+    1. The training rows fit the scaler (partial_fit), the one-hot vocabulary and the classes incrementally,
+       and hist gradient boosting keeps a uniform sample of at most sample_rows training rows.
+    2. SGD logistic regression learns from the training rows of each chunk with partial_fit, for each epoch.
+       Chunks are read in stored order, and the rows within each chunk are shuffled.
+    3. The held-out rows are scored to compute the accuracy.
+    Rows are split with a StreamedSplit, so every pass sees the same training and held-out rows.
+
+    Args:
+        chunks (Callable): Function called without arguments to read the model data again as an iterable of DataFrames
+            (ex lambda: file_chunks(path)). Every call must give the same rows in the same order.
+        target (str): The target column to predict.
+        sklearn_model_type (Literal): The type of sklearn model to use. Must be one of:
+            - "sgd_logistic_regression"
+            - "hist_gradient_boosting"
+        test_size (float, optional): The proportion of each class held out for the accuracy. Defaults to 0.1.
+        epochs (int, optional): The number of passes of partial_fit over the training rows (SGD logistic regression). Defaults to 5.
+        sample_rows (int, optional): The number of training rows hist gradient boosting is fitted on. Defaults to DEFAULT_SAMPLE_ROWS.
+        random_state (int, optional): The seed of the row shuffling within chunks and of the row sampling. Defaults to 0.
+
+    Returns:
+        tuple[Pipeline, float, dict]: The trained model pipeline, its accuracy on the held-out rows,
+            and the number of rows, training rows, held-out rows, chunks and passes over the model data.
+
+    Raises:
+        ValueError: If the model type is not supported, or the model data has no training rows or no held-out rows.
+    """
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    from compiled_model import compiled_pipeline
+
+    if sklearn_model_type not in STREAMING_MODEL_TYPES:
+        raise ValueError(
+            f"Invalid sklearn_model_type '{sklearn_model_type}' "
+            f"for streaming training. Must be one of: {', '.join(STREAMING_MODEL_TYPES)}."
+        )
+
+    rng = np.random.default_rng(random_state)
+
+    # Pass 1: scaler, one-hot vocabulary and classes of the training rows
+    scaler = StandardScaler()
+    categories = {}
+    classes = set()
+    layout = None
+    sample, sample_keys = None, None
+    rows = training_rows = n_chunks = 0
+
+    split = StreamedSplit(test_size)
+    for chunk in chunks():
+        holdout = split.holdout_mask(chunk[target].to_numpy())
+        train = chunk[~holdout]
+        rows += len(chunk)
+        training_rows += len(train)
+        n_chunks += 1
+        if train.empty:
+            continue
+
+        X_train = train.drop(columns=[target])
+        # The first training rows set the column layout of the preprocessor
+        if layout is None:
+            layout = X_train.iloc[:LAYOUT_ROWS]
+            preprocessor = mlb_metrics_helpers.column_preprocessor(layout)
+            categorical_columns, numerical_columns = (
+                columns for _, _, columns in preprocessor.transformers
+            )
+
+        with stage("preprocess", rows=len(train)):
+            scaler.partial_fit(X_train[numerical_columns])
+            for column in categorical_columns:
+                categories.setdefault(column, set()).update(
+                    X_train[column].dropna().unique()
+                )
+            classes.update(train[target].unique())
+
+        # Uniform sample of the training rows: keep the rows with the smallest random keys
+        if sklearn_model_type == "hist_gradient_boosting":
+            keys = rng.random(len(train))
+            if sample is not None:
+                train = pd.concat([sample, train], ignore_index=True)
+                keys = np.concatenate([sample_keys, keys])
+            kept = np.argsort(keys, kind="stable")[:sample_rows]
+            sample, sample_keys = train.iloc[kept], keys[kept]
+
+    if layout is None:
+        raise ValueError("The model data has no training rows.")
+    # Without held-out rows there is no accuracy to report, so fail before training
+    if rows == training_rows:
+        raise ValueError(
+            "The model data has no held-out rows to compute the accuracy. "
+            "Increase test_size or provide more rows of each class."
+        )
+    classes = np.array(sorted(classes))
+
+    # Preprocessor with the streamed vocabulary and scaling (fitted on the layout rows only to set up its columns)
+    preprocessor.set_params(
+        **{
+            "one-hot-encoder__categories": [
+                sorted(categories.get(column, [])) for column in categorical_columns
+            ]
+        }
+    )
+    preprocessor.fit(layout)
+    fitted_scaler = preprocessor.named_transformers_["standard_scaler"]
+    for attribute in ["mean_", "var_", "scale_", "n_samples_seen_"]:
+        setattr(fitted_scaler, attribute, getattr(scaler, attribute))
+
+    estimator = mlb_metrics_helpers.sklearn_model(sklearn_model_type)
+    passes = 1
+
+    # Pass 2: learn chunk by chunk, or fit the sample
+    if sklearn_model_type == "sgd_logistic_regression":
+        for _ in range(epochs):
+            split = StreamedSplit(test_size)
+            for chunk in chunks():
+                train = chunk[~split.holdout_mask(chunk[target].to_numpy())]
+                if train.empty:
+                    continue
+                # Shuffle the chunk, model data is often ordered by date
+                train = train.iloc[rng.permutation(len(train))]
+                with stage("preprocess", rows=len(train)):
+                    Xt_train = preprocessor.transform(train.drop(columns=[target]))
+                with stage("fit", rows=len(train)):
+                    estimator.partial_fit(Xt_train, train[target], classes=classes)
+            passes += 1
+    else:
+        with stage("preprocess", rows=len(sample)):
+            Xt_sample = preprocessor.transform(sample.drop(columns=[target]))
+            # HistGradientBoosting only accepts dense matrices
+            if hasattr(Xt_sample, "toarray"):
+                Xt_sample = Xt_sample.toarray()
+        with stage("fit", rows=len(sample)):
+            estimator.fit(Xt_sample, sample[target])
+
+    model = make_pipeline(preprocessor, estimator)
+
+    # Pass 3: accuracy on the held-out rows
+    correct = holdout_rows = 0
+    split = StreamedSplit(test_size)
+    for chunk in chunks():
+        held_out = chunk[split.holdout_mask(chunk[target].to_numpy())]
+        if held_out.empty:
+            continue
+        with stage("predict", rows=len(held_out)):
+            predictions = model.predict(held_out.drop(columns=[target]))
+        correct += int((predictions == held_out[target].to_numpy()).sum())
+        holdout_rows += len(held_out)
+    passes += 1
+
+    accuracy = correct / holdout_rows
+
+    # Compile a NumPy-only inference path, checked against the pipeline on some training rows
+    model.compiled_ = compiled_pipeline(model, layout.iloc[:100])
+
+    return (
+        model,
+        accuracy,
+        {
+            "rows": rows,
+            "training_rows": training_rows,
+            "holdout_rows": holdout_rows,
+            "chunks": n_chunks,
+            "passes": passes,
+        },
+    )
@@ -0,0 +1,4 @@
+# Strike zone bounds (feet): half the width of home plate, and the typical bottom and top of the zone
+STRIKE_ZONE_HALF_WIDTH = 0.71
+STRIKE_ZONE_BOTTOM = 1.5
+STRIKE_ZONE_TOP = 3.5
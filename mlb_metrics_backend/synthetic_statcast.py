@@ -0,0 +1,339 @@
+import math
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+# Pitch types thrown by synthetic pitchers: share of pitches, mean speed (mph), spin rate (rpm),
+# spin axis (degrees) and movement (pfx_x and pfx_z in feet) for a right-handed pitcher
+PITCH_ARSENAL = {
+    "FF": ("4-Seam Fastball", 0.35, 94.0, 2300, 210, -0.6, 1.3),
+    "SI": ("Sinker", 0.12, 93.0, 2150, 230, -1.2, 0.7),
+    "SL": ("Slider", 0.20, 85.0, 2450, 90, 0.4, 0.1),
+    "CU": ("Curveball", 0.10, 78.0, 2550, 40, 0.7, -0.9),
+    "CH": ("Changeup", 0.13, 85.0, 1750, 235, -1.1, 0.5),
+    "FC": ("Cutter", 0.10, 89.0, 2350, 175, 0.2, 0.6),
+}
+
+# Pitch results and their probabilities, for pitches in and out of the strike zone
+IN_ZONE_DESCRIPTIONS = {
+    "called_strike": 0.28,
+    "swinging_strike": 0.12,
+    "foul": 0.28,
+    "hit_into_play": 0.22,
+    "ball": 0.08,
+    "foul_tip": 0.02,
+}
+OUT_OF_ZONE_DESCRIPTIONS = {
+    "ball": 0.60,
+    "swinging_strike": 0.12,
+    "foul": 0.12,
+    "hit_into_play": 0.08,
+    "called_strike": 0.04,
+    "blocked_ball": 0.035,
+    "hit_by_pitch": 0.005,
+}
+
+# Share of missing values in columns that Statcast sometimes does not track
+NAN_RATES = {
+    "pitch_type": 0.002,
+    "plate": 0.003,
+    "release_spin_rate": 0.01,
+    "spin_axis": 0.015,
+    "launch_speed": 0.05,
+}
+
+# Games per season and mean pitches per game of a starting pitcher and an everyday batter
+GAMES_PER_SEASON = {"pitching": 32, "batting": 150}
+PITCHES_PER_GAME = {"pitching": 95, "batting": 16}
+
+# Dataset sizes, as a number of seasons (a single game is 1 game)
+SIZES = {"game": None, "month": 1 / 6, "season": 1, "career": 15}
+
+TEAMS = ["ATL", "BOS", "CHC", "HOU", "LAD", "NYM", "NYY", "SD", "SF", "STL"]
+
+# Half-width of home plate plus the radius of a baseball, and the distance of the front of home plate (feet)
+STRIKE_ZONE_HALF_WIDTH = 0.83
+PLATE_Y = 17 / 12
+
+
+def size_games(
+    size: Literal["game", "month", "season", "career"],
+    metric_type: Literal["pitching", "batting"],
+) -> int:
+    """
+    Converts a dataset size to the number of games played by the synthetic player.
+
+    Args:
+        size (Literal["game", "month", "season", "career"]): The dataset size.
+        metric_type (Literal["pitching", "batting"]): The type of metrics.
+
+    Returns:
+        int: The number of games.
+    """
+
+    if size not in SIZES:
+        raise ValueError(f"Invalid size. Must be one of: {', '.join(SIZES)}.")
+    if SIZES[size] is None:
+        return 1
+
+    return math.ceil(SIZES[size] * GAMES_PER_SEASON[metric_type])
+
+
+def synthetic_specific_metrics(
+    size: Literal["game", "month", "season", "career"] = "season",
+    metric_type: Literal["pitching", "batting"] = "pitching",
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    Generates player-specific metrics that look like pybaseball's statcast_pitcher or statcast_batter results,
+    so helpers and endpoints can be benchmarked offline.
+    Pitch speeds, spin, movement, release points and plate locations follow each pitch type,
+    and the velocity and acceleration columns are consistent with the release point and plate location.
+    Columns that Statcast sometimes does not track have missing values at realistic rates.
+    The same size, metric type and seed always give the same metrics.
+
+    Args:
+        size (Literal["game", "month", "season", "career"], optional): The number of games covered. Defaults to "season".
+        metric_type (Literal["pitching", "batting"], optional): The type of metrics (either "pitching" or "batting"). Defaults to "pitching".
+        seed (int, optional): The seed of the random generator. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: The synthetic metrics, one row per pitch, most recent game first.
+    """
+
+    if metric_type not in ["pitching", "batting"]:
+        raise ValueError("Invalid metric_type. Must be either 'pitching' or 'batting'.")
+
+    rng = np.random.default_rng(seed)
+
+    # Games and the pitches of each game
+    n_games = size_games(size, metric_type)
+    pitches_per_game = np.maximum(
+        1, rng.poisson(PITCHES_PER_GAME[metric_type], n_games)
+    )
+    n = int(pitches_per_game.sum())
+    game = np.repeat(np.arange(n_games), pitches_per_game)
+
+    # Games are spread over the 180 days of each season, starting in 2015
+    games_per_season = GAMES_PER_SEASON[metric_type]
+    game_dates = pd.DatetimeIndex(
+        [
+            pd.Timestamp(2015 + g // games_per_season, 4, 5)
+            + pd.Timedelta(days=(g % games_per_season) * 180 // games_per_season)
+            for g in range(n_games)
+        ]
+    )
+
+    # Plate appearances of about 4 pitches each within every game
+    new_at_bat = rng.random(n) < 0.26
+    new_at_bat[np.r_[0, np.cumsum(pitches_per_game)[:-1]]] = True
+    at_bat_start = np.flatnonzero(new_at_bat)
+    at_bat = np.cumsum(new_at_bat) - 1
+    game_first_at_bat = at_bat[np.r_[0, np.cumsum(pitches_per_game)[:-1]]]
+    at_bat_number = at_bat - game_first_at_bat[game] + 1
+    pitch_number = np.arange(n) - at_bat_start[at_bat] + 1
+
+    # The player and their opponents (one per plate appearance)
+    n_at_bats = len(at_bat_start)
+    player_id = 500000 + seed
+    player_throws = "L" if rng.random() < 0.3 else "R"
+    opponent_ids = rng.integers(400000, 700000, 400)
+    opponent = opponent_ids[rng.integers(0, len(opponent_ids), n_at_bats)][at_bat]
+    if metric_type == "pitching":
+        pitcher, batter = np.full(n, player_id), opponent
+        p_throws = np.full(n, player_throws)
+        stand = np.where(opponent % 5 < 2, "L", "R")
+    else:
+        pitcher, batter = opponent, np.full(n, player_id)
+        p_throws = np.where(opponent % 10 < 3, "L", "R")
+        # The batter bats on the side they throw with
+        stand = np.full(n, player_throws)
+    left_handed = p_throws == "L"
+
+    # Pitch type and its characteristics
+    pitch_types = list(PITCH_ARSENAL)
+    arsenal = np.array([PITCH_ARSENAL[t][1:] for t in pitch_types], dtype=float)
+    pitch_index = rng.choice(len(pitch_types), n, p=arsenal[:, 0])
+    speed_mean, spin_mean, axis_mean, pfx_x_mean, pfx_z_mean = arsenal[
+        pitch_index, 1:
+    ].T
+
+    release_speed = np.round(speed_mean + rng.normal(0, 1.2, n), 1)
+    release_spin_rate = np.round(spin_mean + rng.normal(0, 90, n))
+    spin_axis = np.round(axis_mean + rng.normal(0, 12, n)) % 360
+    spin_axis = np.where(left_handed, 360 - spin_axis, spin_axis)
+    pfx_x = np.round(pfx_x_mean + rng.normal(0, 0.15, n), 2)
+    pfx_x = np.where(left_handed, -pfx_x, pfx_x)
+    pfx_z = np.round(pfx_z_mean + rng.normal(0, 0.15, n), 2)
+
+    # Release point, mirrored for left-handed pitchers
+    release_pos_x = np.round(
+        np.where(left_handed, 1.8, -1.8) + rng.normal(0, 0.2, n), 2
+    )
+    release_pos_z = np.round(5.9 + rng.normal(0, 0.15, n), 2)
+    release_extension = np.round(6.4 + rng.normal(0, 0.2, n), 1)
+    release_pos_y = np.round(60.5 - release_extension, 2)
+
+    # Strike zone of the batter and plate location
+    sz_bot = np.round(1.6 + rng.normal(0, 0.08, n), 2)
+    sz_top = np.round(3.4 + rng.normal(0, 0.08, n), 2)
+    plate_x = np.round(rng.normal(0, 0.85, n), 2)
+    plate_z = np.round(rng.normal(2.3, 0.9, n), 2)
+
+    # Velocity and acceleration at y=50 ft that move the pitch from the release point to the plate location
+    vy0 = -release_speed * 5280 / 3600 * 0.99
+    ay = 26 + rng.normal(0, 2, n)
+    plate_time = (-vy0 - np.sqrt(vy0**2 - 2 * ay * (50 - PLATE_Y))) / ay
+    ax = 2 * pfx_x / plate_time**2
+    az = 2 * pfx_z / plate_time**2 - 32.174
+    vx0 = (plate_x - release_pos_x - 0.5 * ax * plate_time**2) / plate_time
+    vz0 = (plate_z - release_pos_z - 0.5 * az * plate_time**2) / plate_time
+
+    # Statcast zone: 1-9 in the strike zone (top-left to bottom-right from the catcher's view), 11-14 outside
+    in_zone = (
+        (np.abs(plate_x) <= STRIKE_ZONE_HALF_WIDTH)
+        & (plate_z >= sz_bot)
+        & (plate_z <= sz_top)
+    )
+    column = (plate_x + STRIKE_ZONE_HALF_WIDTH) / (2 * STRIKE_ZONE_HALF_WIDTH) * 3
+    column = np.clip(column.astype(int), 0, 2)
+    row = np.clip(((sz_top - plate_z) / (sz_top - sz_bot) * 3).astype(int), 0, 2)
+    high = plate_z > (sz_top + sz_bot) / 2
+    outside_zone = np.where(high, 11, 13) + (plate_x > 0)
+    zone = np.where(in_zone, row * 3 + column + 1, outside_zone).astype(float)
+
+    # Pitch result, depending on the location
+    description = np.where(
+        in_zone,
+        rng.choice(
+            list(IN_ZONE_DESCRIPTIONS), n, p=list(IN_ZONE_DESCRIPTIONS.values())
+        ),
+        rng.choice(
+            list(OUT_OF_ZONE_DESCRIPTIONS),
+            n,
+            p=list(OUT_OF_ZONE_DESCRIPTIONS.values()),
+        ),
+    )
+    pitch_result_type = np.select(
+        [
+            np.isin(description, ["ball", "blocked_ball", "hit_by_pitch"]),
+            description == "hit_into_play",
+        ],
+        ["B", "X"],
+        "S",
+    )
+    in_play = description == "hit_into_play"
+    events = np.where(
+        in_play,
+        rng.choice(
+            ["field_out", "single", "double", "home_run", "grounded_into_double_play"],
+            n,
+            p=[0.66, 0.2, 0.07, 0.05, 0.02],
+        ),
+        None,
+    )
+    events = np.where(description == "hit_by_pitch", "hit_by_pitch", events)
+    bb_type = np.where(
+        in_play,
+        rng.choice(
+            ["ground_ball", "fly_ball", "line_drive", "popup"],
+            n,
+            p=[0.43, 0.28, 0.22, 0.07],
+        ),
+        None,
+    )
+    launch_speed = np.where(in_play, np.round(rng.normal(88, 14, n), 1), np.nan)
+    launch_angle = np.where(in_play, np.round(rng.normal(12, 25, n)), np.nan)
+
+    # Count before each pitch (balls and strikes earlier in the plate appearance)
+    previous = pd.DataFrame(
+        {
+            "at_bat": at_bat,
+            "ball": (pitch_result_type == "B").astype(int),
+            "strike": (pitch_result_type == "S").astype(int),
+        }
+    )
+    counts = (
+        previous.groupby("at_bat")[["ball", "strike"]].cumsum()
+        - previous[["ball", "strike"]]
+    )
+    balls = np.minimum(counts["ball"].to_numpy(), 3)
+    strikes = np.minimum(counts["strike"].to_numpy(), 2)
+
+    # A pitcher faces about 4 batters per inning, a batter comes up about every 2 innings
+    innings_per_at_bat = 0.25 if metric_type == "pitching" else 2.2
+    inning = np.minimum(9, 1 + ((at_bat_number - 1) * innings_per_at_bat).astype(int))
+
+    metrics = pd.DataFrame(
+        {
+            "pitch_type": np.array(pitch_types, dtype=object)[pitch_index],
+            "game_date": game_dates[game],
+            "release_speed": release_speed,
+            "release_pos_x": release_pos_x,
+            "release_pos_z": release_pos_z,
+            "player_name": f"Player, Synthetic {seed}",
+            "batter": batter,
+            "pitcher": pitcher,
+            "events": events,
+            "description": description,
+            "zone": zone,
+            "game_type": "R",
+            "stand": stand,
+            "p_throws": p_throws,
+            "home_team": np.array(TEAMS)[game % len(TEAMS)],
+            "away_team": np.array(TEAMS)[(game + 3) % len(TEAMS)],
+            "type": pitch_result_type,
+            "bb_type": bb_type,
+            "balls": balls,
+            "strikes": strikes,
+            "game_year": game_dates[game].year,
+            "pfx_x": pfx_x,
+            "pfx_z": pfx_z,
+            "plate_x": plate_x,
+            "plate_z": plate_z,
+            "outs_when_up": rng.integers(0, 3, n),
+            "inning": inning,
+            "inning_topbot": np.where(game % 2 == 0, "Top", "Bot"),
+            "vx0": np.round(vx0, 4),
+            "vy0": np.round(vy0, 4),
+            "vz0": np.round(vz0, 4),
+            "ax": np.round(ax, 4),
+            "ay": np.round(ay, 4),
+            "az": np.round(az, 4),
+            "sz_top": sz_top,
+            "sz_bot": sz_bot,
+            "launch_speed": launch_speed,
+            "launch_angle": launch_angle,
+            "effective_speed": np.round(
+                release_speed + (release_extension - 6.2) * 0.8, 1
+            ),
+            "release_spin_rate": release_spin_rate,
+            "release_extension": release_extension,
+            "game_pk": 660000 + game,
+            "release_pos_y": release_pos_y,
+            "at_bat_number": at_bat_number,
+            "pitch_number": pitch_number,
+            "pitch_name": np.array(
+                [PITCH_ARSENAL[t][0] for t in pitch_types], dtype=object
+            )[pitch_index],
+            "spin_axis": spin_axis,
+        }
+    )
+
+    # Values Statcast did not track
+    def missing(nan_rate_key):
+        return rng.random(n) < NAN_RATES[nan_rate_key]
+
+    metrics.loc[missing("pitch_type"), ["pitch_type", "pitch_name"]] = None
+    tracking_columns = ["plate_x", "plate_z", "zone", "pfx_x", "pfx_z"]
+    tracking_columns += ["vx0", "vy0", "vz0", "ax", "ay", "az"]
+    metrics.loc[missing("plate"), tracking_columns] = np.nan
+    metrics.loc[missing("release_spin_rate"), "release_spin_rate"] = np.nan
+    metrics.loc[missing("spin_axis"), "spin_axis"] = np.nan
+    metrics.loc[missing("launch_speed"), ["launch_speed", "launch_angle"]] = np.nan
+
+    # Most recent game first, like the Statcast search results
+    return metrics.sort_values(
+        ["game_date", "at_bat_number", "pitch_number"], ascending=False
+    ).reset_index(drop=True)
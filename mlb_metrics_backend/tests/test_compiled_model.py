@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import mlb_metrics_helpers
+from compiled_model import compiled_pipeline, first_record
+
+
+@pytest.fixture(scope="module")
+def model():
+    rng = np.random.default_rng(0)
+    model_data = pd.DataFrame(
+        {
+            "release_speed": rng.normal(90, 3, 200),
+            "pitch_name": rng.choice(["4-Seam Fastball", "Slider"], 200),
+            "type": rng.choice(["S", "B"], 200),
+        }
+    )
+    model, _ = mlb_metrics_helpers.tested_model(
+        model_data, "type", "logistic_regression"
+    )
+    return model
+
+
+@pytest.mark.parametrize(
+    "feature_data",
+    [
+        {"release_speed": [91.0], "pitch_name": ["Slider"]},
+        {"release_speed": 91.0, "pitch_name": "Slider"},
+        [{"release_speed": 91.0, "pitch_name": "Slider"}],
+    ],
+)
+def test_compiled_prediction_accepts_rows_and_columns(model, feature_data):
+    compiled = compiled_pipeline(model)
+    expected = mlb_metrics_helpers.model_prediction(
+        model, pd.DataFrame({"release_speed": [91.0], "pitch_name": ["Slider"]})
+    )
+
+    prediction, prediction_probas, class_labels = compiled.prediction(feature_data)
+
+    assert (prediction, class_labels) == (expected[0], expected[2])
+    assert np.allclose(prediction_probas, expected[1])
+
+
+def test_other_shapes_are_left_to_the_pipeline():
+    assert first_record({"release_speed": {"0": 91.0}}) is None
+    assert first_record([]) is None
+    assert first_record({"release_speed": []}) is None
+
+
+def test_missing_and_invalid_features_raise_value_error(model):
+    compiled = compiled_pipeline(model)
+
+    with pytest.raises(ValueError, match="Missing features: release_speed"):
+        compiled.prediction([{"pitch_name": "Slider"}])
+    with pytest.raises(ValueError, match="release_speed must be a number"):
+        compiled.prediction({"release_speed": ["fast"], "pitch_name": ["Slider"]})
+
+
+def test_null_feature_raises_value_error(model):
+    compiled = compiled_pipeline(model)
+
+    with pytest.raises(ValueError, match="Missing values for features: release_speed"):
+        compiled.prediction({"release_speed": [None], "pitch_name": ["Slider"]})
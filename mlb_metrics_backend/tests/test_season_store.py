@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from season_store import SeasonStore
+
+
+def fetch_with_missing_batters(start_dt: str, end_dt: str) -> pd.DataFrame:
+    # A missing batter makes pandas store the batter IDs as floats
+    return pd.DataFrame(
+        {
+            "game_date": [start_dt, start_dt, end_dt],
+            "game_pk": [1, 2, 3],
+            "at_bat_number": 1,
+            "pitch_number": 1,
+            "pitcher": [605400, 605400, 605401],
+            "batter": [545361.0, np.nan, 545361.0],
+        }
+    )
+
+
+def test_players_are_indexed_by_integer_id(tmp_path):
+    store = SeasonStore(str(tmp_path))
+
+    summary = store.load_season(2023, fetch=fetch_with_missing_batters, window_days=366)
+
+    assert summary["batting"] == {"rows": 2, "players": 1}
+    assert store.player_table(545361, "batting", 2023).num_rows == 2
+    assert store.player_table(605400, "pitching", 2023).num_rows == 2
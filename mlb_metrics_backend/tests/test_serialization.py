@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from serialization import (
+    NegotiationError,
+    NotAcceptableError,
+    negotiated_format,
+    projected_columns,
+)
+
+
+@pytest.mark.parametrize(
+    "accept_header, expected",
+    [
+        (None, "json"),
+        ("application/json, text/plain, */*", "json"),
+        ("text/html,application/xhtml+xml,*/*;q=0.8", "json"),
+        ("application/json;q=0.5, application/vnd.apache.arrow.stream", "arrow"),
+        ("application/vnd.apache.parquet, application/json;q=0", "parquet"),
+    ],
+)
+def test_format_is_negotiated_from_accept_header(accept_header, expected):
+    assert negotiated_format(None, accept_header) == expected
+
+
+def test_format_parameter_takes_precedence():
+    assert negotiated_format("ndjson", "application/json") == "ndjson"
+
+    with pytest.raises(NegotiationError):
+        negotiated_format("xml")
+
+
+def test_invalid_accept_headers_are_rejected():
+    with pytest.raises(NegotiationError):
+        negotiated_format(None, "application/json;q=high")
+
+    with pytest.raises(NotAcceptableError):
+        negotiated_format(None, "text/csv")
+
+
+def test_unknown_columns_are_rejected():
+    df = pd.DataFrame({"plate_x": [0.1], "plate_z": [2.5]})
+
+    assert projected_columns(df, "plate_z").columns.tolist() == ["plate_z"]
+    with pytest.raises(NegotiationError):
+        projected_columns(df, "plate_z,release_speed")
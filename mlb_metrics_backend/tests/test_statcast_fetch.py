@@ -0,0 +1,171 @@
+import threading
+
+import pandas as pd
+import pybaseball as pb
+import pytest
+
+import mlb_metrics_helpers
+from statcast_fetch import (
+    FetchProgress,
+    FetchProgressRegistry,
+    chunked_metrics,
+    date_windows,
+)
+
+
+class FakeStatcast:
+    """
+    Stand-in for pb.statcast_pitcher and pb.statcast_batter, returning one pitch per day of the requested window
+    and recording every call. Windows starting on a date in fail_starts raise for their first failures attempts.
+    """
+
+    def __init__(self, fail_starts: list[str] = (), failures: int = 1_000):
+        self.fail_starts = set(fail_starts)
+        self.failures = failures
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, start_dt: str, end_dt: str, player_id: int) -> pd.DataFrame:
+        with self._lock:
+            self.calls.append((start_dt, end_dt))
+            attempts = self.calls.count((start_dt, end_dt))
+
+        if start_dt in self.fail_starts and attempts <= self.failures:
+            raise ConnectionError(f"Statcast unavailable for {start_dt}")
+
+        days = pd.date_range(start_dt, end_dt, freq="D")
+        return pd.DataFrame(
+            {
+                "game_date": days.strftime("%Y-%m-%d"),
+                "game_pk": [int(day.strftime("%Y%m%d")) for day in days],
+                "at_bat_number": 1,
+                "pitch_number": 1,
+                "pitcher": player_id,
+            }
+        )
+
+
+def fake_fetch(fake: FakeStatcast):
+    return lambda player_id, metric_type, start_dt, end_dt: fake(
+        start_dt, end_dt, player_id
+    )
+
+
+def test_date_windows_split_by_month_and_season():
+    assert date_windows("2023-03-15", "2023-05-10") == [
+        ("2023-03-15", "2023-03-31"),
+        ("2023-04-01", "2023-04-30"),
+        ("2023-05-01", "2023-05-10"),
+    ]
+    assert date_windows("2022-10-01", "2023-04-01", "season") == [
+        ("2022-10-01", "2022-12-31"),
+        ("2023-01-01", "2023-04-01"),
+    ]
+
+
+def test_fetched_metrics_are_chunked_by_window_and_merged(monkeypatch):
+    fake = FakeStatcast()
+    monkeypatch.setattr(pb, "statcast_pitcher", fake)
+    monkeypatch.setattr(mlb_metrics_helpers, "fetch_window", "month")
+    progress = FetchProgress()
+
+    metrics = mlb_metrics_helpers.fetched_specific_metrics(
+        605400, "pitching", "2023-03-15", "2023-05-10", progress=progress
+    )
+
+    assert sorted(fake.calls) == date_windows("2023-03-15", "2023-05-10")
+    assert len(metrics) == 57
+    assert metrics["game_date"].iloc[0] == "2023-05-10"
+    assert metrics["game_date"].is_monotonic_decreasing
+    assert progress.as_dict() == {
+        "total_chunks": 3,
+        "completed_chunks": 3,
+        "failed_chunks": 0,
+        "done": False,
+    }
+
+
+def test_failed_window_is_retried():
+    fake = FakeStatcast(fail_starts=["2023-04-01"], failures=1)
+    progress = FetchProgress()
+
+    metrics = chunked_metrics(
+        fake_fetch(fake),
+        605400,
+        "pitching",
+        "2023-03-15",
+        "2023-05-10",
+        backoff_seconds=0,
+        progress=progress,
+    )
+
+    assert fake.calls.count(("2023-04-01", "2023-04-30")) == 2
+    assert len(metrics) == 57
+    assert progress.as_dict()["failed_chunks"] == 0
+
+
+def test_partial_failure_raises_and_is_reported():
+    fake = FakeStatcast(fail_starts=["2023-04-01"])
+    progress = FetchProgress()
+
+    with pytest.raises(ConnectionError):
+        chunked_metrics(
+            fake_fetch(fake),
+            605400,
+            "pitching",
+            "2023-03-15",
+            "2023-05-10",
+            max_workers=1,
+            max_retries=2,
+            backoff_seconds=0,
+            progress=progress,
+        )
+
+    # The failing window is tried once and retried twice
+    assert fake.calls.count(("2023-04-01", "2023-04-30")) == 3
+    assert progress.as_dict()["failed_chunks"] == 1
+
+
+def test_player_specific_metrics_finishes_progress(monkeypatch):
+    monkeypatch.setattr(pb, "statcast_batter", FakeStatcast())
+    progress = FetchProgress()
+
+    metrics = mlb_metrics_helpers.player_specific_metrics(
+        545361, "batting", "2023-04-01", "2023-04-10", use_cache=False, progress=progress
+    )
+
+    assert len(metrics) == 10
+    assert progress.as_dict()["done"]
+
+
+def test_progress_is_shared_between_workers(tmp_path):
+    # Two registries on the same directory stand for two worker processes
+    fetching_worker = FetchProgressRegistry(str(tmp_path))
+    polled_worker = FetchProgressRegistry(str(tmp_path))
+
+    progress = fetching_worker.create("kershaw-2023")
+    assert polled_worker.get("kershaw-2023").as_dict()["total_chunks"] == 0
+
+    progress.add(3)
+    progress.advance()
+    progress.advance(failed=True)
+    assert polled_worker.get("kershaw-2023").as_dict() == {
+        "total_chunks": 3,
+        "completed_chunks": 2,
+        "failed_chunks": 1,
+        "done": False,
+    }
+
+    progress.finish()
+    assert polled_worker.get("kershaw-2023").as_dict()["done"]
+    assert polled_worker.get("unknown") is None
+
+
+def test_oldest_progress_is_evicted(tmp_path):
+    registry = FetchProgressRegistry(str(tmp_path), max_entries=2)
+
+    for fetch_id in ["first", "second", "third"]:
+        registry.create(fetch_id)
+
+    assert registry.get("first") is None
+    assert registry.get("third") is not None
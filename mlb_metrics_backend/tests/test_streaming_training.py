@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from streaming_training import streamed_model
+
+
+def model_data_chunks(rows: int, chunk_rows: int = 50) -> list[pd.DataFrame]:
+    rng = np.random.default_rng(0)
+    release_speed = rng.normal(90, 3, rows)
+    model_data = pd.DataFrame(
+        {
+            "release_speed": release_speed,
+            "pitch_type": rng.choice(["FF", "SL"], rows),
+            "description": np.where(
+                release_speed > 90, "swinging_strike", "hit_into_play"
+            ),
+        }
+    )
+    return [
+        model_data.iloc[start : start + chunk_rows]
+        for start in range(0, rows, chunk_rows)
+    ]
+
+
+def test_accuracy_is_computed_on_held_out_rows():
+    chunks = model_data_chunks(400)
+
+    _, accuracy, summary = streamed_model(
+        lambda: chunks, "description", "sgd_logistic_regression", epochs=2
+    )
+
+    # A tenth of each class is held out (within one row)
+    assert 38 <= summary["holdout_rows"] <= 40
+    assert summary["holdout_rows"] == summary["rows"] - summary["training_rows"]
+    assert 0.5 < accuracy <= 1
+
+
+def test_model_data_without_held_out_rows_raises():
+    # With fewer than ten rows of each class, no row is held out
+    chunks = model_data_chunks(8)
+
+    with pytest.raises(ValueError, match="no held-out rows"):
+        streamed_model(lambda: chunks, "description", "sgd_logistic_regression")
@@ -0,0 +1,53 @@
+import pandas as pd
+
+from model_store import ModelStore
+from training_cache import TrainingCache, training_fingerprint
+
+
+def test_fingerprint_depends_on_content_and_options():
+    model_data = pd.DataFrame({"release_speed": [95.1, 88.4], "zone": [5, 14]})
+
+    fingerprint = training_fingerprint(model_data, "zone", "random_forest")
+    assert fingerprint == training_fingerprint(
+        model_data.copy(), "zone", "random_forest"
+    )
+    assert fingerprint != training_fingerprint(
+        model_data.iloc[::-1], "zone", "random_forest"
+    )
+    assert fingerprint != training_fingerprint(model_data, "zone", "svc")
+    assert fingerprint != training_fingerprint(
+        model_data, "zone", "random_forest", engineered_features=True
+    )
+
+
+def test_stored_models_are_shared_between_processes(tmp_path):
+    # Two caches on the same model store directory stand for two processes
+    training_process = TrainingCache(ModelStore(str(tmp_path)))
+    web_process = TrainingCache(ModelStore(str(tmp_path)))
+
+    model_uuid = training_process.model_store.put({"weights": [0.1, 0.2]})
+    training_process.put("fingerprint", model_uuid, 0.75, 2.0)
+
+    assert web_process.get("fingerprint") == {
+        "model_uuid": model_uuid,
+        "accuracy": 0.75,
+        "fit_seconds": 2.0,
+    }
+    assert web_process.get("unknown") is None
+    assert training_process.stats() == {
+        "cached_results": 1,
+        "hits": 1,
+        "misses": 1,
+        "seconds_saved": 2.0,
+    }
+
+
+def test_deleted_models_are_not_reused(tmp_path):
+    training_cache = TrainingCache(ModelStore(str(tmp_path)))
+
+    model_uuid = training_cache.model_store.put({"weights": [0.1, 0.2]})
+    training_cache.put("fingerprint", model_uuid, 0.75, 2.0)
+    training_cache.model_store.delete(model_uuid)
+
+    assert training_cache.get("fingerprint") is None
+    assert training_cache.stats()["cached_results"] == 0
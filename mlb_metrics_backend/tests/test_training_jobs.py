@@ -0,0 +1,87 @@
+import operator
+import time
+
+from training_jobs import JobNotFoundError, TrainingJobQueue
+
+
+def finished_job(queue: TrainingJobQueue, job_id: str, timeout: float = 60) -> dict:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.job(job_id)
+        if job["finished_at"] is not None:
+            return job
+        time.sleep(0.05)
+    raise TimeoutError(job_id)
+
+
+def test_jobs_are_shared_between_workers(tmp_path):
+    # Two queues on the same directory stand for two web worker processes, only one of which dispatches jobs
+    submitting_worker = TrainingJobQueue(str(tmp_path), max_workers=1, poll_seconds=0.05)
+    polled_worker = TrainingJobQueue(str(tmp_path), max_workers=1, poll_seconds=0.05)
+
+    job_id = submitting_worker.submit("user", operator.mul, 6, 7)
+    job = finished_job(polled_worker, job_id)
+
+    assert job["status"] == "completed"
+    assert job["result"] == 42
+    assert submitting_worker.stats()["dispatcher_pid"] is not None
+    assert polled_worker.stats()["jobs"] == {"completed": 1}
+
+
+def test_failed_job_reports_error(tmp_path):
+    queue = TrainingJobQueue(str(tmp_path), max_workers=1, poll_seconds=0.05)
+
+    job = finished_job(queue, queue.submit("user", operator.truediv, 1, 0))
+
+    assert job["status"] == "failed"
+    assert "ZeroDivisionError" in job["error"]
+
+
+def test_queued_jobs_are_shared_fairly_between_users(tmp_path):
+    queue = TrainingJobQueue(str(tmp_path), max_workers=1, poll_seconds=0.05)
+
+    blocking_job = queue.submit("busy", time.sleep, 1)
+    while queue.job(blocking_job)["status"] != "running":
+        time.sleep(0.05)
+    busy_jobs = [queue.submit("busy", operator.add, i, 0) for i in range(3)]
+    other_job = queue.submit("other", operator.add, 0, 0)
+
+    # The other user's job skips ahead of the busy user's queued jobs, since the busy user already has a running job
+    assert queue.job(other_job)["queue_position"] == 0
+    assert [queue.job(job_id)["queue_position"] for job_id in busy_jobs] == [1, 2, 3]
+
+    for job_id in [blocking_job, *busy_jobs, other_job]:
+        finished_job(queue, job_id)
+    assert queue.job(busy_jobs[0])["started_at"] > queue.job(other_job)["started_at"]
+
+
+def test_cancelling_running_job_stops_it(tmp_path):
+    discarded = []
+    queue = TrainingJobQueue(
+        str(tmp_path), max_workers=1, discard_result=discarded.append, poll_seconds=0.05
+    )
+
+    running_job = queue.submit("user", time.sleep, 60)
+    queued_job = queue.submit("user", operator.add, 1, 1)
+    while queue.job(running_job)["status"] != "running":
+        time.sleep(0.05)
+
+    assert queue.cancel(queued_job)["status"] == "cancelled"
+    assert queue.cancel(running_job)["status"] == "cancelling"
+
+    # The worker process is terminated instead of running the job to the end
+    job = finished_job(queue, running_job, timeout=10)
+    assert job["status"] == "cancelled"
+    assert job["seconds_running"] < 10
+    assert discarded == []
+
+
+def test_unknown_job_raises(tmp_path):
+    queue = TrainingJobQueue(str(tmp_path))
+
+    for job_id in ["00000000-0000-0000-0000-000000000000", "../secret"]:
+        try:
+            queue.job(job_id)
+        except JobNotFoundError:
+            continue
+        raise AssertionError(f"{job_id} was found")
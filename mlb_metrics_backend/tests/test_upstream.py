@@ -0,0 +1,164 @@
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+from benchmarks import fake_upstream_server
+from upstream import Upstream
+
+
+@pytest.fixture
+def fake_upstream():
+    server, counters = fake_upstream_server(latency=0)
+    yield f"http://127.0.0.1:{server.server_address[1]}", counters
+    server.shutdown()
+
+
+def concurrent_calls(function, callers: int) -> list:
+    # Start every caller at once, so their calls are in flight at the same time
+    barrier = threading.Barrier(callers)
+    results = [None] * callers
+
+    def caller(i):
+        barrier.wait()
+        results[i] = function()
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return results
+
+
+def test_identical_calls_in_flight_are_coalesced():
+    upstream = Upstream(pooled_modules=[])
+    calls = []
+
+    def player_stat_data(player_id):
+        calls.append(player_id)
+        time.sleep(0.2)
+        return {"id": player_id, "stats": [{"era": 2.5}]}
+
+    results = concurrent_calls(
+        lambda: upstream.call(("player_stat_data", 477132), player_stat_data, 477132),
+        callers=5,
+    )
+
+    assert calls == [477132]
+    assert upstream.stats()["calls"] == 1
+    assert upstream.stats()["coalesced"] == 4
+    assert all(result == results[0] for result in results)
+
+    # Followers get their own copy, so changing one result does not change the others
+    assert len({id(result["stats"]) for result in results}) == 5
+    results[0]["stats"].clear()
+    assert results[1]["stats"] == [{"era": 2.5}]
+
+
+def test_failed_call_is_raised_to_followers_and_not_cached():
+    upstream = Upstream(pooled_modules=[])
+
+    def unavailable():
+        time.sleep(0.2)
+        raise ConnectionError("Statcast unavailable")
+
+    def call():
+        try:
+            return upstream.call(("statcast",), unavailable, ttl=60)
+        except ConnectionError as e:
+            return e
+
+    results = concurrent_calls(call, callers=3)
+
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert upstream.stats()["cached_results"] == 0
+
+
+def test_results_are_cached_for_their_ttl():
+    upstream = Upstream(pooled_modules=[])
+    calls = []
+
+    def player_stat_data():
+        calls.append(1)
+        return {"stats": [1, 2]}
+
+    first = upstream.call(("player_stat_data", 1), player_stat_data, ttl=0.2)
+    first["stats"].clear()
+    second = upstream.call(("player_stat_data", 1), player_stat_data, ttl=0.2)
+
+    assert len(calls) == 1
+    assert second == {"stats": [1, 2]}
+    assert upstream.stats()["cached"] == 1
+
+    time.sleep(0.3)
+    upstream.call(("player_stat_data", 1), player_stat_data, ttl=0.2)
+    assert len(calls) == 2
+
+
+def test_requests_are_rate_limited(fake_upstream):
+    url, counters = fake_upstream
+    upstream = Upstream(rate=20, burst=2, pooled_modules=[])
+
+    start = time.monotonic()
+    concurrent_calls(lambda: upstream.get(url, timeout=10), callers=6)
+    elapsed = time.monotonic() - start
+
+    # The burst is sent at once, then one request every 1 / rate seconds
+    assert elapsed >= (6 - 2) / 20 * 0.9
+    assert counters["requests"] == 6
+    assert upstream.stats()["http_requests"] == 6
+    assert upstream.stats()["throttled"] == 4
+
+
+def test_requests_reuse_pooled_connections(fake_upstream):
+    url, counters = fake_upstream
+    upstream = Upstream(pooled_modules=[])
+
+    for i in range(10):
+        assert upstream.get(f"{url}/{i}", timeout=10).json() == {"path": f"/{i}"}
+
+    assert len(counters["connections"]) == 1
+
+
+def test_library_requests_are_routed_through_the_pool(fake_upstream, monkeypatch):
+    url, counters = fake_upstream
+    import requests
+
+    # Stand-in for an upstream library that sends its requests with requests.get
+    library = types.ModuleType("fake_upstream_library")
+    library.requests = requests
+    monkeypatch.setitem(sys.modules, "fake_upstream_library", library)
+    upstream = Upstream(pooled_modules=["fake_upstream_library"])
+
+    upstream.install()
+    for i in range(3):
+        library.requests.get(f"{url}/{i}", timeout=10)
+
+    assert upstream.stats()["http_requests"] == 3
+    assert len(counters["connections"]) == 1
+    assert library.requests.codes.ok == 200
+
+
+def test_only_the_modules_of_the_called_package_are_routed(monkeypatch):
+    import requests
+
+    # Stand-ins for statsapi and a pybaseball module, and a function of the statsapi stand-in
+    libraries = {}
+    for name in ["fake_statsapi", "fake_pybaseball", "fake_pybaseball.utils"]:
+        libraries[name] = types.ModuleType(name)
+        libraries[name].requests = requests
+        monkeypatch.setitem(sys.modules, name, libraries[name])
+    upstream = Upstream(pooled_modules=["fake_statsapi", "fake_pybaseball.utils"])
+
+    def player_stat_data():
+        return {}
+
+    player_stat_data.__module__ = "fake_statsapi"
+    upstream.call(("player_stat_data",), player_stat_data)
+
+    assert libraries["fake_statsapi"].requests is not requests
+    assert libraries["fake_pybaseball.utils"].requests is requests
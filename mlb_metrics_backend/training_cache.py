@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+
+from model_store import ModelNotFoundError, ModelStore
+
+try:
+    import fcntl
+except ImportError:  # Windows, where the backend runs as a single process
+    fcntl = None
+
+
+def training_fingerprint(
+    model_data: pd.DataFrame,
+    target: str,
+    model_type: str,
+    engineered_features: bool = False,
+) -> str:
+    """
+    Hashes the content of model data together with the target, model type and preprocessing options.
+    Row order is part of the hash, since it changes the train/test split.
+
+    Args:
+        model_data (pd.DataFrame): The input data for training the model.
+        target (str): The target column to predict.
+        model_type (str): The type of sklearn model.
+        engineered_features (bool, optional): Whether the preprocessor adds the trajectory features. Defaults to False.
+
+    Returns:
+        str: The hex digest identifying the training run.
+    """
+
+    digest = hashlib.sha256()
+    digest.update(repr((target, model_type)).encode())
+    if engineered_features:
+        digest.update(b"engineered_features")
+    digest.update(repr([(str(c), str(t)) for c, t in model_data.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(model_data, index=False).to_numpy().tobytes())
+
+    return digest.hexdigest()
+
+
+class TrainingCache:
+    """
+    Index of the models of a model store by training fingerprint, shared by all processes (web and training workers)
+    through the store directory. Training is deterministic (random_state=0), so a matching fingerprint reuses the stored model
+    instead of refitting it. Only the model UUID and accuracy are indexed: models stay in the model store,
+    so the memory they use is bounded by its memory budget. Entries of models deleted from the store are dropped on lookup.
+
+    Args:
+        model_store (ModelStore): The model store the indexed models are in.
+    """
+
+    def __init__(self, model_store: ModelStore):
+        self.model_store = model_store
+        self.index_dir = os.path.join(model_store.store_dir, "training_cache")
+
+        self._lock = threading.Lock()
+
+    def get(self, fingerprint: str) -> dict:
+        """
+        Looks up the stored model of a training run.
+
+        Args:
+            fingerprint (str): The training fingerprint.
+
+        Returns:
+            dict or None: The model UUID, accuracy and original fit time in seconds, or None if no stored model matches.
+        """
+
+        path = self._path(fingerprint)
+
+        with self._index_lock():
+            try:
+                with open(path) as f:
+                    entry = json.load(f)
+                self.model_store.metadata(entry["model_uuid"])
+            except (FileNotFoundError, json.JSONDecodeError, ModelNotFoundError):
+                if os.path.exists(path):
+                    os.remove(path)
+                self._count(misses=1)
+                return None
+
+            self._count(hits=1, seconds_saved=entry["fit_seconds"])
+
+        return entry
+
+    def put(
+        self, fingerprint: str, model_uuid: str, accuracy: float, fit_seconds: float
+    ):
+        """
+        Indexes the stored model of a training run.
+
+        Args:
+            fingerprint (str): The training fingerprint.
+            model_uuid (str): The UUID of the trained model in the model store.
+            accuracy (float): The accuracy of the trained model.
+            fit_seconds (float): The time it took to train and evaluate the model.
+        """
+
+        entry = {"model_uuid": model_uuid, "accuracy": accuracy, "fit_seconds": fit_seconds}
+
+        with self._index_lock():
+            _write_json(self._path(fingerprint), entry)
+
+    def stats(self) -> dict:
+        """
+        Summarizes the cache usage of every process since the index was created.
+
+        Returns:
+            dict: The number of indexed results, hits and misses, and the training time saved by hits in seconds.
+        """
+
+        with self._index_lock():
+            counters = self._counters()
+            cached_results = sum(
+                filename.endswith(".json") and filename != "stats.json"
+                for filename in os.listdir(self.index_dir)
+            )
+
+        return {"cached_results": cached_results, **counters}
+
+    def _path(self, fingerprint: str) -> str:
+        return os.path.join(self.index_dir, f"{fingerprint}.json")
+
+    @contextmanager
+    def _index_lock(self):
+        # Lock out other threads of this process, then other processes (with a lock file)
+        os.makedirs(self.index_dir, exist_ok=True)
+
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+
+            with open(os.path.join(self.index_dir, "index.lock"), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _counters(self) -> dict:
+        try:
+            with open(os.path.join(self.index_dir, "stats.json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"hits": 0, "misses": 0, "seconds_saved": 0.0}
+
+    def _count(self, hits: int = 0, misses: int = 0, seconds_saved: float = 0.0):
+        counters = self._counters()
+        counters["hits"] += hits
+        counters["misses"] += misses
+        counters["seconds_saved"] += seconds_saved
+        _write_json(os.path.join(self.index_dir, "stats.json"), counters)
+
+
+def _write_json(path: str, content: dict):
+    # Write to a uniquely named temporary file first so readers never see a partially written file
+    temporary_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temporary_path, "w") as f:
+        json.dump(content, f)
+    os.replace(temporary_path, path)
@@ -0,0 +1,832 @@
+import atexit
+import json
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+from multiprocessing.connection import wait
+from typing import Callable
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows, where the backend runs as a single process
+    fcntl = None
+
+# Statuses of jobs that have been started on a worker process and not finished yet
+ACTIVE_STATUSES = ["running", "cancelling"]
+
+
+class JobNotFoundError(LookupError):
+    """
+    Raised when a job ID is unknown to the job queue.
+    """
+
+
+class TrainingJobQueue:
+    """
+    Runs model training jobs in the background on worker processes, shared by all web worker processes through a directory on disk.
+    Each job is a JSON record (status, timing, result) and a pickle of its inputs keyed by job ID, so any web worker can submit,
+    report or cancel any job. A single dispatcher, run by the first web worker to take the dispatcher lock file
+    (and taken over by another one if that worker exits), starts the jobs on up to max_workers processes,
+    so the worker limit holds across all web workers. Queued jobs are dispatched round-robin across users,
+    so one user submitting many jobs cannot starve the others. Running jobs are cancelled by terminating their worker process.
+
+    Args:
+        jobs_dir (str): The directory to store job records and inputs in.
+        max_workers (int, optional): The number of worker processes (and jobs running at the same time). Defaults to 2.
+        discard_result (Callable, optional): Called with the result of a job that finished while it was being cancelled (ex to delete a stored model). Defaults to None.
+        max_finished_jobs (int, optional): The number of finished jobs kept for status requests. Defaults to 1000.
+        poll_seconds (float, optional): How often the dispatcher looks for new and cancelled jobs. Defaults to 0.2.
+    """
+
+    def __init__(
+        self,
+        jobs_dir: str,
+        max_workers: int = 2,
+        discard_result: Callable = None,
+        max_finished_jobs: int = 1000,
+        poll_seconds: float = 0.2,
+    ):
+        self.jobs_dir = jobs_dir
+        self.max_workers = max_workers
+        self.discard_result = discard_result
+        self.max_finished_jobs = max_finished_jobs
+        self.poll_seconds = poll_seconds
+
+        # The dispatcher is started on first use, so importing this module (or forking web workers) never starts processes
+        self._pid = None
+        self._dispatcher = None
+        self._dispatcher_lock_file = None
+        self._workers = []
+        self._lock = threading.Lock()
+        self._records_thread_lock = threading.Lock()
+
+    def submit(self, user: str, function: Callable, *args, kind: str = "training") -> str:
+        """
+        Queues a job and returns its ID right away.
+
+        Args:
+            user (str): The user submitting the job, used to share workers fairly.
+            function (Callable): A picklable top-level function to run in a worker process.
+            *args: The picklable arguments to call the function with.
+            kind (str, optional): A label describing the job. Defaults to "training".
+
+        Returns:
+            str: The job ID.
+        """
+
+        job_id = str(uuid.uuid4())
+        os.makedirs(self.jobs_dir, exist_ok=True)
+
+        # Write the inputs first, so the dispatcher never sees a queued job without them
+        inputs_path = self._path(job_id, "pickle")
+        with open(f"{inputs_path}.tmp", "wb") as f:
+            pickle.dump((function, args), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f"{inputs_path}.tmp", inputs_path)
+
+        with self._records_lock():
+            records = self._records()
+
+            # Each job takes the next turn of its user, but no earlier than the turn being dispatched,
+            # and jobs are dispatched in turn order
+            dispatched_turn = max(
+                (r["turn"] for r in records if r["started_at"] is not None), default=0
+            )
+            user_turns = [
+                r["turn"]
+                for r in records
+                if r["user"] == user and r["status"] in ["queued", *ACTIVE_STATUSES]
+            ]
+            turn = max([dispatched_turn] + [t + 1 for t in user_turns])
+
+            self._write_record(
+                {
+                    "job_id": job_id,
+                    "user": user,
+                    "kind": kind,
+                    "turn": turn,
+                    "status": "queued",
+                    "cancel_requested": False,
+                    "result": None,
+                    "error": None,
+                    "submitted_at": time.time(),
+                    "started_at": None,
+                    "finished_at": None,
+                }
+            )
+
+        self._ensure_dispatcher()
+
+        return job_id
+
+    def job(self, job_id: str) -> dict:
+        """
+        Retrieves the status of a job.
+        Queued jobs include their position in the queue, running jobs include how long they have been running.
+
+        Args:
+            job_id (str): The job ID.
+
+        Returns:
+            dict: The job status, timing, and result (once completed) or error (once failed).
+
+        Raises:
+            JobNotFoundError: If the job ID is unknown.
+        """
+
+        self._ensure_dispatcher()
+
+        record = self._read_record(job_id)
+        status = job_status(record)
+        if record["status"] == "queued":
+            queue = sorted(
+                (r for r in self._records() if r["status"] == "queued"), key=_queue_key
+            )
+            status["queue_position"] = [r["job_id"] for r in queue].index(job_id)
+
+        return status
+
+    def cancel(self, job_id: str) -> dict:
+        """
+        Cancels a job.
+        Queued jobs are removed from the queue. Running jobs are marked as cancelling,
+        and the dispatcher terminates their worker process (discarding the result if they finish first).
+
+        Args:
+            job_id (str): The job ID.
+
+        Returns:
+            dict: The job status after cancelling.
+
+        Raises:
+            JobNotFoundError: If the job ID is unknown.
+        """
+
+        with self._records_lock():
+            record = self._read_record(job_id)
+            if record["status"] == "queued":
+                record["status"] = "cancelled"
+                record["finished_at"] = time.time()
+                self._remove_inputs(job_id)
+            elif record["status"] == "running":
+                record["cancel_requested"] = True
+                record["status"] = "cancelling"
+            self._write_record(record)
+
+        self._ensure_dispatcher()
+
+        return job_status(record)
+
+    def stats(self) -> dict:
+        """
+        Summarizes the jobs in the queue.
+
+        Returns:
+            dict: The number of workers, running jobs, users with queued jobs, jobs per status,
+                and the process ID of the web worker running the dispatcher.
+        """
+
+        self._ensure_dispatcher()
+
+        statuses = {}
+        queued_users = set()
+        for record in self._records():
+            statuses[record["status"]] = statuses.get(record["status"], 0) + 1
+            if record["status"] == "queued":
+                queued_users.add(record["user"])
+
+        try:
+            with open(os.path.join(self.jobs_dir, "dispatcher.lock")) as f:
+                dispatcher_pid = int(f.read() or 0) or None
+        except (FileNotFoundError, ValueError):
+            dispatcher_pid = None
+
+        return {
+            "max_workers": self.max_workers,
+            "running": sum(statuses.get(status, 0) for status in ACTIVE_STATUSES),
+            "queued_users": len(queued_users),
+            "jobs": statuses,
+            "dispatcher_pid": dispatcher_pid,
+        }
+
+    def _path(self, job_id: str, extension: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.{extension}")
+
+    @contextmanager
+    def _records_lock(self):
+        # Lock out other threads of this process, then other web workers (with a lock file)
+        os.makedirs(self.jobs_dir, exist_ok=True)
+
+        with self._records_thread_lock:
+            if fcntl is None:
+                yield
+                return
+
+            with open(os.path.join(self.jobs_dir, "records.lock"), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _records(self) -> list[dict]:
+        if not os.path.isdir(self.jobs_dir):
+            return []
+
+        records = []
+        for filename in os.listdir(self.jobs_dir):
+            job_id, extension = os.path.splitext(filename)
+            if extension != ".json" or not _is_uuid(job_id):
+                continue
+            try:
+                with open(os.path.join(self.jobs_dir, filename)) as f:
+                    records.append(json.load(f))
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+
+        return records
+
+    def _read_record(self, job_id: str) -> dict:
+        try:
+            if not _is_uuid(job_id):
+                raise FileNotFoundError(job_id)
+            with open(self._path(job_id, "json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            raise JobNotFoundError(f"Job {job_id} not found.")
+
+    def _write_record(self, record: dict):
+        # Write to a temporary file first so other web workers never read a partially written record
+        path = self._path(record["job_id"], "json")
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(record, f, default=str)
+        os.replace(f"{path}.tmp", path)
+
+    def _remove_inputs(self, job_id: str):
+        try:
+            os.remove(self._path(job_id, "pickle"))
+        except FileNotFoundError:
+            pass
+
+    def _ensure_dispatcher(self):
+        # Only one process dispatches jobs: the first to take the dispatcher lock file, which holds it until it exits
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked from a process that used the queue, which keeps its own dispatcher
+                self._pid = os.getpid()
+                self._dispatcher = None
+                self._dispatcher_lock_file = None
+                self._workers = []
+
+            if self._dispatcher is not None:
+                return
+
+            os.makedirs(self.jobs_dir, exist_ok=True)
+            lock_file = open(os.path.join(self.jobs_dir, "dispatcher.lock"), "a+")
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    lock_file.close()
+                    return
+            lock_file.truncate(0)
+            lock_file.write(str(os.getpid()))
+            lock_file.flush()
+            self._dispatcher_lock_file = lock_file
+
+            # Jobs left running by a previous dispatcher were stopped when its process exited
+            with self._records_lock():
+                for record in self._records():
+                    if record["status"] in ACTIVE_STATUSES:
+                        record["status"] = (
+                            "cancelled" if record["cancel_requested"] else "failed"
+                        )
+                        record["error"] = (
+                            None
+                            if record["cancel_requested"]
+                            else "The process running the job exited before it finished."
+                        )
+                        record["finished_at"] = time.time()
+                        self._write_record(record)
+                        self._remove_inputs(record["job_id"])
+
+            atexit.register(self._stop_workers)
+            self._stopped = threading.Event()
+            self._dispatcher = threading.Thread(
+                target=self._dispatch_loop, name="training-job-dispatcher", daemon=True
+            )
+            self._dispatcher.start()
+
+    def _dispatch_loop(self):
+        last_scan = 0.0
+        last_change = None
+
+        while not self._stopped.is_set():
+            try:
+                busy = [worker for worker in self._workers if worker.job_id is not None]
+                if busy:
+                    ready = wait(
+                        [worker.connection for worker in busy]
+                        + [worker.process.sentinel for worker in busy],
+                        timeout=self.poll_seconds,
+                    )
+                else:
+                    self._stopped.wait(self.poll_seconds)
+                    ready = []
+                if self._stopped.is_set():
+                    return
+
+                for worker in busy:
+                    if worker.connection in ready or worker.process.sentinel in ready:
+                        self._collect(worker)
+
+                # Records are replaced on every change, which updates the directory, so only scan it when it changed
+                # (or every second, for file systems with coarse timestamps)
+                change = os.stat(self.jobs_dir).st_mtime_ns
+                if ready or change != last_change or time.time() - last_scan > 1:
+                    last_change = change
+                    last_scan = time.time()
+                    self._dispatch()
+            except Exception:
+                traceback.print_exc()
+
+    def _dispatch(self):
+        with self._records_lock():
+            records = {record["job_id"]: record for record in self._records()}
+
+            # Terminate the worker processes of cancelled jobs
+            for worker in list(self._workers):
+                record = records.get(worker.job_id)
+                if worker.job_id is None or not (
+                    record is None or record["cancel_requested"]
+                ):
+                    continue
+                worker.stop()
+                self._workers.remove(worker)
+                self._remove_inputs(worker.job_id)
+                if record is not None:
+                    record["status"] = "cancelled"
+                    record["finished_at"] = time.time()
+                    self._write_record(record)
+
+            # Start queued jobs in turn order on idle (or new) worker processes
+            idle = [worker for worker in self._workers if worker.job_id is None]
+            free_slots = self.max_workers - (len(self._workers) - len(idle))
+            queue = sorted(
+                (r for r in records.values() if r["status"] == "queued"), key=_queue_key
+            )
+            for record in queue[: max(free_slots, 0)]:
+                worker = idle.pop() if idle else self._started_worker()
+                worker.job_id = record["job_id"]
+                worker.connection.send(self._path(record["job_id"], "pickle"))
+                record["status"] = "running"
+                record["started_at"] = time.time()
+                self._write_record(record)
+
+            # Drop the oldest finished jobs once there are too many
+            finished = sorted(
+                (r for r in records.values() if r["finished_at"] is not None),
+                key=lambda r: r["finished_at"],
+            )
+            for record in finished[: max(len(finished) - self.max_finished_jobs, 0)]:
+                try:
+                    os.remove(self._path(record["job_id"], "json"))
+                except FileNotFoundError:
+                    pass
+
+    def _started_worker(self) -> "_WorkerProcess":
+        worker = _WorkerProcess(multiprocessing.get_context("spawn"))
+        self._workers.append(worker)
+        return worker
+
+    def _collect(self, worker: "_WorkerProcess"):
+        job_id = worker.job_id
+        try:
+            succeeded, value = (
+                worker.connection.recv()
+                if worker.connection.poll()
+                else (False, "The worker process exited before the job finished.")
+            )
+        except (EOFError, OSError):
+            succeeded, value = False, "The worker process exited before the job finished."
+
+        worker.job_id = None
+        if not worker.process.is_alive():
+            worker.stop()
+            self._workers.remove(worker)
+
+        discarded = None
+        with self._records_lock():
+            self._remove_inputs(job_id)
+            try:
+                record = self._read_record(job_id)
+            except JobNotFoundError:
+                record = None
+
+            if record is not None:
+                record["finished_at"] = time.time()
+                if record["cancel_requested"]:
+                    record["status"] = "cancelled"
+                    discarded = value if succeeded else None
+                elif succeeded:
+                    record["status"] = "completed"
+                    record["result"] = value
+                else:
+                    record["status"] = "failed"
+                    record["error"] = value
+                self._write_record(record)
+
+        if discarded is not None and self.discard_result is not None:
+            self.discard_result(discarded)
+
+    def _stop_workers(self):
+        # Stop the dispatcher before its worker processes, so it never sends a job to a stopped worker
+        self._stopped.set()
+        self._dispatcher.join(timeout=self.poll_seconds + 5)
+        for worker in self._workers:
+            worker.stop()
+
+
+class _WorkerProcess:
+    # A worker process running one job at a time, sent the path of the job inputs through a pipe
+    def __init__(self, context):
+        self.job_id = None
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_run_jobs, args=(child_connection,))
+        self.process.start()
+        child_connection.close()
+
+    def stop(self):
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+        self.connection.close()
+
+
+def _run_jobs(connection):
+    # Runs the jobs sent by the dispatcher until the pipe is closed
+    while True:
+        try:
+            inputs_path = connection.recv()
+        except EOFError:
+            return
+
+        try:
+            with open(inputs_path, "rb") as f:
+                function, args = pickle.load(f)
+            connection.send((True, function(*args)))
+        except Exception as e:
+            connection.send(
+                (False, "".join(traceback.format_exception_only(e)).strip())
+            )
+
+
+def job_status(record: dict) -> dict:
+    """
+    Describes a job from its record, with how long it has been queued and running.
+
+    Args:
+        record (dict): The job record.
+
+    Returns:
+        dict: The job status, timing, and result (once completed) or error (once failed).
+    """
+
+    now = time.time()
+    started_at, finished_at = record["started_at"], record["finished_at"]
+    return {
+        "job_id": record["job_id"],
+        "kind": record["kind"],
+        "status": record["status"],
+        "result": record["result"],
+        "error": record["error"],
+        "submitted_at": record["submitted_at"],
+        "started_at": started_at,
+        "finished_at": finished_at,
+        "seconds_queued": (started_at or finished_at or now) - record["submitted_at"],
+        "seconds_running": (finished_at or now) - started_at if started_at else 0.0,
+    }
+
+
+def _queue_key(record: dict) -> tuple:
+    # Queued jobs are dispatched in turn order, then in the order they were submitted
+    return record["turn"], record["submitted_at"]
+
+
+def _is_uuid(value: str) -> bool:
+    # Job IDs become file names, so reject anything else (ex paths)
+    try:
+        return str(uuid.UUID(value)) == value
+    except (ValueError, TypeError, AttributeError):
+        return False
+
+
+def stored_tested_model(
+    store_dir: str,
+    model_data: pd.DataFrame,
+    target: str,
+    model_type: str,
+    metadata: dict,
+    use_cache: bool = True,
+) -> dict:
+    """
+    Trains and evaluates a model with tested_model, then saves it in the model store directory.
+    If the same model data, target and model type were trained before, the stored model is reused instead (see TrainingCache).
+    Runs in a worker process, so only the model UUID and accuracy are sent back instead of the model.
+
+    Args:
+        store_dir (str): The directory of the model store.
+        model_data (pd.DataFrame): The input data for training the model.
+        target (str): The target column to predict.
+        model_type (str): The type of sklearn model to use.
+        metadata (dict): Information describing the model, stored with it.
+        use_cache (bool, optional): Whether to reuse a stored model trained on the same inputs. Defaults to True.
+
+    Returns:
+        dict: The model UUID and accuracy.
+    """
+
+    import mlb_metrics_helpers
+    from model_store import ModelStore
+    from training_cache import TrainingCache, training_fingerprint
+
+    model_store = ModelStore(store_dir)
+    training_cache = TrainingCache(model_store)
+    engineered_features = metadata.get("engineered_features", False)
+
+    fingerprint = training_fingerprint(
+        model_data, target, model_type, engineered_features
+    )
+    if use_cache:
+        cached = training_cache.get(fingerprint)
+        if cached is not None:
+            return {"model_uuid": cached["model_uuid"], "accuracy": cached["accuracy"]}
+
+    start = time.perf_counter()
+    model, accuracy = mlb_metrics_helpers.tested_model(
+        model_data, target, model_type, engineered_features=engineered_features
+    )
+    fit_seconds = time.perf_counter() - start
+
+    model_uuid = model_store.put(
+        model,
+        {**metadata, "accuracy": accuracy, "training_fingerprint": fingerprint},
+        model_data,
+    )
+    if use_cache:
+        training_cache.put(fingerprint, model_uuid, accuracy, fit_seconds)
+
+    return {"model_uuid": model_uuid, "accuracy": accuracy}
+
+
+def stored_compared_models(
+    store_dir: str,
+    model_data: pd.DataFrame,
+    target: str,
+    model_types: list[str],
+    metadata: dict,
+    use_cache: bool = True,
+) -> dict:
+    """
+    Trains and evaluates several model types with compared_models, then saves every model in the model store directory.
+    Model types trained on the same model data and target before reuse their stored model instead (see TrainingCache).
+    Runs in a worker process, so only the leaderboard of model UUIDs and accuracies is sent back instead of the models.
+
+    Args:
+        store_dir (str): The directory of the model store.
+        model_data (pd.DataFrame): The input data for training the models.
+        target (str): The target column to predict.
+        model_types (list[str]): The types of sklearn model to train (None for all of them).
+        metadata (dict): Information describing the models, stored with each of them.
+        use_cache (bool, optional): Whether to reuse stored models trained on the same inputs. Defaults to True.
+
+    Returns:
+        dict: The leaderboard, with the rank, model type, model UUID, accuracy and fit time of each model.
+    """
+
+    import mlb_metrics_helpers
+    from model_store import ModelStore
+    from training_cache import TrainingCache, training_fingerprint
+
+    model_store = ModelStore(store_dir)
+    training_cache = TrainingCache(model_store)
+    engineered_features = metadata.get("engineered_features", False)
+    model_types = model_types or mlb_metrics_helpers.SKLEARN_MODEL_TYPES
+
+    fingerprints = {
+        model_type: training_fingerprint(
+            model_data, target, model_type, engineered_features
+        )
+        for model_type in model_types
+    }
+
+    # Model types with a stored model are not trained again
+    entries = []
+    remaining = []
+    for model_type in model_types:
+        cached = training_cache.get(fingerprints[model_type]) if use_cache else None
+        if cached is None:
+            remaining.append(model_type)
+        else:
+            entries.append(
+                {
+                    "model_type": model_type,
+                    "model_uuid": cached["model_uuid"],
+                    "accuracy": cached["accuracy"],
+                    "fit_seconds": 0.0,
+                }
+            )
+
+    if remaining:
+        for entry in mlb_metrics_helpers.compared_models(
+            model_data, target, remaining, engineered_features=engineered_features
+        ):
+            model_uuid = model_store.put(
+                entry["model"],
+                {
+                    **metadata,
+                    "model_type": entry["model_type"],
+                    "accuracy": entry["accuracy"],
+                    "training_fingerprint": fingerprints[entry["model_type"]],
+                },
+                model_data,
+            )
+            if use_cache:
+                training_cache.put(
+                    fingerprints[entry["model_type"]],
+                    model_uuid,
+                    entry["accuracy"],
+                    entry["preprocessing_seconds"] + entry["fit_seconds"],
+                )
+            entries.append(
+                {
+                    "model_type": entry["model_type"],
+                    "model_uuid": model_uuid,
+                    "accuracy": entry["accuracy"],
+                    "fit_seconds": entry["fit_seconds"],
+                }
+            )
+
+    # Rank by accuracy, most accurate first
+    leaderboard = sorted(entries, key=lambda entry: -entry["accuracy"])
+    for rank, entry in enumerate(leaderboard, start=1):
+        entry["rank"] = rank
+
+    return {"leaderboard": leaderboard}
+
+
+def stored_searched_model(
+    store_dir: str,
+    model_data: pd.DataFrame,
+    target: str,
+    model_type: str,
+    metadata: dict,
+    search_options: dict,
+) -> dict:
+    """
+    Searches hyperparameters with searched_model, then saves the best model in the model store directory.
+    Runs in a worker process, so only the model UUID, accuracy and search results are sent back instead of the model.
+
+    Args:
+        store_dir (str): The directory of the model store.
+        model_data (pd.DataFrame): The input data for training the model.
+        target (str): The target column to predict.
+        model_type (str): The type of sklearn model to use.
+        metadata (dict): Information describing the model, stored with it.
+        search_options (dict): Keyword arguments of searched_model (ex search, param_grid, cv, n_jobs, time_budget_seconds).
+
+    Returns:
+        dict: The model UUID, accuracy, and search results.
+    """
+
+    import model_search
+    from model_store import ModelStore
+
+    model, accuracy, search_results = model_search.searched_model(
+        model_data, target, model_type, **search_options
+    )
+    model_uuid = ModelStore(store_dir).put(
+        model,
+        {**metadata, "accuracy": accuracy, "best_params": search_results["best_params"]},
+        model_data,
+    )
+
+    return {"model_uuid": model_uuid, "accuracy": accuracy, **search_results}
+
+
+def stored_streamed_model(
+    store_dir: str,
+    source: dict,
+    target: str,
+    model_type: str,
+    metadata: dict,
+    streaming_options: dict,
+) -> dict:
+    """
+    Trains and evaluates a model on model data streamed in chunks with streamed_model, then saves it in the model store directory.
+    The model data is not stored with the model (it can be larger than memory), so the model cannot be updated later.
+
+    Args:
+        store_dir (str): The directory of the model store.
+        source (dict): The model data source (see streaming_training.source_chunks).
+        target (str): The target column to predict (None for the target of the source).
+        model_type (str): The type of sklearn model to use (see streaming_training.STREAMING_MODEL_TYPES).
+        metadata (dict): Information describing the model, stored with it.
+        streaming_options (dict): Keyword arguments of streamed_model (ex test_size, epochs, sample_rows).
+
+    Returns:
+        dict: The model UUID, accuracy, and the number of rows, training rows, held-out rows, chunks and passes.
+    """
+
+    import streaming_training
+    from model_store import ModelStore
+
+    chunks, source_target = streaming_training.source_chunks(source)
+    target = target or source_target
+
+    model, accuracy, summary = streaming_training.streamed_model(
+        chunks, target, model_type, **streaming_options
+    )
+    model_uuid = ModelStore(store_dir).put(
+        model,
+        {
+            **metadata,
+            "target": target,
+            "training_rows": summary["training_rows"],
+            "accuracy": accuracy,
+        },
+    )
+
+    return {"model_uuid": model_uuid, "accuracy": accuracy, **summary}
+
+
+def stored_updated_model(
+    store_dir: str, model_uuid: str, new_model_data: pd.DataFrame
+) -> dict:
+    """
+    Updates a stored model with new rows using updated_model, then saves the updated model (and all its training rows)
+    in the model store directory under a new UUID. The original model is kept.
+
+    Args:
+        store_dir (str): The directory of the model store.
+        model_uuid (str): The UUID of the model to update, which must have been stored with its training data.
+        new_model_data (pd.DataFrame): The new rows, with the same columns as the model data.
+
+    Returns:
+        dict: The UUID of the updated model, the UUID of the original model, the accuracy of the original model on the new rows,
+            the update method and the update time in seconds.
+
+    Raises:
+        ModelNotFoundError: If the model, or its training data, is not in the store.
+    """
+
+    import mlb_metrics_helpers
+    from model_store import ModelStore
+
+    model_store = ModelStore(store_dir)
+    metadata = model_store.metadata(model_uuid)
+    model_data = model_store.training_data(model_uuid)
+
+    start = time.perf_counter()
+    model, accuracy, update_method = mlb_metrics_helpers.updated_model(
+        model_store.get(model_uuid), model_data, new_model_data, metadata["target"]
+    )
+    update_seconds = time.perf_counter() - start
+
+    # Keep the description of the original model, but not its size, accuracy or creation time
+    updated_metadata = {
+        key: metadata[key]
+        for key in [
+            "player_id",
+            "target",
+            "model_type",
+            "best_params",
+            "engineered_features",
+        ]
+        if key in metadata
+    }
+    updated_uuid = model_store.put(
+        model,
+        {
+            **updated_metadata,
+            "training_rows": len(model_data) + len(new_model_data),
+            "parent_model_uuid": model_uuid,
+            "update_method": update_method,
+            "new_rows_accuracy": accuracy,
+        },
+        pd.concat([model_data, new_model_data], ignore_index=True),
+    )
+
+    return {
+        "model_uuid": updated_uuid,
+        "parent_model_uuid": model_uuid,
+        "accuracy": accuracy,
+        "update_method": update_method,
+        "update_seconds": update_seconds,
+    }
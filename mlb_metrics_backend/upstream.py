@@ -0,0 +1,288 @@
+import copy
+import importlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Hashable
+
+# Modules of the upstream libraries that send their HTTP requests with requests.get
+# (MLB-StatsAPI, and pybaseball's Statcast player, league-wide and Chadwick register downloads)
+POOLED_MODULES = [
+    "statsapi",
+    "pybaseball.utils",
+    "pybaseball.datasources.statcast",
+    "pybaseball.playerid_lookup",
+]
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limit: tokens are added at a fixed rate up to a burst size,
+    and each request takes one token, waiting for it if the bucket is empty.
+
+    Args:
+        rate (float): The number of tokens added per second.
+        burst (int): The maximum number of tokens in the bucket (requests sent at once after an idle period).
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Takes a token, waiting until one is available.
+
+        Returns:
+            float: The time waited in seconds (0 if a token was available).
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+
+            # Take the token now (possibly going negative), so waiting callers are served in order
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+
+        return wait
+
+
+class PooledRequests:
+    """
+    Stand-in for the requests module inside upstream libraries, sending their GET requests through
+    the pooled session and rate limit of an Upstream. Every other attribute is the requests module's own.
+
+    Args:
+        upstream (Upstream): The upstream access layer.
+    """
+
+    def __init__(self, upstream: "Upstream"):
+        self._upstream = upstream
+
+    def get(self, url: str, **kwargs):
+        return self._upstream.get(url, **kwargs)
+
+    def __getattr__(self, name: str):
+        import requests
+
+        return getattr(requests, name)
+
+
+class Upstream:
+    """
+    Access layer for upstream calls (pybaseball and MLB-StatsAPI):
+    - Identical calls in flight at the same time are coalesced (single-flight): only the first one is sent,
+      and the others wait for its result.
+    - Results of calls with a TTL are cached for that long (ex player_stat_data).
+    - HTTP requests of the upstream libraries share pooled keep-alive connections and a token bucket rate limit.
+    Counters of the calls sent, coalesced, cached and throttled are kept for monitoring.
+
+    Args:
+        rate (float, optional): The number of upstream HTTP requests allowed per second. Defaults to 5.
+        burst (int, optional): The number of upstream HTTP requests allowed at once. Defaults to 10.
+        pool_size (int, optional): The number of keep-alive connections kept per host. Defaults to 16.
+        max_cached (int, optional): The maximum number of cached results. Defaults to 1024.
+        pooled_modules (list[str], optional): The modules whose requests.get is routed through the pool and rate limit,
+            each installed on the first call of a function from the same package. Defaults to None (POOLED_MODULES).
+    """
+
+    def __init__(
+        self,
+        rate: float = 5,
+        burst: int = 10,
+        pool_size: int = 16,
+        max_cached: int = 1024,
+        pooled_modules: list[str] = None,
+    ):
+        self.bucket = TokenBucket(rate, burst)
+        self.pool_size = pool_size
+        self.max_cached = max_cached
+        self.pooled_modules = (
+            POOLED_MODULES if pooled_modules is None else pooled_modules
+        )
+
+        self.calls = 0
+        self.coalesced = 0
+        self.cached = 0
+        self.http_requests = 0
+        self.throttled = 0
+        self.throttled_seconds = 0.0
+
+        self._session = None
+        # Pooled modules whose requests.get is already routed through this upstream
+        self._installed = set()
+        # Key -> future of the call in flight
+        self._in_flight = {}
+        # Key -> (expiry time, result), least recently used first
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def call(
+        self, key: Hashable, function: Callable, *args, ttl: float = None, **kwargs
+    ):
+        """
+        Calls an upstream function, unless an identical call is in flight (its result is shared)
+        or a cached result has not expired.
+
+        Args:
+            key (Hashable): Identifies identical calls (ex ("player_stat_data", player_id, "career")).
+            function (Callable): The upstream function.
+            *args: The positional arguments of the function.
+            ttl (float, optional): The number of seconds the result is cached. Defaults to None (not cached).
+            **kwargs: The keyword arguments of the function.
+
+        Returns:
+            The result of the function (a copy for coalesced and cached calls, so callers never share mutable results).
+        """
+
+        self.install(self._targeted_modules(function))
+
+        with self._lock:
+            if key in self._cache:
+                expiry, result = self._cache[key]
+                if time.monotonic() < expiry:
+                    self._cache.move_to_end(key)
+                    self.cached += 1
+                    return copy.deepcopy(result)
+                del self._cache[key]
+
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            if ttl:
+                # Cache a copy, so the caller can change its result
+                cached = copy.deepcopy(result)
+                with self._lock:
+                    self._cache[key] = (time.monotonic() + ttl, cached)
+                    while len(self._cache) > self.max_cached:
+                        self._cache.popitem(last=False)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def get(self, url: str, **kwargs):
+        """
+        Sends a GET request through the pooled session, waiting for the rate limit.
+
+        Args:
+            url (str): The URL.
+            **kwargs: The keyword arguments of requests.Session.get (ex params, timeout, stream).
+
+        Returns:
+            requests.Response: The response.
+        """
+
+        waited = self.bucket.acquire()
+        with self._lock:
+            self.http_requests += 1
+            if waited > 0:
+                self.throttled += 1
+                self.throttled_seconds += waited
+
+        return self.session.get(url, **kwargs)
+
+    @property
+    def session(self):
+        """
+        The pooled HTTP session, created on first use.
+        """
+
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=self.pool_size, pool_maxsize=self.pool_size
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+
+            return self._session
+
+    def install(self, modules: list[str] = None):
+        """
+        Routes the requests.get calls of pooled modules through this upstream (once per module).
+
+        Args:
+            modules (list[str], optional): The pooled modules to install. Defaults to None (every pooled module).
+        """
+
+        modules = self.pooled_modules if modules is None else modules
+        if self._installed.issuperset(modules):
+            return
+
+        with self._lock:
+            for module_name in modules:
+                if module_name not in self._installed:
+                    module = importlib.import_module(module_name)
+                    module.requests = PooledRequests(self)
+                    self._installed.add(module_name)
+
+    def _targeted_modules(self, function: Callable) -> list[str]:
+        # The pooled modules of the package a function comes from (ex pybaseball for statcast_pitcher),
+        # so a statsapi call does not import the pybaseball modules
+        package = (getattr(function, "__module__", None) or "").split(".")[0]
+        return [
+            module_name
+            for module_name in self.pooled_modules
+            if module_name.split(".")[0] == package
+        ]
+
+    def clear_cache(self):
+        """
+        Drops every cached result.
+        """
+
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        """
+        Summarizes the upstream usage since the process started.
+
+        Returns:
+            dict: The number of calls sent, coalesced and served from the cache, the number of HTTP requests,
+                how many of them were throttled and for how long in total, and the number of cached results.
+        """
+
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "cached": self.cached,
+                "http_requests": self.http_requests,
+                "throttled": self.throttled,
+                "throttled_seconds": self.throttled_seconds,
+                "cached_results": len(self._cache),
+            }